@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Place, Review, PlaceRecommendation
+from .models import Job, MenuItem, Place, Review, PlaceRecommendation, SyncCheckpoint, SyncRun
 
 
 @admin.register(Place)
@@ -20,3 +20,30 @@ class PlaceRecommendationAdmin(admin.ModelAdmin):
 	list_display = ('place', 'rank', 'text', 'confidence', 'source')
 	list_filter = ('source',)
 	search_fields = ('text',)
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+	list_display = ('id', 'status', 'started_at', 'finished_at')
+	list_filter = ('status',)
+
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+	list_display = ('run', 'place', 'status', 'attempts', 'duration_ms', 'updated_at')
+	list_filter = ('status',)
+	search_fields = ('place__name', 'last_error')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'kind', 'status', 'priority', 'attempts', 'locked_by', 'run_after', 'finished_at')
+	list_filter = ('kind', 'status')
+	search_fields = ('last_error',)
+
+
+@admin.register(MenuItem)
+class MenuItemAdmin(admin.ModelAdmin):
+	list_display = ('name', 'term', 'source', 'created_at')
+	list_filter = ('source',)
+	search_fields = ('name', 'term')
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MenusConfig(AppConfig):
     name = 'menus'
+
+    def ready(self):
+        # Signal receivers that keep the cached place names fresh.
+        from . import places  # noqa: F401
@@ -0,0 +1,77 @@
+"""
+Place classification used to keep non-restaurant places (grocery stores,
+supermarkets, gas stations) out of the database.
+
+`PlaceClassifier` matches a place's name against all exclusion keywords with
+a single compiled regex and checks its Google place types against an
+exclusion set. The same rules are exposed as a Django `Q` so cleanup can run
+as one SQL filter instead of scanning every place in Python.
+"""
+
+import re
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional
+
+from django.db.models import Q
+
+DEFAULT_EXCLUDED_KEYWORDS = [
+    "safeway",
+    "smith",
+    "smiths",
+    "smith's",
+    "grocery",
+    "market",
+    "walmart",
+    "costco",
+    "albertsons",
+    "whole foods",
+    "trader joe",
+]
+
+# Google Places (New) types that are never food/drink spots for our purposes.
+DEFAULT_EXCLUDED_TYPES = {
+    "grocery_store",
+    "supermarket",
+    "convenience_store",
+    "warehouse_store",
+    "department_store",
+    "discount_store",
+    "gas_station",
+}
+
+
+class PlaceClassifier:
+    def __init__(self, keywords: Optional[Iterable[str]] = None, excluded_types: Optional[Iterable[str]] = None):
+        needles = DEFAULT_EXCLUDED_KEYWORDS if keywords is None else keywords
+        # Dedupe, longest first so the reported match is the most specific keyword.
+        self.keywords = sorted({k.strip().lower() for k in needles if k.strip()}, key=lambda k: (-len(k), k))
+        self.excluded_types = set(DEFAULT_EXCLUDED_TYPES if excluded_types is None else excluded_types)
+        self._pattern = re.compile("|".join(re.escape(k) for k in self.keywords)) if self.keywords else None
+
+    def with_extra_keywords(self, extra: Iterable[str]) -> "PlaceClassifier":
+        return PlaceClassifier(list(self.keywords) + list(extra), self.excluded_types)
+
+    def exclusion_reason(self, name: Optional[str], types: Iterable[str] = ()) -> Optional[str]:
+        """Return why a place should be excluded, or None if it should be kept."""
+        excluded = self.excluded_types.intersection(t for t in types if t)
+        if excluded:
+            return f"type {sorted(excluded)[0]}"
+        if self._pattern is not None and name:
+            match = self._pattern.search(name.lower())
+            if match:
+                return f"name matches '{match.group(0)}'"
+        return None
+
+    def is_excluded(self, name: Optional[str], types: Iterable[str] = ()) -> bool:
+        return self.exclusion_reason(name, types) is not None
+
+    def exclusion_q(self) -> Q:
+        """SQL equivalent of `is_excluded` over `Place.name` / `Place.primary_type`."""
+        clauses = [Q(name__icontains=k) for k in self.keywords]
+        if self.excluded_types:
+            clauses.append(Q(primary_type__in=sorted(self.excluded_types)))
+        return reduce(or_, clauses) if clauses else Q(pk__in=[])
+
+
+default_classifier = PlaceClassifier()
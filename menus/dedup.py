@@ -0,0 +1,101 @@
+"""
+Near-duplicate review detection with 64-bit SimHash fingerprints.
+
+Google rotates the handful of reviews it returns per place, so the same text
+shows up again under a new review id or with trivial edits. Each review gets
+a SimHash of its word shingles; two reviews are near-duplicates when their
+fingerprints differ in at most `MAX_DISTANCE` bits.
+
+For lookup the fingerprint is split into `BANDS` 16-bit bands stored in
+indexed columns on `Review`. By the pigeonhole principle, fingerprints within
+`BANDS - 1` bits of each other agree exactly on at least one band, so the
+candidate set is an indexed OR over four equality lookups followed by a
+Hamming-distance check on the (few) candidates.
+"""
+
+import hashlib
+import re
+from functools import reduce
+from operator import or_
+from typing import List, Optional
+
+from django.db.models import Q
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+MAX_DISTANCE = BANDS - 1
+# Very short reviews ("Great food!") collide legitimately; don't fingerprint them.
+MIN_TOKENS = 5
+SHINGLE_SIZE = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> Optional[int]:
+    """Unsigned 64-bit SimHash of word shingles, or None for very short text."""
+    tokens = _tokens(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    shingles = [" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    weights = [0] * BITS
+    for shingle in shingles:
+        h = _hash64(shingle)
+        for bit in range(BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def to_signed(fp: int) -> int:
+    """Map an unsigned 64-bit fingerprint into BigIntegerField's signed range."""
+    return fp - (1 << BITS) if fp >= (1 << (BITS - 1)) else fp
+
+
+def to_unsigned(fp: int) -> int:
+    return fp + (1 << BITS) if fp < 0 else fp
+
+
+def bands(fp: int) -> List[int]:
+    fp = to_unsigned(fp)
+    return [(fp >> (i * BAND_BITS)) & _BAND_MASK for i in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count("1")
+
+
+def fingerprint_fields(text: str) -> dict:
+    """Model field values (`simhash`, `simhash_band0..3`) for a review text."""
+    fp = simhash(text)
+    if fp is None:
+        return {"simhash": None, **{f"simhash_band{i}": None for i in range(BANDS)}}
+    return {"simhash": to_signed(fp), **{f"simhash_band{i}": b for i, b in enumerate(bands(fp))}}
+
+
+def band_q(fp: int) -> Q:
+    return reduce(or_, (Q(**{f"simhash_band{i}": b}) for i, b in enumerate(bands(fp))))
+
+
+def find_near_duplicate(queryset, fp: Optional[int], max_distance: int = MAX_DISTANCE):
+    """Return the closest canonical review in `queryset` within `max_distance` bits, or None."""
+    if fp is None:
+        return None
+    best, best_distance = None, max_distance + 1
+    candidates = queryset.filter(band_q(fp)).only("id", "simhash", "duplicate_of_id")
+    for candidate in candidates:
+        distance = hamming(fp, candidate.simhash)
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+    if best is not None and best.duplicate_of_id:
+        # Link to the canonical review, never to another duplicate.
+        return best.duplicate_of
+    return best
@@ -0,0 +1,183 @@
+"""
+Review embeddings for the recommendation pipeline.
+
+`EmbeddingEngine` wraps sentence-transformers (Model A1). `EmbeddingStore`
+persists one float32 vector per (review, model name) in `ReviewEmbedding`,
+so review text is encoded once after ingest instead of on every run; a
+SHA-256 of the encoded text invalidates vectors when the text changes.
+"""
+
+import hashlib
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from .models import Review, ReviewEmbedding
+
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:  # pragma: no cover - optional dependency
+    SentenceTransformer = None  # type: ignore
+
+
+# ---------------------------------------------------------------------------
+# Embedding layer (A1)
+# ---------------------------------------------------------------------------
+class EmbeddingEngine:
+    def __init__(self, model_name: str):
+        if SentenceTransformer is None:
+            raise CommandError("sentence-transformers is not installed. Please install it to run embeddings.")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def embed(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        """Encode `texts` in batches of similar length (less padding), returned in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        encoded = self.model.encode([texts[i] for i in order], batch_size=batch_size, convert_to_numpy=True)
+        vectors = np.empty_like(encoded)
+        vectors[order] = encoded
+        return vectors
+
+
+# ---------------------------------------------------------------------------
+# Representative review selection
+# ---------------------------------------------------------------------------
+def mmr_order(vectors: np.ndarray, k: int, diversity: float = 0.3) -> List[int]:
+    """Indices of up to `k` rows by maximal marginal relevance.
+
+    Relevance is cosine similarity to the centroid; each pick is penalized by
+    its highest similarity to anything already picked, weighted by
+    `diversity` (0 = plain centroid ranking, 1 = maximally spread out).
+    One matrix-vector product per pick, so it stays cheap for a few hundred reviews.
+    """
+    n = len(vectors)
+    if n == 0 or k <= 0:
+        return []
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    centroid = unit.mean(axis=0)
+    relevance = unit @ (centroid / max(float(np.linalg.norm(centroid)), 1e-12))
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picked: List[int] = []
+    for _ in range(min(k, n)):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, (1 - diversity) * relevance - diversity * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, unit @ unit[best])
+    return picked
+
+
+def pack_to_budget(texts: Sequence[str], order: Sequence[int], budget: int, count_tokens) -> List[str]:
+    """Take `texts` in `order` while their estimated token cost fits in `budget`.
+
+    Reviews that don't fit are skipped (a shorter later one may still fit).
+    The per-item overhead covers the quotes and comma of compact JSON.
+    """
+    packed, used = [], 0
+    for i in order:
+        cost = count_tokens(texts[i]) + 2
+        if used + cost > budget:
+            continue
+        packed.append(texts[i])
+        used += cost
+    return packed
+
+
+# ---------------------------------------------------------------------------
+# Persistent store
+# ---------------------------------------------------------------------------
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def unpack_vector(blob, dim: int) -> np.ndarray:
+    return np.frombuffer(bytes(blob), dtype="<f4", count=dim)
+
+
+class EmbeddingStore:
+    """Read-through cache of review embeddings for one model.
+
+    `vectors_for(reviews)` returns a matrix aligned with `reviews`, encoding
+    (and persisting) only the reviews that have no stored vector or whose
+    text hash no longer matches.
+    """
+
+    def __init__(self, engine: EmbeddingEngine, model_name: str = None):
+        self.engine = engine
+        self.model_name = model_name or engine.model_name
+        self.hits = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+
+    def load(self, review_ids: Sequence[int], chunk_size: int = 500) -> Dict[int, ReviewEmbedding]:
+        review_ids = list(review_ids)
+        loaded: Dict[int, ReviewEmbedding] = {}
+        # Chunked to stay under SQLite's bound-parameter limit on large runs.
+        for start in range(0, len(review_ids), chunk_size):
+            rows = ReviewEmbedding.objects.filter(
+                review_id__in=review_ids[start : start + chunk_size], model_name=self.model_name
+            )
+            loaded.update((row.review_id, row) for row in rows)
+        return loaded
+
+    def vectors_for(self, reviews: Sequence[Review], batch_size: int = 64) -> np.ndarray:
+        if not reviews:
+            return np.zeros((0, 0), dtype=np.float32)
+        stored = self.load([r.id for r in reviews])
+        hashes = [content_hash(r.text) for r in reviews]
+
+        vectors: List[np.ndarray] = [None] * len(reviews)  # type: ignore[list-item]
+        missing = []
+        for i, (review, digest) in enumerate(zip(reviews, hashes)):
+            row = stored.get(review.id)
+            if row is not None and row.content_hash == digest:
+                vectors[i] = unpack_vector(row.vector, row.dim)
+            else:
+                missing.append(i)
+
+        if missing:
+            started = time.perf_counter()
+            encoded = np.asarray(self.engine.embed([reviews[i].text for i in missing], batch_size=batch_size), dtype=np.float32)
+            self.encode_seconds += time.perf_counter() - started
+            self._save([reviews[i] for i in missing], [hashes[i] for i in missing], encoded, stored)
+            for i, vec in zip(missing, encoded):
+                vectors[i] = vec
+
+        self.hits += len(reviews) - len(missing)
+        self.encoded += len(missing)
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def _save(self, reviews, hashes, encoded: np.ndarray, stored: Dict[int, ReviewEmbedding]) -> None:
+        create, update = [], []
+        for review, digest, vec in zip(reviews, hashes, encoded):
+            row = stored.get(review.id)
+            if row is None:
+                create.append(
+                    ReviewEmbedding(
+                        review_id=review.id,
+                        model_name=self.model_name,
+                        content_hash=digest,
+                        dim=vec.shape[0],
+                        vector=pack_vector(vec),
+                    )
+                )
+            else:
+                row.content_hash, row.dim, row.vector = digest, vec.shape[0], pack_vector(vec)
+                row.updated_at = timezone.now()  # bulk_update skips auto_now
+                update.append(row)
+        if create:
+            ReviewEmbedding.objects.bulk_create(create, batch_size=500, ignore_conflicts=True)
+        if update:
+            ReviewEmbedding.objects.bulk_update(update, ["content_hash", "dim", "vector", "updated_at"], batch_size=500)
@@ -0,0 +1,158 @@
+"""
+Model-free stand-ins for the recommendation pipeline, used by
+`benchmark_recommendations` (and tests) to exercise batching, caching and
+parallelism without GGUF files, sentence-transformers or a llama.cpp build.
+
+  - `FakeEmbeddingEngine`: hashed bag-of-words vectors (similar texts get
+    similar vectors, so MMR selection behaves realistically) plus a
+    simulated per-review encode cost.
+  - `FakeLlamaRunner`: sleeps for a simulated latency, then answers the
+    extraction or reasoning prompt with well-formed JSON.
+  - `synthetic_review_text`: plausible review text drawn from a small dish
+    vocabulary; `synthetic_places` / `synthetic_reviews` build whole unsaved
+    rows for `generate_synthetic_data`.
+
+Latencies are `time.sleep`s, which release the GIL: concurrent workers
+overlap perfectly, like a llama-server with one slot per worker.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from .llm import estimate_tokens
+from .models import Place, Review
+
+DISHES = [
+    "latte", "cappuccino", "cold brew", "breakfast burrito", "huckleberry pancakes", "bison burger",
+    "fish tacos", "green chile stew", "margherita pizza", "pad thai", "ramen", "chicken sandwich",
+    "caesar salad", "fries", "cinnamon roll", "chai", "elk chili", "poke bowl", "pho", "brisket",
+]
+ADJECTIVES = ["amazing", "solid", "too salty", "perfectly cooked", "huge", "bland", "fresh", "overpriced", "creamy"]
+TEMPLATES = [
+    "The {dish} was {adj}. {extra}",
+    "Came for the {dish} and it was {adj}; the {dish2} was {adj2} too.",
+    "{extra} Order the {dish}, it is {adj}.",
+    "Honestly the {dish} is {adj} but skip the {dish2}.",
+]
+EXTRAS = ["Service was quick.", "Long line on weekends.", "Great patio.", "Parking is tough.", "Friendly staff."]
+
+NAME_FIRST = ["Golden", "Little", "Rocky", "Bridger", "Gallatin", "Copper", "Wild", "Blue", "Old Town", "Northside"]
+NAME_SECOND = ["Bison", "Trout", "Pine", "Elk", "Canyon", "Sage", "Aspen", "Spur", "Ridge", "Moose"]
+PLACE_TYPES = [
+    ("Cafe", "cafe"), ("Coffee", "coffee_shop"), ("Grill", "restaurant"), ("Kitchen", "restaurant"),
+    ("Taqueria", "mexican_restaurant"), ("Pizzeria", "pizza_restaurant"), ("Bakery", "bakery"), ("Tavern", "bar"),
+]
+STREETS = ["Main St", "Babcock St", "Mendenhall St", "7th Ave", "19th Ave", "Kagy Blvd", "Oak St", "Huffine Ln"]
+AUTHORS = ["Alex", "Sam", "Jordan", "Taylor", "Casey", "Riley", "Morgan", "Jamie", "Drew", "Quinn"]
+# Google ratings skew high: roughly the distribution of 1..5 stars on real listings.
+RATING_WEIGHTS = [0.07, 0.05, 0.10, 0.28, 0.50]
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def synthetic_review_text(rng: random.Random) -> str:
+    return rng.choice(TEMPLATES).format(
+        dish=rng.choice(DISHES),
+        dish2=rng.choice(DISHES),
+        adj=rng.choice(ADJECTIVES),
+        adj2=rng.choice(ADJECTIVES),
+        extra=rng.choice(EXTRAS),
+    )
+
+
+def synthetic_places(rng: random.Random, count: int, prefix: str, city: str = "Bozeman") -> Iterator[Place]:
+    """Unsaved `Place` rows with unique `google_place_id`s of the form `<prefix><i>`."""
+    for i in range(count):
+        first, second = rng.choice(NAME_FIRST), rng.choice(NAME_SECOND)
+        label, primary_type = rng.choice(PLACE_TYPES)
+        yield Place(
+            name=f"{first} {second} {label} {i}",
+            google_place_id=f"{prefix}{i}",
+            address=f"{rng.randint(1, 3999)} {rng.choice(STREETS)}, {city}",
+            city=city,
+            latitude=45.68 + rng.uniform(-0.05, 0.05),
+            longitude=-111.04 + rng.uniform(-0.07, 0.07),
+            primary_type=primary_type,
+        )
+
+
+def synthetic_reviews(rng: random.Random, place: Place, count: int, now: datetime, days: int = 1095) -> Iterator[Review]:
+    """Unsaved `Review` rows for a saved `place`, spread over the last `days` days."""
+    for j in range(count):
+        sentences = [synthetic_review_text(rng) for _ in range(rng.choice((1, 1, 2, 3)))]
+        yield Review(
+            place=place,
+            google_review_id=f"{place.google_place_id}/reviews/{j}",
+            author_name=f"{rng.choice(AUTHORS)} {chr(65 + rng.randrange(26))}.",
+            rating=rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+            text=" ".join(sentences),
+            created_at=now - timedelta(seconds=rng.randrange(days * 86400)),
+        )
+
+
+def _jittered(seconds: float, jitter: float, rng: random.Random) -> float:
+    return max(seconds * (1 + jitter * rng.uniform(-1, 1)), 0.0)
+
+
+class FakeEmbeddingEngine:
+    def __init__(self, model_name: str = "fake-embedder", dim: int = 384, latency_per_text: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.model_name = model_name
+        self.dim = dim
+        self.latency_per_text = latency_per_text
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+
+    def embed(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        texts = list(texts)
+        if self.latency_per_text:
+            time.sleep(_jittered(self.latency_per_text * len(texts), self.jitter, self._rng))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD_RE.findall(text.lower()):
+                bucket = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "big")
+                vectors[row, bucket % self.dim] += 1.0
+        return vectors
+
+
+class FakeLlamaRunner:
+    """Plays either model: `role` is "extract" (A2) or "reason" (B)."""
+
+    def __init__(self, role: str, model_path: Path, latency: float = 0.0, jitter: float = 0.0, temperature: float = 0.4, seed: int = 0):
+        self.role = role
+        self.model_path = model_path
+        self.latency = latency
+        self.jitter = jitter
+        self.temperature = temperature
+        self.max_tokens = 512
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def run(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = _jittered(self.latency, self.jitter, self._rng)
+        time.sleep(delay)
+        lowered = prompt.lower()
+        mentioned = [dish for dish in DISHES if dish in lowered]
+        if self.role == "extract":
+            return json.dumps(
+                [{"menu_item": dish, "sentiment": 0.8, "keywords": [dish.split()[-1]], "review_count": lowered.count(dish)}
+                 for dish in mentioned[:10]]
+            )
+        return json.dumps([{"text": f"Order the {dish}; regulars rave about it.", "confidence": 0.8} for dish in mentioned[:5]])
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,142 @@
+"""
+Per-request SQL and timing instrumentation.
+
+`RequestMetricsMiddleware` samples a fraction of requests
+(`REQUEST_METRICS_SAMPLE_RATE`). For a sampled request it installs a
+database execute wrapper on every connection and records:
+
+  - `queries` / `db_ms`: SQL statements executed and the time spent in them
+  - `serializer_ms`: time in `to_representation` of serializers using
+    `SerializerTimingMixin` (including any queries they trigger)
+  - `view_ms`: from view dispatch until the rendered response comes back
+  - `total_ms`: the whole request as seen by this middleware
+
+The numbers are logged as one JSON line on the `menus.requests` logger.
+With `REQUEST_METRICS_SERVER_TIMING` (default: `DEBUG`) they are also
+returned in a `Server-Timing` header, which browser dev tools show next to
+the request; it is off in production because it tells any client how many
+queries and how much DB time a request took. Unsampled requests pay
+nothing but a random draw.
+
+The metrics of the request in progress live in a context variable, so code
+outside the middleware (serializers, tests) can reach them via
+`current_metrics()`.
+"""
+
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("menus.requests")
+
+_current: contextvars.ContextVar[Optional["RequestMetrics"]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.view_ms = 0.0
+        self.total_ms = 0.0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper (see `connection.execute_wrapper`)."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_ms, 3),
+            "serializer_ms": round(self.serializer_ms, 3),
+            "view_ms": round(self.view_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f"serializer;dur={self.serializer_ms:.1f}",
+            f"view;dur={self.view_ms:.1f}",
+            f"total;dur={self.total_ms:.1f}",
+        ])
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the sampled request being handled, or None."""
+    return _current.get()
+
+
+class SerializerTimingMixin:
+    """Adds a serializer's `to_representation` time to the request's `serializer_ms`.
+
+    Only the outermost serializer is timed, so nested serializers and
+    `many=True` children aren't counted twice.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics._serializer_depth:
+            return super().to_representation(instance)
+        metrics._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_ms += (time.perf_counter() - started) * 1000
+            metrics._serializer_depth -= 1
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 0.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        finished = time.perf_counter()
+        metrics.total_ms = (finished - started) * 1000
+        if hasattr(request, "_metrics_view_started"):
+            metrics.view_ms = (finished - request._metrics_view_started) * 1000
+
+        if getattr(settings, "REQUEST_METRICS_SERVER_TIMING", False):
+            response["Server-Timing"] = metrics.server_timing()
+        logger.info(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **metrics.as_dict(),
+        }))
+        request.metrics = metrics
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _current.get() is not None:
+            request._metrics_view_started = time.perf_counter()
+        return None
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ReviewViewSet
+from .views import MetricsView, ReviewViewSet
 
 # Admin-only internal endpoints for debugging and maintenance
 # Access protected by `IsAdminUser` on the viewsets
@@ -9,4 +9,5 @@ review_detail = ReviewViewSet.as_view({'get': 'retrieve'})
 urlpatterns = [
     path('reviews/', review_list, name='internal-review-list'),
     path('reviews/<int:pk>/', review_detail, name='internal-review-detail'),
+    path('metrics', MetricsView.as_view(), name='internal-metrics'),
 ]
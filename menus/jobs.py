@@ -0,0 +1,183 @@
+"""
+Lightweight database-backed job queue for ingestion and AI work.
+
+Jobs are rows in `Job`. Workers (`python manage.py run_workers`) claim one
+job at a time:
+
+  - on backends that support it (Postgres) via
+    `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent workers never block on
+    or double-claim the same row;
+  - elsewhere (SQLite) via a compare-and-swap `UPDATE ... WHERE status =
+    'pending'`, which the database serializes.
+
+Failed jobs are retried with exponential backoff until `max_attempts`, and
+jobs whose worker died mid-run are re-queued by `requeue_stale` (or failed,
+once they have used up their attempts).
+"""
+
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, Place
+
+CLAIM_RETRIES = 5
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def enqueue(kind: str, payload: Optional[dict] = None, priority: int = 0, max_attempts: int = 3) -> Job:
+    return Job.objects.create(kind=kind, payload=payload or {}, priority=priority, max_attempts=max_attempts)
+
+
+def enqueue_many(kind: str, payloads: Iterable[dict], priority: int = 0, max_attempts: int = 3) -> int:
+    jobs = [Job(kind=kind, payload=p, priority=priority, max_attempts=max_attempts) for p in payloads]
+    return len(Job.objects.bulk_create(jobs))
+
+
+def _claimable(kinds: Optional[Iterable[str]] = None):
+    qs = Job.objects.filter(status=Job.STATUS_PENDING, run_after__lte=timezone.now())
+    if kinds:
+        qs = qs.filter(kind__in=list(kinds))
+    return qs.order_by("priority", "id")
+
+
+def claim_job(worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[Job]:
+    """Atomically move the next pending job to `running` and return it (or None)."""
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _claimable(kinds).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            _mark_running(job, worker_id)
+            job.save(update_fields=["status", "attempts", "locked_by", "locked_at"])
+            return job
+
+    # Compare-and-swap fallback: another worker may win the race for the same
+    # row, in which case the UPDATE matches nothing and we try the next one.
+    for _ in range(CLAIM_RETRIES):
+        job = _claimable(kinds).first()
+        if job is None:
+            return None
+        now = timezone.now()
+        won = Job.objects.filter(pk=job.pk, status=Job.STATUS_PENDING, attempts=job.attempts).update(
+            status=Job.STATUS_RUNNING, attempts=job.attempts + 1, locked_by=worker_id, locked_at=now
+        )
+        if won:
+            _mark_running(job, worker_id, now)
+            return job
+    return None
+
+
+def _mark_running(job: Job, worker_id: str, now=None) -> None:
+    job.status = Job.STATUS_RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = now or timezone.now()
+
+
+def run_job(job: Job, stdout=None) -> bool:
+    """Execute a claimed job and record the outcome. Returns True on success."""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        handler(job.payload, stdout)
+    except Exception as exc:  # noqa: BLE001 - every failure is recorded on the job
+        job.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        retryable = (
+            getattr(exc, "retryable", True)
+            and handler is not None
+            and not isinstance(exc, ObjectDoesNotExist)
+        )
+        if retryable and job.attempts < job.max_attempts:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=backoff_seconds(job.attempts))
+        else:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = timezone.now()
+        job.locked_by = ""
+        job.save(update_fields=["status", "last_error", "run_after", "locked_by", "finished_at"])
+        return False
+
+    job.status = Job.STATUS_DONE
+    job.last_error = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "last_error", "finished_at"])
+    return True
+
+
+def backoff_seconds(attempts: int, base: float = 5.0, cap: float = 600.0) -> float:
+    """Exponential backoff with full jitter, matching `sync_google_reviews`."""
+    return random.uniform(0, min(cap, base * (2 ** (attempts - 1))))
+
+
+def requeue_stale(timeout: timedelta) -> Tuple[int, int]:
+    """Return jobs stuck in `running` longer than `timeout` (dead worker) to the queue.
+
+    A job whose worker died on its last allowed attempt (e.g. it keeps
+    getting OOM-killed) is marked failed instead of going round forever.
+    Returns `(requeued, failed)`.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=now - timeout)
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.STATUS_FAILED,
+        locked_by="",
+        finished_at=now,
+        last_error="Worker died while running the job (stale after final attempt)",
+    )
+    requeued = stale.update(status=Job.STATUS_PENDING, locked_by="")
+    return requeued, failed
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+def _sync_place(payload: dict, stdout) -> None:
+    from menus.management.commands.sync_google_reviews import Command as SyncCommand
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("GOOGLE_API_KEY is not set")
+    place = Place.objects.get(pk=payload["place_id"])
+    SyncCommand(stdout=stdout).sync_place(place, api_key)
+
+
+def _discover_tile(payload: dict, stdout) -> None:
+    call_command(
+        "fetch_bozeman_places",
+        latitude=payload["latitude"],
+        longitude=payload["longitude"],
+        radius=payload.get("radius", 8000),
+        keyword=payload.get("keyword", "restaurant"),
+        stdout=stdout,
+    )
+
+
+def _recommend_place(payload: dict, stdout) -> None:
+    from menus.management.commands.generate_recommendations import Command as RecommendCommand
+
+    # Reuse this worker's llama-server processes across jobs (see `llm.shared_server_runner`).
+    command = RecommendCommand(stdout=stdout)
+    command.shared_servers = True
+    options = {k: v for k, v in payload.items() if k != "place_id"}
+    call_command(command, places=[payload["place_id"]], stdout=stdout, **options)
+
+
+HANDLERS: Dict[str, Callable[[dict, object], None]] = {
+    Job.KIND_SYNC_PLACE: _sync_place,
+    Job.KIND_DISCOVER_TILE: _discover_tile,
+    Job.KIND_RECOMMEND_PLACE: _recommend_place,
+}
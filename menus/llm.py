@@ -0,0 +1,417 @@
+"""
+llama.cpp backends used by `generate_recommendations`.
+
+  - `LlamaRunner`: one `llama-run` subprocess per prompt (reloads the model
+    every call; kept as the zero-setup fallback).
+  - `LlamaServerRunner`: one long-lived `llama-server` process per model,
+    prompted over localhost HTTP, with health checks and restart-on-crash.
+
+All expose `run(prompt) -> str`, `count_tokens(text) -> int` and `close()`. `CachedRunner` wraps either
+one with an on-disk, content-addressed response cache (`LLMCache`). `shared_server_runner` hands out
+process-wide server runners, so job workers reuse one loaded model across jobs.
+"""
+
+import atexit
+import hashlib
+import json
+import math
+import re
+import socket
+import sqlite3
+import subprocess
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from django.core.management.base import CommandError
+
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count: ~4 characters per word piece, one per punctuation mark.
+
+    Errs high for English review text, which is what a budget estimate wants.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE_RE.findall(text or ""))
+
+
+# ---------------------------------------------------------------------------
+# Simple llama.cpp runner
+# ---------------------------------------------------------------------------
+class LlamaRunner:
+    def __init__(self, llama_bin: Path, model_path: Path, max_tokens: int = 512, temperature: float = 0.4, threads: int = 4):
+        self.llama_bin = llama_bin
+        self.model_path = model_path
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.threads = threads
+
+    def run(self, prompt: str) -> str:
+        # llama-run expects: llama-run [options] model [prompt]
+        cmd = [
+            str(self.llama_bin),
+            "--temp",
+            str(self.temperature),
+            "--context-size",
+            "4096",
+            "--threads",
+            str(self.threads),
+            str(self.model_path),
+            prompt,
+        ]
+
+        try:
+            out = subprocess.check_output(cmd, text=True)
+        except FileNotFoundError as exc:
+            raise CommandError(f"llama.cpp binary not found at {self.llama_bin}") from exc
+        except subprocess.CalledProcessError as exc:  # pragma: no cover - runtime
+            raise CommandError(f"llama.cpp invocation failed: {exc}") from exc
+
+        return out.strip()
+
+    def count_tokens(self, text: str) -> int:
+        return estimate_tokens(text)
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Persistent llama.cpp server runner
+# ---------------------------------------------------------------------------
+class LlamaServerRunner:
+    """Keeps one `llama-server` process alive for a model and prompts it over localhost.
+
+    The model is loaded once at `start()` instead of once per prompt. Before
+    each request the process is checked; if it has exited (or the request
+    cannot connect) it is restarted, up to `max_restarts` times per runner.
+    """
+
+    def __init__(
+        self,
+        server_bin: Path,
+        model_path: Path,
+        max_tokens: int = 512,
+        temperature: float = 0.4,
+        threads: int = 4,
+        context_size: int = 4096,
+        parallel: int = 1,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        startup_timeout: float = 300.0,
+        request_timeout: float = 900.0,
+        max_restarts: int = 3,
+    ):
+        self.server_bin = server_bin
+        self.model_path = model_path
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.threads = threads
+        self.context_size = context_size
+        self.parallel = max(parallel, 1)
+        self.host = host
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.process: Optional[subprocess.Popen] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        _live_servers.add(self)
+
+    @property
+    def session(self) -> requests.Session:
+        # One keep-alive session per calling thread; Session is not thread-safe.
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _command(self) -> List[str]:
+        return [
+            str(self.server_bin),
+            "--model",
+            str(self.model_path),
+            "--host",
+            self.host,
+            "--port",
+            str(self.port),
+            # The context is split across slots, so scale it to keep 4096 per request.
+            "--ctx-size",
+            str(self.context_size * self.parallel),
+            "--parallel",
+            str(self.parallel),
+            "--threads",
+            str(self.threads),
+        ]
+
+    def start(self) -> None:
+        if self.port is None:
+            self.port = _free_port(self.host)
+        try:
+            self.process = subprocess.Popen(self._command(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError as exc:
+            raise CommandError(f"llama.cpp server binary not found at {self.server_bin}") from exc
+        self._wait_healthy()
+
+    def _wait_healthy(self) -> None:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process is not None and self.process.poll() is not None:
+                raise CommandError(
+                    f"llama.cpp server for {self.model_path} exited during startup (code {self.process.returncode})"
+                )
+            if self.healthy():
+                return
+            time.sleep(0.5)
+        self.close()
+        raise CommandError(f"llama.cpp server for {self.model_path} not healthy after {self.startup_timeout:.0f}s")
+
+    def healthy(self) -> bool:
+        # /health answers 503 while the model is still loading.
+        try:
+            return self.session.get(f"{self.base_url}/health", timeout=2).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _ensure_running(self) -> None:
+        with self._lock:
+            if self.process is None:
+                self.start()
+            elif self.process.poll() is not None:
+                self._restart(f"exited with code {self.process.returncode}")
+
+    def _restart(self, reason: str) -> None:
+        if self.restarts >= self.max_restarts:
+            raise CommandError(f"llama.cpp server for {self.model_path} {reason}; restart limit reached")
+        self.restarts += 1
+        self.close()
+        self.start()
+
+    def _restart_if_down(self, reason: str) -> None:
+        # Several worker threads may notice the same crash; only restart once.
+        with self._lock:
+            if self.process is None or self.process.poll() is not None or not self.healthy():
+                self._restart(reason)
+
+    def run(self, prompt: str) -> str:
+        self._ensure_running()
+        payload = {
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "cache_prompt": True,
+        }
+        url = f"{self.base_url}/v1/chat/completions"
+        try:
+            resp = self.session.post(url, json=payload, timeout=self.request_timeout)
+        except requests.ConnectionError:
+            # Crashed mid-request: restart once and retry the same prompt.
+            self._restart_if_down("stopped responding")
+            try:
+                resp = self.session.post(url, json=payload, timeout=self.request_timeout)
+            except requests.RequestException as exc:
+                raise CommandError(f"llama.cpp server for {self.model_path} failed after restart: {exc}") from exc
+        except requests.RequestException as exc:
+            raise CommandError(f"llama.cpp server request failed: {exc}") from exc
+        if resp.status_code != 200:
+            raise CommandError(f"llama.cpp server error {resp.status_code}: {resp.text[:500]}")
+        return (resp.json()["choices"][0]["message"]["content"] or "").strip()
+
+    def count_tokens(self, text: str) -> int:
+        """Exact count from the model's own tokenizer (starting the server if needed), else the estimate."""
+        try:
+            self._ensure_running()
+        except CommandError:
+            return estimate_tokens(text)
+        try:
+            resp = self.session.post(f"{self.base_url}/tokenize", json={"content": text}, timeout=10)
+            if resp.status_code == 200:
+                return len(resp.json()["tokens"])
+        except (requests.RequestException, KeyError, ValueError):
+            pass
+        return estimate_tokens(text)
+
+    def close(self) -> None:
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:  # pragma: no cover - runtime
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+# Runners with a server that may still be up; weak, so finished runners can be collected.
+_live_servers: "weakref.WeakSet[LlamaServerRunner]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_servers() -> None:
+    for runner in list(_live_servers):
+        runner.close()
+
+
+_shared_servers: Dict[Tuple, LlamaServerRunner] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_server_runner(server_bin: Path, model_path: Path, **options) -> LlamaServerRunner:
+    """A running server for this model and settings, kept for the rest of the process.
+
+    Job workers use it so the model loads once per worker process instead of
+    once per job. Callers must not `close()` it; the exit hook does. The
+    restart budget is reset for each caller.
+    """
+    key = (str(server_bin), str(model_path), tuple(sorted(options.items())))
+    with _shared_lock:
+        runner = _shared_servers.get(key)
+        if runner is None:
+            runner = _shared_servers[key] = LlamaServerRunner(server_bin, model_path, **options)
+        runner.restarts = 0
+    runner._ensure_running()
+    return runner
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+class LLMCache:
+    """SQLite-backed prompt -> response cache, bounded to `max_bytes` of responses.
+
+    Entries are keyed by a SHA-256 of everything that determines the output
+    (see `CachedRunner.key`). When the stored responses exceed `max_bytes`, the
+    least recently used entries are evicted down to 90% of the limit.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._clock = 0.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by pipeline worker threads, serialized by the lock.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._tick(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            now = self._tick()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._evict()
+
+    def _tick(self) -> float:
+        # Strictly increasing, so LRU order is well defined for back-to-back calls.
+        self._clock = max(time.time(), self._clock + 1e-6)
+        return self._clock
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= target:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evicted += len(stale)
+
+    def entries(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return f"LLM cache: {self.hits} hits, {self.misses} misses ({rate} hit rate), {self.evicted} evicted"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedRunner:
+    """Runner wrapper that answers repeated prompts from an `LLMCache`."""
+
+    def __init__(self, runner, cache: LLMCache):
+        self.runner = runner
+        self.cache = cache
+        self._model_id = _model_identity(Path(runner.model_path))
+
+    def key(self, prompt: str) -> str:
+        parts = {
+            "model": self._model_id,
+            "temperature": self.runner.temperature,
+            "max_tokens": getattr(self.runner, "max_tokens", None),
+            "context_size": getattr(self.runner, "context_size", 4096),
+            "prompt": prompt,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def run(self, prompt: str) -> str:
+        key = self.key(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.runner.run(prompt)
+        self.cache.put(key, response)
+        return response
+
+    def count_tokens(self, text: str) -> int:
+        return self.runner.count_tokens(text)
+
+    def close(self) -> None:
+        self.runner.close()
+
+
+def _model_identity(model_path: Path) -> str:
+    # Path plus size/mtime, so replacing a GGUF file in place invalidates its entries.
+    try:
+        stat = model_path.stat()
+    except OSError:
+        return str(model_path.resolve())
+    return f"{model_path.resolve()}:{stat.st_size}:{int(stat.st_mtime)}"
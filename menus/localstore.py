@@ -0,0 +1,54 @@
+"""
+Shared on-disk SQLite store for small cross-worker state (API metrics, throttling).
+
+Gunicorn workers are separate processes, so per-process dicts give each
+worker its own view. A SQLite file in WAL mode on the local disk is shared
+by all of them without running another service: readers never block the
+writer, and each write is a short transaction. Connections are opened per
+(process, thread), so a store created before gunicorn forks is still safe
+to use in the workers.
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from django.conf import settings
+
+# What opening or writing the store can raise: SQLite errors, and OS errors from creating its
+# directory (read-only image, path component that is a file). Callers fail open on these.
+STORE_ERRORS = (sqlite3.Error, OSError)
+
+
+def store_path() -> str:
+    """`LOCAL_STORE_PATH`; empty disables the features built on the store."""
+    return getattr(settings, "LOCAL_STORE_PATH", "") or ""
+
+
+class LocalStore:
+    def __init__(self, path: str, schema: Iterable[str] = ()):
+        self.path = Path(path)
+        self.schema = list(schema)
+        self._local = threading.local()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; callers group writes with explicit BEGIN IMMEDIATE ... COMMIT.
+        conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable enough for counters; no fsync per commit
+        for statement in self.schema:
+            conn.execute(statement)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
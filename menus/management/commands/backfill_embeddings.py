@@ -0,0 +1,54 @@
+"""
+Encode and store embeddings for reviews that don't have one yet (or whose
+text changed since it was encoded), so `generate_recommendations` only has to
+embed brand-new reviews.
+
+Usage:
+  python manage.py backfill_embeddings
+  python manage.py backfill_embeddings --embed-model thenlper/gte-small --batch-size 256
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from menus.embeddings import EmbeddingEngine, EmbeddingStore
+from menus.models import Review, ReviewEmbedding
+
+
+class Command(BaseCommand):
+    help = "Backfill persisted review embeddings for an embedding model."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--embed-model",
+            default="thenlper/gte-small",
+            help="Embedding model name/path (default: thenlper/gte-small).",
+        )
+        parser.add_argument("--batch-size", type=int, default=256, help="Reviews per encode call (default: 256).")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Check every review (re-encoding edited text), not only reviews without a stored vector.",
+        )
+
+    def handle(self, *args, **options):
+        model_name = options["embed_model"]
+        qs = Review.objects.exclude(text="").only("id", "text").order_by("id")
+        if not options["all"]:
+            has_vector = ReviewEmbedding.objects.filter(review=OuterRef("pk"), model_name=model_name)
+            qs = qs.filter(~Exists(has_vector))
+
+        ids = list(qs.values_list("id", flat=True))
+        if not ids:
+            self.stdout.write(self.style.SUCCESS("All reviews already have stored embeddings."))
+            return
+
+        store = EmbeddingStore(EmbeddingEngine(model_name), model_name)
+        batch_size = max(options["batch_size"], 1)
+        for start in range(0, len(ids), batch_size):
+            store.vectors_for(list(qs.filter(id__in=ids[start : start + batch_size])), batch_size=batch_size)
+            self.stdout.write(f"  {min(start + batch_size, len(ids))}/{len(ids)} reviews checked")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Encoded {store.encoded} review(s); {store.hits} already up to date."
+        ))
@@ -0,0 +1,231 @@
+"""
+Benchmark the public DRF endpoints in-process against whatever database the
+settings point at (the `test_settings` SQLite DB or a local Postgres).
+
+Each endpoint is requested `--requests` times through Django's test client,
+with parameters (place ids, search words, item terms) sampled from the data
+so caches and hot rows don't flatter the numbers. Reported per endpoint:
+latency percentiles and SQL queries per request. Every request comes from a
+distinct client address so the anon throttle never answers instead of the
+view.
+
+Results can be written with `--output` and compared with a baseline JSON
+file (one section per database vendor); `--save-baseline` records the
+current run as the baseline for this vendor. A p95 more than `--tolerance`
+slower than the baseline, or any endpoint issuing more queries, counts as a
+regression and `--fail-on-regression` turns that into a non-zero exit.
+
+`test_settings` uses an in-memory SQLite database, so there the data must be
+generated in the same process: `--generate-places` runs
+`generate_synthetic_data` first (and migrations, if the tables are missing).
+
+Usage:
+  DJANGO_SETTINGS_MODULE=revove.test_settings python manage.py benchmark_api --generate-places 500
+  python manage.py generate_synthetic_data --places 10000 --reviews-per-place 100
+  python manage.py benchmark_api --requests 200 --output .cache/api_bench.json
+  python manage.py benchmark_api --save-baseline
+  python manage.py benchmark_api --fail-on-regression --tolerance 0.25
+"""
+
+import json
+import random
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from menus.fakes import DISHES
+from menus.models import Place, PlaceItemSummary
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "api_baseline.json"
+PERCENTILES = (50, 90, 95, 99)
+# Absolute slack so sub-millisecond endpoints don't flap on scheduler noise.
+MIN_REGRESSION_MS = 1.0
+
+# name -> (path template, query params); "{place}", "{word}" and "{term}" are sampled per request.
+ENDPOINTS = {
+    "places_list": ("/api/places/", {}),
+    "places_ordered": ("/api/places/", {"ordering": "-rating"}),
+    "places_search": ("/api/places/", {"search": "{word}"}),
+    "place_detail": ("/api/places/{place}/", {}),
+    "place_items": ("/api/places/{place}/items/", {}),
+    "reviews_search": ("/api/search/reviews/", {"q": "{word}"}),
+    "reviews_search_place": ("/api/search/reviews/", {"q": "{word}", "place": "{place}"}),
+    "reviews_by_item": ("/api/search/reviews/", {"item": "{term}"}),
+    "item_places": ("/api/items/{term}/places/", {}),
+}
+
+MAX_SAMPLED_PLACES = 500
+
+
+class Command(BaseCommand):
+    help = "Measure latency percentiles and SQL query counts of the public API endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Timed requests per endpoint (default: 50).")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint first (default: 3).")
+        parser.add_argument(
+            "--endpoints", nargs="*", choices=sorted(ENDPOINTS), help="Only these endpoints (default: all)."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed for sampling request parameters (default: 0).")
+        parser.add_argument("--output", help="Write this run's results as JSON to this path.")
+        parser.add_argument(
+            "--baseline",
+            default=str(DEFAULT_BASELINE),
+            help=f"Baseline JSON to compare against (default: {DEFAULT_BASELINE.relative_to(settings.BASE_DIR)}).",
+        )
+        parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for this DB vendor.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2, help="Allowed p95 slowdown vs the baseline, as a fraction (default: 0.2)."
+        )
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a regression is found.")
+        parser.add_argument(
+            "--generate-places",
+            type=int,
+            default=0,
+            help="Run generate_synthetic_data with this many places first (required for in-memory SQLite).",
+        )
+        parser.add_argument("--generate-reviews-per-place", type=float, default=100)
+
+    def handle(self, *args, **options):
+        if Place._meta.db_table not in connection.introspection.table_names():
+            self.stdout.write(self.style.NOTICE("Database has no tables; running migrations"))
+            call_command("migrate", verbosity=0, interactive=False)
+        if options["generate_places"]:
+            call_command(
+                "generate_synthetic_data",
+                "--places", str(options["generate_places"]),
+                "--reviews-per-place", str(options["generate_reviews_per_place"]),
+                "--seed", str(options["seed"]),
+                stdout=self.stdout,
+            )
+
+        samples = self._samples(random.Random(options["seed"]))
+        if not samples["place"]:
+            raise CommandError("No places to benchmark against; run generate_synthetic_data or pass --generate-places")
+
+        rng = random.Random(options["seed"])
+        names = options["endpoints"] or list(ENDPOINTS)
+        results = {}
+        # The test client's host must pass ALLOWED_HOSTS whatever the deployment settings are.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            client = Client(secure=settings.SECURE_SSL_REDIRECT)
+            for name in names:
+                results[name] = self._bench(client, name, samples, rng, options["warmup"], max(options["requests"], 1))
+
+        run = {
+            "vendor": connection.vendor,
+            "places": Place.objects.count(),
+            "requests": options["requests"],
+            "endpoints": results,
+        }
+        self._report(run)
+
+        baseline_path = Path(options["baseline"])
+        regressions = self._compare(run, baseline_path, options["tolerance"])
+        if options["output"]:
+            output = Path(options["output"])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(run, indent=2))
+            self.stdout.write(f"Wrote results to {output}")
+        if options["save_baseline"]:
+            self._save_baseline(run, baseline_path)
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+    def _samples(self, rng: random.Random):
+        # Drawn with the seeded rng from a stable id order, so --seed reproduces the request mix.
+        place_ids = list(Place.objects.order_by("id").values_list("id", flat=True))
+        place_ids = rng.sample(place_ids, min(len(place_ids), MAX_SAMPLED_PLACES))
+        terms = list(
+            PlaceItemSummary.objects.values_list("item__term", flat=True).distinct().order_by("item__term")[:200]
+        )
+        words = sorted({word for dish in DISHES for word in dish.split()})
+        return {"place": place_ids, "term": terms or [dish.split()[-1] for dish in DISHES], "word": words}
+
+    def _bench(self, client: Client, name: str, samples, rng: random.Random, warmup: int, count: int):
+        template, params = ENDPOINTS[name]
+        timings, queries, errors = [], [], 0
+        for i in range(warmup + count):
+            values = {key: rng.choice(options) for key, options in samples.items()}
+            path = template.format(**values)
+            query = {key: value.format(**values) for key, value in params.items()}
+            url = f"{path}?{urlencode(query)}" if query else path
+            # A fresh address per request keeps AnonRateThrottle out of the measurement.
+            address = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, REMOTE_ADDR=address)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i < warmup:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured.captured_queries))
+            if response.status_code >= 400 and response.status_code != 404:
+                errors += 1
+
+        ms = np.asarray(timings)
+        result = {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+        result.update(
+            mean_ms=round(float(ms.mean()), 3),
+            max_ms=round(float(ms.max()), 3),
+            mean_queries=round(float(np.mean(queries)), 2),
+            max_queries=int(max(queries)),
+            errors=errors,
+        )
+        return result
+
+    def _report(self, run) -> None:
+        self.stdout.write(self.style.NOTICE(
+            f"{run['vendor']}: {run['places']} places, {run['requests']} requests per endpoint"
+        ))
+        header = f"{'endpoint':<22}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES) + f"{'queries':>10}{'errors':>8}"
+        self.stdout.write(header)
+        for name, r in run["endpoints"].items():
+            self.stdout.write(
+                f"{name:<22}"
+                + "".join(f"{r[f'p{p}_ms']:>10.2f}" for p in PERCENTILES)
+                + f"{r['max_queries']:>10}{r['errors']:>8}"
+            )
+
+    def _compare(self, run, path: Path, tolerance: float):
+        if not path.exists():
+            return []
+        baseline = json.loads(path.read_text()).get(run["vendor"])
+        if not baseline:
+            self.stdout.write(self.style.NOTICE(f"No {run['vendor']} baseline in {path}"))
+            return []
+
+        self.stdout.write(self.style.NOTICE(f"Compared with baseline {path} ({baseline['places']} places):"))
+        regressions = []
+        for name, r in run["endpoints"].items():
+            base = baseline["endpoints"].get(name)
+            if not base:
+                continue
+            change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+            slower = change > tolerance and r["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS
+            more_queries = r["max_queries"] > base["max_queries"]
+            line = (
+                f"  {name:<22} p95 {base['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms ({change:+.0%}), "
+                f"queries {base['max_queries']} -> {r['max_queries']}"
+            )
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stdout.write(line)
+        return regressions
+
+    def _save_baseline(self, run, path: Path) -> None:
+        stored = json.loads(path.read_text()) if path.exists() else {}
+        stored[run["vendor"]] = run
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(stored, indent=2, sort_keys=True))
+        self.stdout.write(self.style.SUCCESS(f"Saved {run['vendor']} baseline to {path}"))
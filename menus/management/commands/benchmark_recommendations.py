@@ -0,0 +1,162 @@
+"""
+Offline throughput benchmark for `generate_recommendations`.
+
+Runs the real pipeline (selection, queues, worker threads, LLM cache,
+persistence) against a synthetic dataset, with the embedding model and both
+llama.cpp models replaced by fakes from `menus/fakes.py` that simulate
+latency. No model files, llama.cpp build or network are needed, and all
+synthetic rows are rolled back at the end.
+
+Usage:
+  python manage.py benchmark_recommendations
+  python manage.py benchmark_recommendations --places 100 --extract-latency-ms 800 --reason-latency-ms 2000
+  python manage.py benchmark_recommendations --extract-workers 4 --reason-workers 2 --repeat 2
+  python manage.py benchmark_recommendations -- --sequential --no-llm-cache
+"""
+
+import random
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from menus.fakes import FakeEmbeddingEngine, FakeLlamaRunner, synthetic_review_text
+from menus.management.commands.generate_recommendations import Command as GenerateCommand
+from menus.models import Place, Review
+
+EXTRACTOR_MODEL = "fake-extractor.gguf"
+REASONING_MODEL = "fake-reasoner.gguf"
+SUMMARY_PREFIXES = ("Stage ", "Embeddings:", "LLM cache:", "Extraction prompts:")
+
+
+class FakeGenerateCommand(GenerateCommand):
+    """`generate_recommendations` with fake engines and no path checks."""
+
+    def __init__(self, fake_options, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fake_options = fake_options
+
+    def _validate_paths(self, llama_bin, extractor_path, reasoning_path) -> None:
+        pass
+
+    def _build_embedder(self, model_name: str):
+        opts = self.fake_options
+        return FakeEmbeddingEngine(
+            model_name, dim=opts["dim"], latency_per_text=opts["embed_latency_ms"] / 1000, jitter=opts["jitter"], seed=opts["seed"]
+        )
+
+    def _build_runner(self, backend, llama_bin, server_bin, model_path, temperature, threads, slots=1):
+        opts = self.fake_options
+        role = "extract" if model_path.name == EXTRACTOR_MODEL else "reason"
+        latency = opts["extract_latency_ms" if role == "extract" else "reason_latency_ms"] / 1000
+        return FakeLlamaRunner(role, model_path, latency=latency, jitter=opts["jitter"], temperature=temperature, seed=opts["seed"])
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the recommendation pipeline offline with fake models and synthetic reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--places", type=int, default=50, help="Synthetic places to generate (default: 50).")
+        parser.add_argument("--reviews-per-place", type=int, default=40, help="Reviews per synthetic place (default: 40).")
+        parser.add_argument("--embed-latency-ms", type=float, default=2.0, help="Simulated encode cost per review (default: 2).")
+        parser.add_argument("--extract-latency-ms", type=float, default=400.0, help="Simulated A2 latency per prompt (default: 400).")
+        parser.add_argument("--reason-latency-ms", type=float, default=800.0, help="Simulated B latency per prompt (default: 800).")
+        parser.add_argument("--jitter", type=float, default=0.2, help="Relative +/- latency jitter (default: 0.2).")
+        parser.add_argument("--dim", type=int, default=384, help="Fake embedding dimension (default: 384).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for data and latencies (default: 0).")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="Run the pipeline this many times on the same data (later runs show cache effects; default: 1).",
+        )
+        parser.add_argument("--extract-workers", type=int, default=1)
+        parser.add_argument("--reason-workers", type=int, default=1)
+        parser.add_argument("--queue-size", type=int, default=4)
+        parser.add_argument(
+            "pipeline_args",
+            nargs="*",
+            help="Extra generate_recommendations flags, after `--` (e.g. -- --sequential --no-llm-cache).",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                with transaction.atomic():
+                    self._seed(options)
+                    for run in range(1, options["repeat"] + 1):
+                        self._run_once(run, options, Path(tmp))
+                    raise Rollback
+            except Rollback:
+                pass
+        self.stdout.write(self.style.SUCCESS("Benchmark complete; synthetic data rolled back"))
+
+    def _seed(self, options) -> None:
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        places = Place.objects.bulk_create(
+            Place(name=f"Bench Place {i}", google_place_id=f"bench-{options['seed']}-{i}", city="Benchville")
+            for i in range(options["places"])
+        )
+        now = timezone.now()
+        Review.objects.bulk_create(
+            (
+                Review(
+                    place=place,
+                    google_review_id=f"bench-{place.google_place_id}-{j}",
+                    rating=rng.randint(1, 5),
+                    text=synthetic_review_text(rng),
+                    created_at=now,
+                )
+                for place in places
+                for j in range(options["reviews_per_place"])
+            ),
+            batch_size=1000,
+        )
+        self.stdout.write(self.style.NOTICE(
+            f"Seeded {len(places)} places x {options['reviews_per_place']} reviews in {time.perf_counter() - started:.2f}s"
+        ))
+        self.place_ids = [p.id for p in places]
+
+    def _run_once(self, run: int, options, tmp: Path) -> None:
+        command = FakeGenerateCommand(options, stdout=StringIO())
+        out = command.stdout
+        args = [
+            "--backend", "subprocess",
+            "--extractor-model", str(tmp / EXTRACTOR_MODEL),
+            "--reasoning-model", str(tmp / REASONING_MODEL),
+            "--embed-model", "fake-embedder",
+            "--llm-cache-path", str(tmp / "llm_cache.sqlite3"),
+            "--extract-workers", str(options["extract_workers"]),
+            "--reason-workers", str(options["reason_workers"]),
+            "--queue-size", str(options["queue_size"]),
+            # Every run regenerates every place; --force keeps the fingerprint check from skipping them.
+            "--force",
+            "--places", *map(str, self.place_ids),
+            *options["pipeline_args"],
+        ]
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(command, *args)
+        wall = time.perf_counter() - started
+
+        writes = [q for q in queries.captured_queries if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+        write_ms = sum(float(q["time"]) for q in writes) * 1000
+        places = len(self.place_ids)
+        self.stdout.write(self.style.NOTICE(f"Run {run}: {places} places in {wall:.2f}s ({places / wall:.2f} places/s)"))
+        for line in out.getvalue().splitlines():
+            if line.startswith(SUMMARY_PREFIXES):
+                self.stdout.write(f"  {line}")
+        self.stdout.write(
+            f"  DB: {len(queries.captured_queries)} queries, {len(writes)} writes taking {write_ms:.1f}ms"
+        )
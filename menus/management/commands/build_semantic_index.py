@@ -0,0 +1,44 @@
+"""
+Snapshot stored review embeddings into the memory-mapped index served by
+`/api/search/semantic/`. Run after `backfill_embeddings` (e.g. nightly).
+
+Usage:
+  python manage.py build_semantic_index
+  python manage.py build_semantic_index --embed-model thenlper/gte-small --output /var/lib/revove/semantic_index
+"""
+
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menus.models import ReviewEmbedding
+from menus.semantic import build_index, index_dir
+
+
+class Command(BaseCommand):
+    help = "Build the semantic review search index from stored review embeddings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--embed-model",
+            default="thenlper/gte-small",
+            help="Embedding model whose stored vectors are indexed (default: thenlper/gte-small).",
+        )
+        parser.add_argument(
+            "--output",
+            help="Index directory (default: settings.SEMANTIC_INDEX_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        model_name = options["embed_model"]
+        if not ReviewEmbedding.objects.filter(model_name=model_name).exists():
+            raise CommandError(f"No stored embeddings for {model_name}; run backfill_embeddings first.")
+
+        directory = Path(options["output"]) if options["output"] else index_dir()
+        started = time.perf_counter()
+        meta = build_index(model_name, directory)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {meta['count']} review(s) ({meta['dim']} dims) into {directory} "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
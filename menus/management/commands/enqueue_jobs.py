@@ -0,0 +1,111 @@
+"""
+Enqueue background jobs for `run_workers`.
+
+Usage:
+  python manage.py enqueue_jobs sync [--places 1 2 3]
+  python manage.py enqueue_jobs discover --grid 3 --tile-spacing 5000 --radius 3000
+  python manage.py enqueue_jobs recommend --extractor-model qwen2-1.5b.gguf --reasoning-model qwen2.5-7b.gguf
+"""
+
+import math
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menus import jobs
+from menus.management.commands.fetch_bozeman_places import BOZEMAN_COORDS
+from menus.models import Job, Place
+
+METERS_PER_DEGREE_LAT = 111_320
+
+
+class Command(BaseCommand):
+    help = "Enqueue per-place sync, discovery-tile or per-place recommendation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "kind",
+            choices=["sync", "discover", "recommend"],
+            help="Job type to enqueue.",
+        )
+        parser.add_argument(
+            "--places",
+            nargs="*",
+            type=int,
+            help="Optional list of Place IDs (sync/recommend); defaults to all places.",
+        )
+        parser.add_argument("--priority", type=int, default=0, help="Lower runs first (default: 0).")
+        parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per job (default: 3).")
+        # discover
+        parser.add_argument("--grid", type=int, default=3, help="Discovery grid size N (N x N tiles, default: 3).")
+        parser.add_argument(
+            "--tile-spacing",
+            type=int,
+            default=5000,
+            help="Distance in meters between tile centers (default: 5000).",
+        )
+        parser.add_argument("--radius", type=int, default=3000, help="Search radius per tile in meters (default: 3000).")
+        parser.add_argument("--keyword", default="restaurant", help="Place types to discover (default: restaurant).")
+        # recommend (forwarded to generate_recommendations)
+        parser.add_argument("--extractor-model", help="Path to extractor GGUF (recommend).")
+        parser.add_argument("--reasoning-model", help="Path to reasoning GGUF (recommend).")
+        parser.add_argument(
+            "--backend", choices=["auto", "server", "subprocess"], help="llama.cpp backend (recommend)."
+        )
+        parser.add_argument("--llama-bin", help="Path to llama.cpp binary (recommend).")
+        parser.add_argument("--llama-server-bin", help="Path to llama.cpp `llama-server` binary (recommend).")
+        parser.add_argument("--embed-model", help="Embedding model name/path (recommend).")
+        parser.add_argument("--threads", type=int, help="llama.cpp threads per job (recommend).")
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        if kind == "discover":
+            job_kind, payloads = Job.KIND_DISCOVER_TILE, self._tile_payloads(options)
+        elif kind == "sync":
+            job_kind = Job.KIND_SYNC_PLACE
+            payloads = [{"place_id": pid} for pid in self._place_ids(options)]
+        else:
+            job_kind, payloads = Job.KIND_RECOMMEND_PLACE, self._recommend_payloads(options)
+
+        created = jobs.enqueue_many(
+            job_kind, payloads, priority=options["priority"], max_attempts=options["max_attempts"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Enqueued {created} {job_kind} job(s)."))
+
+    @staticmethod
+    def _place_ids(options) -> List[int]:
+        qs = Place.objects.order_by("id")
+        if options.get("places"):
+            qs = qs.filter(id__in=options["places"])
+        return list(qs.values_list("id", flat=True))
+
+    def _recommend_payloads(self, options) -> List[Dict]:
+        if not options.get("extractor_model") or not options.get("reasoning_model"):
+            raise CommandError("recommend jobs need --extractor-model and --reasoning-model")
+        shared = {
+            "extractor_model": options["extractor_model"],
+            "reasoning_model": options["reasoning_model"],
+        }
+        for key in ("backend", "llama_bin", "llama_server_bin", "embed_model", "threads"):
+            if options.get(key) is not None:
+                shared[key] = options[key]
+        return [{"place_id": pid, **shared} for pid in self._place_ids(options)]
+
+    @staticmethod
+    def _tile_payloads(options) -> List[Dict]:
+        """N x N grid of search circles centered on downtown Bozeman."""
+        grid, spacing = max(options["grid"], 1), options["tile_spacing"]
+        lat0, lng0 = BOZEMAN_COORDS
+        dlat = spacing / METERS_PER_DEGREE_LAT
+        dlng = spacing / (METERS_PER_DEGREE_LAT * math.cos(math.radians(lat0)))
+        offset = (grid - 1) / 2
+        return [
+            {
+                "latitude": round(lat0 + (row - offset) * dlat, 6),
+                "longitude": round(lng0 + (col - offset) * dlng, 6),
+                "radius": options["radius"],
+                "keyword": options["keyword"],
+            }
+            for row in range(grid)
+            for col in range(grid)
+        ]
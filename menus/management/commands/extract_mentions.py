@@ -0,0 +1,125 @@
+"""
+Index menu-item mentions in reviews (see `menus/mentions.py`).
+
+By default only reviews that have never been indexed are scanned, so it is
+cheap to run after every ingest (`sync_google_reviews` already indexes the
+reviews it inserts). `--discover` first mines frequent dish n-grams into the
+lexicon, then re-indexes the already indexed reviews that contain a new term
+with the full lexicon (so a new "breakfast burrito" replaces the "burrito"
+mention over the same words). The
+`PlaceItemSummary` rows of every (place, item) pair that gains mentions are
+refreshed batch by batch, and the touched items' `ItemPlaceScore` rankings at
+the end.
+
+Usage:
+  python manage.py extract_mentions
+  python manage.py extract_mentions --discover --min-count 3
+  python manage.py extract_mentions --all
+"""
+
+from django.core.management.base import BaseCommand
+
+from menus.mentions import build_matcher, discover_terms, ensure_default_lexicon, index_mentions, reindex_mentions
+from menus.models import MenuItem, MenuItemMention, PlaceItemSummary, Review
+from menus.summaries import pairs_for_mentions, refresh_item_scores, refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Extract menu-item mentions from reviews into the indexed mention table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Drop existing mentions and re-index every review (e.g. after editing the lexicon).",
+        )
+        parser.add_argument(
+            "--discover",
+            action="store_true",
+            help="Mine frequent '<modifier> <dish>' n-grams from reviews and add them to the lexicon first.",
+        )
+        parser.add_argument(
+            "--min-count",
+            type=int,
+            default=3,
+            help="Reviews an n-gram must appear in to be added by --discover (default: 3).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Reviews per batch (default: 500).")
+
+    def handle(self, *args, **options):
+        added = ensure_default_lexicon()
+        if added:
+            self.stdout.write(self.style.NOTICE(f"Seeded {added} lexicon item(s)"))
+
+        batch_size = max(options["batch_size"], 1)
+        self.touched_items = set()
+        reviews = Review.objects.exclude(text="").only("id", "place_id", "text").order_by("id")
+
+        if options["discover"]:
+            new_items = self._discover(reviews, options["min_count"])
+            if new_items and not options["all"]:
+                # Only reviews indexed before these terms existed and containing one need a new pass.
+                found = self._reindex(
+                    reviews.filter(mentions_extracted_at__isnull=False), build_matcher(new_items), batch_size
+                )
+                self.stdout.write(f"  Re-indexed {found} previously indexed review(s) containing new terms")
+
+        if options["all"]:
+            PlaceItemSummary.objects.all().delete()
+            deleted, _ = MenuItemMention.objects.all().delete()
+            self.stdout.write(self.style.WARNING(f"Dropped {deleted} existing mention(s)"))
+        else:
+            reviews = reviews.filter(mentions_extracted_at__isnull=True)
+
+        total = reviews.count()
+        found = self._index(reviews, build_matcher(), batch_size)
+        scored = refresh_item_scores(None if options["all"] else self.touched_items)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} review(s); stored {found} mention(s); re-ranked {scored} place score(s)"
+        ))
+
+    def _discover(self, reviews, min_count):
+        existing = set(MenuItem.objects.values_list("term", flat=True))
+        terms = [
+            (term, count)
+            for term, count in discover_terms(reviews.values_list("text", flat=True).iterator(chunk_size=2000), min_count)
+            if term not in existing
+        ]
+        MenuItem.objects.bulk_create(
+            [MenuItem(name=term, term=term, source=MenuItem.SOURCE_NGRAM) for term, _ in terms], ignore_conflicts=True
+        )
+        for term, count in terms:
+            self.stdout.write(f"  + {term} ({count} reviews)")
+        self.stdout.write(self.style.NOTICE(f"Discovered {len(terms)} new item term(s)"))
+        return list(MenuItem.objects.filter(term__in=[term for term, _ in terms]))
+
+    def _reindex(self, reviews, new_terms, batch_size) -> int:
+        matcher = build_matcher()
+        reindexed, last_id = 0, 0
+        while True:
+            batch = list(reviews.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return reindexed
+            last_id = batch[-1].id
+            affected = [review for review in batch if new_terms.find(review.text)]
+            if not affected:
+                continue
+            rows, dropped = reindex_mentions(affected, matcher)
+            pairs = pairs_for_mentions(rows) | dropped
+            refresh_summaries(pairs)
+            self.touched_items.update(item_id for _, item_id in pairs)
+            reindexed += len(affected)
+
+    def _index(self, reviews, matcher, batch_size, mark=True) -> int:
+        # Walk by id so marking rows as extracted doesn't shift the batches.
+        found, last_id = 0, 0
+        while True:
+            batch = list(reviews.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return found
+            rows = index_mentions(batch, matcher, mark=mark)
+            pairs = pairs_for_mentions(rows)
+            refresh_summaries(pairs)
+            self.touched_items.update(item_id for _, item_id in pairs)
+            found += len(rows)
+            last_id = batch[-1].id
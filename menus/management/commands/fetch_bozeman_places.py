@@ -4,15 +4,19 @@ Fetch Bozeman places from Google Places API and insert any missing ones.
 Usage:
   python manage.py fetch_bozeman_places --keyword restaurant --radius 8000
   python manage.py fetch_bozeman_places --dry-run
+  python manage.py fetch_bozeman_places --telemetry-file fetch-telemetry.jsonl
 """
 
 import os
+import time
 from typing import List, Optional
 
 import requests
 from django.core.management.base import BaseCommand, CommandError
 
+from menus.classification import default_classifier
 from menus.models import Place
+from menus.telemetry import IngestTelemetry, Timer, open_stream
 
 # Google Places API (New) endpoint
 PLACES_NEARBY_URL = "https://places.googleapis.com/v1/places:searchNearby"
@@ -30,6 +34,18 @@ class Command(BaseCommand):
             default=DEFAULT_RADIUS_METERS,
             help="Search radius in meters (default: 8000).",
         )
+        parser.add_argument(
+            "--latitude",
+            type=float,
+            default=BOZEMAN_COORDS[0],
+            help="Search center latitude (default: downtown Bozeman).",
+        )
+        parser.add_argument(
+            "--longitude",
+            type=float,
+            default=BOZEMAN_COORDS[1],
+            help="Search center longitude (default: downtown Bozeman).",
+        )
         parser.add_argument(
             "--keyword",
             default="restaurant",
@@ -40,6 +56,10 @@ class Command(BaseCommand):
             action="store_true",
             help="Show results without writing to DB.",
         )
+        parser.add_argument(
+            "--telemetry-file",
+            help="Append per-page JSON telemetry events and a run summary to this file ('-' for stdout).",
+        )
 
     def handle(self, *args, **options):
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -53,30 +73,57 @@ class Command(BaseCommand):
             "locationRestriction": {
                 "circle": {
                     "center": {
-                        "latitude": BOZEMAN_COORDS[0],
-                        "longitude": BOZEMAN_COORDS[1],
+                        "latitude": options["latitude"],
+                        "longitude": options["longitude"],
                     },
                     "radius": options["radius"],
                 }
             },
         }
 
-        added = 0
         seen = set(Place.objects.values_list("google_place_id", flat=True))
+        stream = open_stream(options["telemetry_file"], self.stdout)
+        telemetry = IngestTelemetry("fetch_bozeman_places", stream=stream)
+        try:
+            added = self._fetch_pages(api_key, params, seen, options, telemetry)
+            summary = telemetry.finish()
+        finally:
+            if stream is not None and stream is not self.stdout:
+                stream.close()
+
+        self.stdout.write(self.style.NOTICE(IngestTelemetry.format_summary(summary)))
+        self.stdout.write(self.style.SUCCESS(f"Added {added} new places."))
+
+    def _fetch_pages(self, api_key, params, seen, options, telemetry) -> int:
+        added = excluded = 0
         next_page: Optional[str] = None
+        page = 0
 
         while True:
+            page += 1
+            started = time.perf_counter()
+            http_timer, db_timer = Timer(), Timer()
+            inserted = skipped = 0
             body = params.copy()
             if next_page:
                 body["pageToken"] = next_page
 
             headers = {
                 "X-Goog-Api-Key": api_key,
-                "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount",
+                "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.types,places.primaryType",
             }
 
-            resp = requests.post(PLACES_NEARBY_URL, headers=headers, json=body, timeout=15)
+            with http_timer:
+                resp = requests.post(PLACES_NEARBY_URL, headers=headers, json=body, timeout=15)
             if resp.status_code != 200:
+                telemetry.record(
+                    "page_fetched",
+                    unit=page,
+                    api_calls=1,
+                    http_ms=round(http_timer.ms, 3),
+                    total_ms=round((time.perf_counter() - started) * 1000, 3),
+                    error=f"HTTP {resp.status_code}",
+                )
                 raise CommandError(f"Google Places error {resp.status_code}: {resp.text}")
 
             data = resp.json()
@@ -85,11 +132,23 @@ class Command(BaseCommand):
             for r in results:
                 place_id = r.get("id")
                 if not place_id or place_id in seen:
+                    skipped += 1
+                    continue
+
+                # Classify before insert so grocery stores etc. never reach the DB.
+                name = r.get("displayName", {}).get("text")
+                reason = default_classifier.exclusion_reason(name, r.get("types") or [])
+                if reason:
+                    excluded += 1
+                    skipped += 1
+                    seen.add(place_id)
+                    if options["dry_run"]:
+                        self.stdout.write(f"[dry-run] Would exclude {name} ({reason})")
                     continue
 
                 geom = r.get("location", {})
                 fields = {
-                    "name": r.get("displayName", {}).get("text"),
+                    "name": name,
                     "google_place_id": place_id,
                     "address": r.get("formattedAddress"),
                     "city": "Bozeman",
@@ -97,20 +156,42 @@ class Command(BaseCommand):
                     "longitude": geom.get("longitude"),
                     "rating": r.get("rating"),
                     "user_ratings_total": r.get("userRatingCount"),
+                    "primary_type": r.get("primaryType") or "",
                 }
 
                 if options["dry_run"]:
                     self.stdout.write(f"[dry-run] Would add: {fields}")
                 else:
-                    Place.objects.create(**fields)
-                    added += 1
+                    # get_or_create: parallel discovery-tile jobs may race on the same place.
+                    with db_timer:
+                        _, created = Place.objects.get_or_create(google_place_id=place_id, defaults=fields)
                     seen.add(place_id)
+                    if not created:
+                        skipped += 1
+                        continue
+                    added += 1
+                    inserted += 1
+
+            telemetry.record(
+                "page_fetched",
+                unit=page,
+                api_calls=1,
+                http_ms=round(http_timer.ms, 3),
+                response_bytes=len(resp.content or b""),
+                db_ms=round(db_timer.ms, 3),
+                results=len(results),
+                rows_inserted=inserted,
+                rows_skipped=skipped,
+                total_ms=round((time.perf_counter() - started) * 1000, 3),
+            )
 
             next_page = data.get("nextPageToken")
             if not next_page:
                 break
 
-        self.stdout.write(self.style.SUCCESS(f"Added {added} new places."))
+        if excluded:
+            self.stdout.write(self.style.NOTICE(f"Excluded {excluded} non-restaurant place(s)."))
+        return added
 
     @staticmethod
     def _parse_types(keyword: str) -> List[str]:
@@ -0,0 +1,53 @@
+"""
+Backfill SimHash fingerprints for existing reviews and link near-duplicates.
+
+Usage:
+  python manage.py fingerprint_reviews
+  python manage.py fingerprint_reviews --all --no-link
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from menus.dedup import find_near_duplicate, fingerprint_fields
+from menus.models import Review
+
+
+class Command(BaseCommand):
+    help = "Compute SimHash fingerprints for reviews missing one and link near-duplicates within each place."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every review, not just those without a fingerprint.",
+        )
+        parser.add_argument(
+            "--no-link",
+            action="store_true",
+            help="Only store fingerprints; don't set duplicate_of.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction (default: 500).")
+
+    def handle(self, *args, **options):
+        qs = Review.objects.order_by("id").only("id", "place_id", "text")
+        if not options["all"]:
+            qs = qs.filter(simhash__isnull=True)
+
+        # Oldest first, so the earliest copy of a text becomes the canonical review.
+        ids = list(qs.values_list("id", flat=True))
+        processed = linked = 0
+        batch_size = max(options["batch_size"], 1)
+        for start in range(0, len(ids), batch_size):
+            with transaction.atomic():
+                for review in qs.filter(id__in=ids[start : start + batch_size]):
+                    fields = fingerprint_fields(review.text)
+                    if not options["no_link"]:
+                        earlier = Review.objects.filter(place_id=review.place_id, id__lt=review.id)
+                        duplicate_of = find_near_duplicate(earlier, fields["simhash"])
+                        fields["duplicate_of"] = duplicate_of
+                        linked += duplicate_of is not None
+                    Review.objects.filter(pk=review.pk).update(**fields)
+                    processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Fingerprinted {processed} review(s); linked {linked} near-duplicate(s)."))
@@ -8,85 +8,47 @@ Pipeline:
 
 Requirements:
   pip install sentence-transformers numpy
-  llama.cpp binary available locally (LLAMA_BIN)
+  llama.cpp binary available locally (LLAMA_BIN), ideally `llama-server`
+  so each model is loaded once per run instead of once per prompt
 
 This command assumes the GGUF model files are already on disk. It will fail
 early with a clear error if dependencies or model paths are missing.
 """
 
+import hashlib
 import json
-import subprocess
-from dataclasses import dataclass
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from django.core.management.base import BaseCommand, CommandError
 
+from menus.embeddings import EmbeddingEngine, EmbeddingStore, mmr_order, pack_to_budget
+from menus.llm import CachedRunner, LLMCache, LlamaRunner, LlamaServerRunner, shared_server_runner
 from menus.models import Place, PlaceRecommendation, Review
 
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception:  # pragma: no cover - optional dependency
-    SentenceTransformer = None  # type: ignore
 
+# Bump whenever the extraction or reasoning prompts change so every place is regenerated.
+PROMPT_VERSION = 2
 
-# ---------------------------------------------------------------------------
-# Simple llama.cpp runner
-# ---------------------------------------------------------------------------
-class LlamaRunner:
-    def __init__(self, llama_bin: Path, model_path: Path, max_tokens: int = 512, temperature: float = 0.4, threads: int = 4):
-        self.llama_bin = llama_bin
-        self.model_path = model_path
-        self.max_tokens = max_tokens
-        self.temperature = temperature
-        self.threads = threads
-
-    def run(self, prompt: str) -> str:
-        # llama-run expects: llama-run [options] model [prompt]
-        cmd = [
-            str(self.llama_bin),
-            "--temp",
-            str(self.temperature),
-            "--context-size",
-            "4096",
-            "--threads",
-            str(self.threads),
-            str(self.model_path),
-            prompt,
-        ]
-
-        try:
-            out = subprocess.check_output(cmd, text=True)
-        except FileNotFoundError as exc:
-            raise CommandError(f"llama.cpp binary not found at {self.llama_bin}") from exc
-        except subprocess.CalledProcessError as exc:  # pragma: no cover - runtime
-            raise CommandError(f"llama.cpp invocation failed: {exc}") from exc
 
-        return out.strip()
+def compact_json(value) -> str:
+    """JSON without indentation or spaces after separators; whitespace is prompt tokens too."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
 
 
-# ---------------------------------------------------------------------------
-# Embedding layer (A1)
-# ---------------------------------------------------------------------------
-class EmbeddingEngine:
-    def __init__(self, model_name: str):
-        if SentenceTransformer is None:
-            raise CommandError("sentence-transformers is not installed. Please install it to run embeddings.")
-        self.model = SentenceTransformer(model_name)
-
-    def embed(self, texts: Sequence[str]) -> np.ndarray:
-        return self.model.encode(list(texts), convert_to_numpy=True)
-
-    def cluster_reviews(self, reviews: Sequence[str], top_k: int = 20) -> List[str]:
-        if not reviews:
-            return []
-        vectors = self.embed(reviews)
-        centroid = np.mean(vectors, axis=0)
-        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(centroid)
-        scores = np.dot(vectors, centroid) / np.maximum(norms, 1e-8)
-        idxs = np.argsort(scores)[::-1][:top_k]
-        return [reviews[i] for i in idxs]
+def input_fingerprint(reviews: List[Review], models: List[str], params: Dict[str, Any]) -> str:
+    """SHA-256 over everything a place's recommendations are generated from."""
+    digest = hashlib.sha256()
+    header = {"prompt_version": PROMPT_VERSION, "models": list(models), **params}
+    digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+    for review in reviews:
+        digest.update(f"\0{review.id}\0{review.text}".encode("utf-8"))
+    return digest.hexdigest()
 
 
 # ---------------------------------------------------------------------------
@@ -111,7 +73,7 @@ Return ONLY JSON array. Each entry:
 Limit to the top {top_k} distinct items, aggregate duplicates, and keep keywords concise.
 
 Reviews:
-{json.dumps(review_batch, indent=2)}
+{compact_json(review_batch)}
 """
         raw = self.runner.run(prompt)
         parsed = self._parse_json_list(raw)
@@ -149,7 +111,7 @@ You generate a "What to Order" section for a restaurant guide.
 Restaurant: "{place_name}"
 
 Signals from reviews (already extracted):
-{json.dumps(extracted_items, indent=2)}
+{compact_json(extracted_items)}
 
 Write {max_recs} concise recommendations (6-20 words each).
 Return ONLY JSON array:
@@ -189,23 +151,116 @@ Return ONLY JSON array:
             return []
 
 
+# ---------------------------------------------------------------------------
+# Pipeline plumbing
+# ---------------------------------------------------------------------------
+# Embed this many batches' worth of reviews before handing places downstream.
+EMBED_CHUNK_BATCHES = 4
+
+
+@dataclass
+class PlaceWork:
+    """One place moving through the embed -> extract -> reason -> persist stages.
+
+    Stages only append to `messages`; the persist stage prints them, so output
+    is identical whether stages run sequentially or on worker threads.
+    """
+    index: int
+    place: Place
+    reviews: List[Review]
+    fingerprint: str = ""
+    prompt_tokens: int = 0  # estimated tokens of review text sent to the extractor
+    vectors: Optional[np.ndarray] = None
+    extracted: List[Dict[str, Any]] = field(default_factory=list)
+    recs: List[Dict[str, Any]] = field(default_factory=list)
+    messages: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    done: bool = False  # finished early; later stages pass it through
+    error: Optional[BaseException] = None
+
+    def log(self, text: str, style: Optional[str] = None) -> None:
+        self.messages.append((style, text))
+
+    def skip(self, text: str) -> None:
+        self.log(text, "WARNING")
+        self.done = True
+
+
+class StageStats:
+    """Busy time per stage, for the end-of-run utilization report."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(workers, 1)
+        self.busy = 0.0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            self.busy += seconds
+            self.items += items
+
+    def describe(self, wall: float) -> str:
+        utilization = self.busy / (wall * self.workers) * 100 if wall > 0 else 0.0
+        return (
+            f"Stage {self.name}: {self.workers} worker(s), {self.items} item(s), "
+            f"busy {self.busy:.2f}s, utilization {utilization:.0f}%"
+        )
+
+
+class InOrder:
+    """Reorder buffer: hands finished places to `emit` strictly by `index`."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.pending: Dict[int, PlaceWork] = {}
+        self.next_index = 0
+
+    def add(self, work: PlaceWork) -> None:
+        self.pending[work.index] = work
+        while self.next_index in self.pending:
+            self.emit(self.pending.pop(self.next_index))
+            self.next_index += 1
+
+
 # ---------------------------------------------------------------------------
 # Django management command entrypoint
 # ---------------------------------------------------------------------------
 class Command(BaseCommand):
     help = "Generate place-level recommendations using the two-model pipeline (embedding -> extraction -> reasoning)."
+    # Queued jobs set this so each worker process keeps its llama-server processes across jobs
+    # instead of loading both models per place.
+    shared_servers = False
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--llama-bin",
             default="./llama.cpp/main",
-            help="Path to llama.cpp binary (compiled main).",
+            help="Path to llama.cpp binary (compiled main) for the subprocess backend.",
+        )
+        parser.add_argument(
+            "--llama-server-bin",
+            default="./llama.cpp/llama-server",
+            help="Path to llama.cpp `llama-server` binary for the server backend.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=["auto", "server", "subprocess"],
+            default="auto",
+            help="llama.cpp backend: persistent server per model, one subprocess per prompt, "
+            "or auto (server if --llama-server-bin exists).",
         )
         parser.add_argument(
             "--embed-model",
             default="thenlper/gte-small",
             help="Embedding model name/path (Model A1).",
         )
+        parser.add_argument(
+            "--embed-batch-size",
+            type=int,
+            default=64,
+            help="Reviews per embedding batch; all selected places are encoded in one pass (default: 64).",
+        )
         parser.add_argument(
             "--extractor-model",
             required=True,
@@ -243,33 +298,149 @@ class Command(BaseCommand):
             "--threads",
             type=int,
             default=4,
-            help="Threads to pass to llama-run.",
+            help="Threads to pass to llama.cpp (llama-run or llama-server).",
         )
         parser.add_argument(
             "--debug-raw",
             action="store_true",
             help="Log raw LLM outputs for extraction and reasoning.",
         )
+        parser.add_argument(
+            "--max-selected",
+            type=int,
+            default=20,
+            help="Max representative reviews sent to the extractor per place (default: 20).",
+        )
+        parser.add_argument(
+            "--review-token-budget",
+            type=int,
+            default=2000,
+            help="Token budget for review text in the extraction prompt; leaves room for "
+            "instructions and output in a 4096 context (default: 2000).",
+        )
+        parser.add_argument(
+            "--diversity",
+            type=float,
+            default=0.3,
+            help="MMR trade-off when selecting reviews: 0 = closest to the centroid, 1 = most diverse (default: 0.3).",
+        )
+        parser.add_argument(
+            "--extract-workers",
+            type=int,
+            default=1,
+            help="Concurrent extraction workers (default: 1).",
+        )
+        parser.add_argument(
+            "--reason-workers",
+            type=int,
+            default=1,
+            help="Concurrent reasoning workers (default: 1).",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=4,
+            help="Max places buffered between pipeline stages (default: 4).",
+        )
+        parser.add_argument(
+            "--sequential",
+            action="store_true",
+            help="Run embed -> extract -> reason -> persist one place at a time (no worker threads).",
+        )
+        parser.add_argument(
+            "--llm-cache-path",
+            default=".cache/llm_responses.sqlite3",
+            help="SQLite file caching LLM responses by prompt/model/settings (default: .cache/llm_responses.sqlite3).",
+        )
+        parser.add_argument(
+            "--llm-cache-max-mb",
+            type=int,
+            default=256,
+            help="Evict least recently used responses beyond this size (default: 256).",
+        )
+        parser.add_argument(
+            "--no-llm-cache",
+            action="store_true",
+            help="Always prompt the models; neither read nor write the response cache.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate every place, even when its reviews, models and prompts are unchanged.",
+        )
 
     def handle(self, *args, **options):
         llama_bin = Path(options["llama_bin"])
+        server_bin = Path(options["llama_server_bin"])
         extractor_path = Path(options["extractor_model"])
         reasoning_path = Path(options["reasoning_model"])
         embed_model = options["embed_model"]
-        limit = options["limit"]
-        max_recs = options["max_recs"]
-        dry_run = options["dry_run"]
         threads = options["threads"]
-        debug_raw = options["debug_raw"]
 
-        self._validate_paths(llama_bin, extractor_path, reasoning_path)
+        backend = options["backend"]
+        if backend == "auto":
+            backend = "server" if server_bin.exists() else "subprocess"
+
+        self._validate_paths(server_bin if backend == "server" else llama_bin, extractor_path, reasoning_path)
 
         # Initialize engines
-        embedder = EmbeddingEngine(embed_model)
-        extractor_runner = LlamaRunner(llama_bin, extractor_path, max_tokens=512, temperature=0.2, threads=threads)
-        reasoning_runner = LlamaRunner(llama_bin, reasoning_path, max_tokens=512, temperature=0.6, threads=threads)
+        embedder = self._build_embedder(embed_model)
+        store = EmbeddingStore(embedder, embed_model)
+        # With the server backend, give each model one slot per worker so requests run concurrently.
+        extractor_runner = self._build_runner(
+            backend, llama_bin, server_bin, extractor_path, temperature=0.2, threads=threads,
+            slots=1 if options["sequential"] else options["extract_workers"],
+        )
+        reasoning_runner = self._build_runner(
+            backend, llama_bin, server_bin, reasoning_path, temperature=0.6, threads=threads,
+            slots=1 if options["sequential"] else options["reason_workers"],
+        )
+        cache = None
+        if not options["no_llm_cache"]:
+            cache = LLMCache(Path(options["llm_cache_path"]), max_bytes=options["llm_cache_max_mb"] * 1024 * 1024)
+            extractor_runner = CachedRunner(extractor_runner, cache)
+            reasoning_runner = CachedRunner(reasoning_runner, cache)
         extractor = DishExtractor(extractor_runner)
         reasoner = ReasoningEngine(reasoning_runner)
+        self.stdout.write(self.style.NOTICE(f"Using llama.cpp {backend} backend"))
+
+        try:
+            self._run_pipeline(options, embedder, store, extractor, reasoner)
+            if cache is not None:
+                self.stdout.write(self.style.NOTICE(cache.describe()))
+        finally:
+            if not self.shared_servers:
+                extractor_runner.close()
+                reasoning_runner.close()
+            if cache is not None:
+                cache.close()
+
+    def _build_embedder(self, model_name: str):
+        return EmbeddingEngine(model_name)
+
+    def _build_runner(
+        self, backend: str, llama_bin: Path, server_bin: Path, model_path: Path, temperature: float, threads: int, slots: int = 1
+    ):
+        if backend == "server" and self.shared_servers:
+            return shared_server_runner(
+                server_bin, model_path, max_tokens=512, temperature=temperature, threads=threads, parallel=slots
+            )
+        if backend == "server":
+            runner = LlamaServerRunner(
+                server_bin, model_path, max_tokens=512, temperature=temperature, threads=threads, parallel=slots
+            )
+            runner.start()
+            return runner
+        return LlamaRunner(llama_bin, model_path, max_tokens=512, temperature=temperature, threads=threads)
+
+    def _run_pipeline(self, options, embedder, store, extractor, reasoner) -> None:
+        self.embedder, self.extractor, self.reasoner, self.options = embedder, extractor, reasoner, options
+        self.stage_stats = {
+            "embed": StageStats("embed", 1),
+            "extract": StageStats("extract", 1 if options["sequential"] else options["extract_workers"]),
+            "reason": StageStats("reason", 1 if options["sequential"] else options["reason_workers"]),
+            "persist": StageStats("persist", 1),
+        }
 
         qs = Place.objects.all()
         if options.get("places"):
@@ -278,62 +449,234 @@ class Command(BaseCommand):
         total = qs.count()
         self.stdout.write(self.style.NOTICE(f"Starting two-model pipeline for {total} places"))
 
-        for place in qs:
-            reviews = list(
-                place.reviews.order_by("-rating", "-created_at")
-                .only("rating", "text", "created_at")
-                [:limit]
+        self.model_inputs = [options["embed_model"], options["extractor_model"], options["reasoning_model"]]
+        self.selection_params = {
+            key: options[key] for key in ("max_recs", "max_selected", "review_token_budget", "diversity")
+        }
+        self.prompt_tokens = self.prompted_places = 0
+        works = self._collect_reviews(qs, options["limit"])
+        started = time.perf_counter()
+        if options["sequential"]:
+            for chunk in self._embedded_chunks(store, works):
+                for work in chunk:
+                    self._timed("extract", self._extract_stage, work)
+                    self._timed("reason", self._reason_stage, work)
+                    self._timed("persist", self._persist_stage, work)
+        else:
+            self._run_staged(store, works, options["queue_size"])
+        wall = time.perf_counter() - started
+
+        rate = f"{store.encoded / store.encode_seconds:.1f} reviews/s" if store.encode_seconds > 0 else "n/a"
+        self.stdout.write(self.style.NOTICE(
+            f"Embeddings: {store.hits} reused from store, {store.encoded} encoded in {store.encode_seconds:.2f}s ({rate})"
+        ))
+        if self.prompted_places:
+            self.stdout.write(self.style.NOTICE(
+                f"Extraction prompts: ~{self.prompt_tokens} review tokens for {self.prompted_places} places "
+                f"(avg {self.prompt_tokens / self.prompted_places:.0f})"
+            ))
+        for stats in self.stage_stats.values():
+            self.stdout.write(self.style.NOTICE(stats.describe(wall)))
+        self.stdout.write(self.style.SUCCESS("Recommendation generation complete"))
+
+    def _collect_reviews(self, places, limit: int) -> List["PlaceWork"]:
+        """Selected places paired with their (non-empty) reviews, in processing order.
+
+        Places whose input fingerprint matches their stored recommendations are
+        left out unless `--force` is given.
+        """
+        stored = {}
+        if not self.options["force"]:
+            stored = dict(
+                PlaceRecommendation.objects.filter(place__in=places)
+                .exclude(input_fingerprint="")
+                .values_list("place_id", "input_fingerprint")
             )
-            review_texts = [r.text for r in reviews if r.text]
-            if not review_texts:
+        works, unchanged = [], 0
+        for place in places:
+            reviews = [
+                r
+                for r in place.reviews.order_by("-rating", "-created_at").only("id", "rating", "text", "created_at")[:limit]
+                if r.text
+            ]
+            if not reviews:
                 self.stdout.write(self.style.WARNING(f"No review text for {place.name}; skipping"))
                 continue
-
+            fingerprint = input_fingerprint(reviews, self.model_inputs, self.selection_params)
+            if stored.get(place.id) == fingerprint:
+                unchanged += 1
+                continue
+            work = PlaceWork(index=len(works), place=place, reviews=reviews, fingerprint=fingerprint)
             # Print the reviews being processed (truncated for readability)
-            self.stdout.write(self.style.NOTICE(f"Reviews for {place.name}:"))
+            work.log(f"Reviews for {place.name}:", "NOTICE")
             for r in reviews:
                 snippet = (r.text or "").replace("\n", " ")[:200]
-                self.stdout.write(f"  - [{r.rating}] {snippet}")
-
-            representative = embedder.cluster_reviews(review_texts, top_k=20)
-            if not representative:
-                self.stdout.write(self.style.WARNING(f"No representative reviews for {place.name}; skipping"))
+                work.log(f"  - [{r.rating}] {snippet}")
+            works.append(work)
+        if unchanged:
+            self.stdout.write(self.style.NOTICE(f"Skipping {unchanged} places with unchanged reviews (use --force to regenerate)"))
+        return works
+
+    def _embedded_chunks(self, store: EmbeddingStore, works: List["PlaceWork"]):
+        """Yield consecutive groups of places with `vectors` filled in.
+
+        Reviews of several places are encoded together so each call fills
+        whole batches (stored vectors are reused; only new or edited reviews
+        are encoded), while later stages can start before every place is embedded.
+        """
+        batch_size = self.options["embed_batch_size"]
+        chunk_reviews = batch_size * EMBED_CHUNK_BATCHES
+        chunk: List[PlaceWork] = []
+        for i, work in enumerate(works):
+            chunk.append(work)
+            if sum(len(w.reviews) for w in chunk) < chunk_reviews and i < len(works) - 1:
                 continue
+            started = time.perf_counter()
+            matrix = store.vectors_for([r for w in chunk for r in w.reviews], batch_size=batch_size)
+            offset = 0
+            for w in chunk:
+                w.vectors = matrix[offset : offset + len(w.reviews)]
+                offset += len(w.reviews)
+            self.stage_stats["embed"].add(time.perf_counter() - started, len(chunk))
+            yield chunk
+            chunk = []
+
+    def _run_staged(self, store: EmbeddingStore, works: List["PlaceWork"], queue_size: int) -> None:
+        """Run extract and reason on worker threads connected by bounded queues.
+
+        Embedding and persistence stay on this thread (they use the DB); results
+        are persisted strictly in input order so output matches `--sequential`.
+        """
+        extract_q: "queue.Queue[Optional[PlaceWork]]" = queue.Queue(maxsize=max(queue_size, 1))
+        reason_q: "queue.Queue[Optional[PlaceWork]]" = queue.Queue(maxsize=max(queue_size, 1))
+        done_q: "queue.Queue[PlaceWork]" = queue.Queue()
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=self._stage_worker, args=("extract", self._extract_stage, extract_q, reason_q, stop), daemon=True)
+            for _ in range(self.stage_stats["extract"].workers)
+        ] + [
+            threading.Thread(target=self._stage_worker, args=("reason", self._reason_stage, reason_q, done_q, stop), daemon=True)
+            for _ in range(self.stage_stats["reason"].workers)
+        ]
+        for t in workers:
+            t.start()
 
-            extracted_items, extraction_raw = extractor.extract(representative, top_k=max_recs * 2, debug_raw=debug_raw)
-            if debug_raw:
-                self.stdout.write(self.style.WARNING(f"[debug] extractor raw output for {place.name}:\n{extraction_raw[:2000]}"))
-            if not extracted_items:
-                self.stdout.write(self.style.WARNING(f"No dishes extracted for {place.name}; skipping"))
-                continue
-
-            recs, recs_raw = reasoner.generate_recommendations(
-                place.name, extracted_items, max_recs=max_recs, debug_raw=debug_raw
-            )
-            if debug_raw:
-                self.stdout.write(self.style.WARNING(f"[debug] reasoning raw output for {place.name}:\n{recs_raw[:2000]}"))
-            if not recs:
-                self.stdout.write(self.style.WARNING(f"No recommendations produced for {place.name}"))
-                continue
-
-            self.stdout.write(self.style.SUCCESS(f"Generated {len(recs)} recommendations for {place.name}"))
-            for idx, rec in enumerate(recs, start=1):
-                self.stdout.write(f"  #{idx}: {rec['text']} (confidence={rec.get('confidence')})")
-
-            if dry_run:
-                continue
+        sink = InOrder(lambda work: self._timed("persist", self._persist_stage, work))
+        try:
+            for chunk in self._embedded_chunks(store, works):
+                for work in chunk:
+                    while True:
+                        try:
+                            extract_q.put(work, timeout=0.1)
+                            break
+                        except queue.Full:
+                            self._drain(done_q, sink)
+            while sink.next_index < len(works):
+                sink.add(done_q.get())
+        finally:
+            stop.set()
+            for _ in range(self.stage_stats["extract"].workers):
+                extract_q.put(None)
+            for t in workers[: self.stage_stats["extract"].workers]:
+                t.join()
+            for _ in range(self.stage_stats["reason"].workers):
+                reason_q.put(None)
+            for t in workers:
+                t.join()
 
-            PlaceRecommendation.objects.filter(place=place).delete()
-            for i, rec in enumerate(recs[:max_recs], start=1):
-                PlaceRecommendation.objects.create(
-                    place=place,
-                    text=rec["text"][:255],
-                    rank=i,
-                    confidence=rec.get("confidence"),
-                    source="llm",
-                )
+    @staticmethod
+    def _drain(done_q: "queue.Queue[PlaceWork]", sink: "InOrder") -> None:
+        while True:
+            try:
+                sink.add(done_q.get_nowait())
+            except queue.Empty:
+                return
+
+    def _stage_worker(self, stage: str, fn, inbox: queue.Queue, outbox: queue.Queue, stop: threading.Event) -> None:
+        while True:
+            work = inbox.get()
+            if work is None:
+                return
+            # After a failure the remaining places are passed through unprocessed.
+            if work.error is None and not stop.is_set():
+                try:
+                    self._timed(stage, fn, work)
+                except Exception as exc:  # noqa: BLE001 - re-raised in order by _persist_stage
+                    work.error = exc
+            outbox.put(work)
 
-        self.stdout.write(self.style.SUCCESS("Recommendation generation complete"))
+    def _timed(self, stage: str, fn, work: "PlaceWork") -> None:
+        started = time.perf_counter()
+        try:
+            fn(work)
+        finally:
+            self.stage_stats[stage].add(time.perf_counter() - started)
+
+    def _extract_stage(self, work: "PlaceWork") -> None:
+        if work.done:
+            return
+        place, debug_raw = work.place, self.options["debug_raw"]
+        # Diverse reviews first (near-identical ones add tokens, not dishes), then pack to the budget.
+        review_texts = [" ".join(r.text.split()) for r in work.reviews]
+        order = mmr_order(work.vectors, k=self.options["max_selected"], diversity=self.options["diversity"])
+        count_tokens = self.extractor.runner.count_tokens
+        representative = pack_to_budget(review_texts, order, self.options["review_token_budget"], count_tokens)
+        work.prompt_tokens = count_tokens(compact_json(representative)) if representative else 0
+        if not representative:
+            work.skip(f"No representative reviews for {place.name}; skipping")
+            return
+        work.log(f"Selected {len(representative)}/{len(review_texts)} reviews (~{work.prompt_tokens} tokens) for {place.name}")
+
+        extracted_items, extraction_raw = self.extractor.extract(
+            representative, top_k=self.options["max_recs"] * 2, debug_raw=debug_raw
+        )
+        if debug_raw:
+            work.log(f"[debug] extractor raw output for {place.name}:\n{extraction_raw[:2000]}", "WARNING")
+        if not extracted_items:
+            work.skip(f"No dishes extracted for {place.name}; skipping")
+            return
+        work.extracted = extracted_items
+
+    def _reason_stage(self, work: "PlaceWork") -> None:
+        if work.done:
+            return
+        place, debug_raw = work.place, self.options["debug_raw"]
+        recs, recs_raw = self.reasoner.generate_recommendations(
+            place.name, work.extracted, max_recs=self.options["max_recs"], debug_raw=debug_raw
+        )
+        if debug_raw:
+            work.log(f"[debug] reasoning raw output for {place.name}:\n{recs_raw[:2000]}", "WARNING")
+        if not recs:
+            work.skip(f"No recommendations produced for {place.name}")
+            return
+
+        work.log(f"Generated {len(recs)} recommendations for {place.name}", "SUCCESS")
+        for idx, rec in enumerate(recs, start=1):
+            work.log(f"  #{idx}: {rec['text']} (confidence={rec.get('confidence')})")
+        work.recs = recs
+
+    def _persist_stage(self, work: "PlaceWork") -> None:
+        for style, text in work.messages:
+            self.stdout.write(getattr(self.style, style)(text) if style else text)
+        if work.prompt_tokens:
+            self.prompt_tokens += work.prompt_tokens
+            self.prompted_places += 1
+        if work.error is not None:
+            raise work.error
+        if work.done or self.options["dry_run"]:
+            return
+
+        max_recs = self.options["max_recs"]
+        PlaceRecommendation.objects.filter(place=work.place).delete()
+        for i, rec in enumerate(work.recs[:max_recs], start=1):
+            PlaceRecommendation.objects.create(
+                place=work.place,
+                text=rec["text"][:255],
+                rank=i,
+                confidence=rec.get("confidence"),
+                source="llm",
+                input_fingerprint=work.fingerprint,
+            )
 
     def _validate_paths(self, llama_bin: Path, extractor_path: Path, reasoning_path: Path) -> None:
         if not llama_bin.exists():
@@ -0,0 +1,114 @@
+"""
+Generate synthetic `Place`/`Review` rows at scale for load and API
+benchmarks (see `benchmark_api`).
+
+Rows are built by the generators in `menus/fakes.py` and written with
+`bulk_create` in batches, one transaction per batch of places, so 10k places
+x 100 reviews (1M rows) fits in memory. Reviews per place are heavy-tailed
+(log-normal, averaging `--reviews-per-place`) like real listings. Places get
+`google_place_id`s starting with `synthetic-<seed>-` so they can be removed
+again with `--clear`. Menu-item mentions, sentiment and item summaries are
+indexed afterwards unless `--skip-mentions` is given; SimHash fingerprints
+are left to `fingerprint_reviews`.
+
+Usage:
+  python manage.py generate_synthetic_data --places 10000 --reviews-per-place 100
+  python manage.py generate_synthetic_data --places 200 --seed 7 --skip-mentions
+  python manage.py generate_synthetic_data --clear --places 0
+"""
+
+import math
+import random
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from menus.fakes import synthetic_places, synthetic_reviews
+from menus.models import Place, Review
+from menus.places import invalidate_place_names
+
+PREFIX = "synthetic-"
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert synthetic places and reviews for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--places", type=int, default=1000, help="Places to create (default: 1000).")
+        parser.add_argument(
+            "--reviews-per-place", type=float, default=100, help="Mean reviews per place (default: 100)."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; also namespaces the rows (default: 0).")
+        parser.add_argument("--city", default="Bozeman", help="City for the synthetic places (default: Bozeman).")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Rows per INSERT and per transaction (default: 5000)."
+        )
+        parser.add_argument("--clear", action="store_true", help="Delete all synthetic places and reviews first.")
+        parser.add_argument(
+            "--skip-mentions",
+            action="store_true",
+            help="Don't run extract_mentions afterwards (item endpoints will have no data).",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = Place.objects.filter(google_place_id__startswith=PREFIX).delete()
+            self.stdout.write(self.style.WARNING(f"Deleted {deleted} synthetic row(s)"))
+        if options["places"] <= 0:
+            return
+
+        prefix = f"{PREFIX}{options['seed']}-"
+        if Place.objects.filter(google_place_id__startswith=prefix).exists():
+            raise CommandError(f"Synthetic places for seed {options['seed']} already exist; use --clear or another --seed")
+
+        rng = random.Random(options["seed"])
+        batch_size = max(options["batch_size"], 1)
+        mean = max(options["reviews_per_place"], 0)
+        # Log-normal with sigma=1 has mean exp(mu + 1/2).
+        mu = math.log(mean) - 0.5 if mean > 0 else None
+        now = timezone.now()
+
+        started = time.perf_counter()
+        places = synthetic_places(rng, options["places"], prefix, options["city"])
+        created_places = created_reviews = 0
+        while True:
+            chunk = [place for _, place in zip(range(max(batch_size // max(int(mean), 1), 1)), places)]
+            if not chunk:
+                break
+            with transaction.atomic():
+                chunk = Place.objects.bulk_create(chunk)
+                reviews = []
+                for place in chunk:
+                    count = int(rng.lognormvariate(mu, 1.0)) if mu is not None else 0
+                    reviews.extend(synthetic_reviews(rng, place, count, now))
+                Review.objects.bulk_create(reviews, batch_size=batch_size)
+                self._set_place_ratings(chunk)
+            created_places += len(chunk)
+            created_reviews += len(reviews)
+            self.stdout.write(f"  {created_places}/{options['places']} places, {created_reviews} reviews")
+
+        invalidate_place_names()  # bulk_create sends no post_save
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created_places} places and {created_reviews} reviews in {elapsed:.1f}s "
+            f"({created_reviews / elapsed if elapsed else 0:.0f} reviews/s)"
+        ))
+        if not options["skip_mentions"]:
+            call_command("extract_mentions", "--batch-size", str(min(batch_size, 2000)), stdout=self.stdout)
+
+    @staticmethod
+    def _set_place_ratings(places) -> None:
+        """Mirror Google's listing fields from the generated reviews."""
+        stats = {
+            row["place_id"]: row
+            for row in Review.objects.filter(place__in=places).values("place_id").annotate(avg=Avg("rating"), n=Count("id"))
+        }
+        for place in places:
+            row = stats.get(place.id)
+            place.rating = round(row["avg"], 1) if row else None
+            place.user_ratings_total = row["n"] if row else 0
+        Place.objects.bulk_update(places, ["rating", "user_ratings_total"], batch_size=1000)
@@ -0,0 +1,44 @@
+"""
+Recompute the "best place for <item>" rankings (`ItemPlaceScore`) from the
+materialized `PlaceItemSummary` rows. Ingest (`sync_google_reviews`,
+`extract_mentions`) already refreshes the items it touches; run this after
+changing the prior or to repair the table. `--rebuild-summaries` first
+recomputes every `PlaceItemSummary` from the indexed mentions, for when the
+summaries themselves have drifted.
+
+Usage:
+  python manage.py refresh_item_scores
+  python manage.py refresh_item_scores --items burrito "breakfast burrito"
+  python manage.py refresh_item_scores --rebuild-summaries
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menus.mentions import normalize_term
+from menus.models import MenuItem
+from menus.summaries import rebuild_summaries, refresh_item_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute shrinkage-adjusted place rankings per menu item."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", nargs="*", help="Only these items (names or terms); default: all.")
+        parser.add_argument(
+            "--rebuild-summaries",
+            action="store_true",
+            help="Recompute every place/item summary from the indexed mentions before ranking.",
+        )
+
+    def handle(self, *args, **options):
+        item_ids = None
+        if options["items"]:
+            terms = {normalize_term(name) for name in options["items"]}
+            item_ids = list(MenuItem.objects.filter(term__in=terms).values_list("id", flat=True))
+            if not item_ids:
+                raise CommandError(f"No menu items match {', '.join(sorted(terms))}")
+        if options["rebuild_summaries"]:
+            rebuilt = rebuild_summaries()
+            self.stdout.write(f"Rebuilt {rebuilt} place/item summary row(s)")
+        written = refresh_item_scores(item_ids)
+        self.stdout.write(self.style.SUCCESS(f"Ranked {written} (item, place) score(s)"))
@@ -1,23 +1,12 @@
 from django.core.management.base import BaseCommand
+from menus.classification import DEFAULT_EXCLUDED_KEYWORDS, default_classifier
 from menus.models import Place
 
 
 class Command(BaseCommand):
     help = "Remove grocery-store places (e.g., Safeway, Smith's) from the database."
 
-    DEFAULT_KEYWORDS = [
-        "safeway",
-        "smith",
-        "smiths",
-        "smith's",
-        "grocery",
-        "market",
-        "walmart",
-        "costco",
-        "albertsons",
-        "whole foods",
-        "trader joe",
-    ]
+    DEFAULT_KEYWORDS = DEFAULT_EXCLUDED_KEYWORDS
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -33,13 +22,10 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         extra_keywords = [k.strip().lower() for k in options.get("keywords") or [] if k.strip()]
-        needles = self.DEFAULT_KEYWORDS + extra_keywords
+        classifier = default_classifier.with_extra_keywords(extra_keywords)
 
-        matches = []
-        for place in Place.objects.all():
-            name = (place.name or "").lower()
-            if any(key in name for key in needles):
-                matches.append(place)
+        # Matching happens in a single SQL filter rather than a Python scan.
+        matches = list(Place.objects.filter(classifier.exclusion_q()).only("id", "name").order_by("id"))
 
         if not matches:
             self.stdout.write(self.style.SUCCESS("No grocery-like places found."))
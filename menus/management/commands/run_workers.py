@@ -0,0 +1,107 @@
+"""
+Run background job workers against the database-backed queue.
+
+Each worker thread claims one job at a time (see `menus/jobs.py`), so several
+`run_workers` processes on one or more machines can drain the same queue
+without double-processing.
+
+Usage:
+  python manage.py run_workers --workers 4
+  python manage.py run_workers --workers 8 --kinds sync_place --burst
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from menus import jobs
+from menus.models import Job
+
+
+class Command(BaseCommand):
+    help = "Run N concurrent workers that claim and execute queued jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Concurrent worker threads (default: 2).")
+        parser.add_argument(
+            "--kinds",
+            nargs="*",
+            choices=[k for k, _ in Job.KIND_CHOICES],
+            help="Only claim these job kinds.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue has no claimable jobs instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty (default: 2).",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=3600,
+            help="Re-queue jobs left running longer than this many seconds (default: 3600).",
+        )
+
+    def handle(self, *args, **options):
+        requeued, failed = jobs.requeue_stale(timedelta(seconds=options["stale_after"]))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale job(s)."))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"Failed {failed} stale job(s) that had no attempts left."))
+
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(options, stop), name=f"worker-{i}", daemon=True)
+            for i in range(max(options["workers"], 1))
+        ]
+        self.stdout.write(self.style.NOTICE(f"Starting {len(threads)} worker(s)"))
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Stopping workers after their current job…"))
+            stop.set()
+            for t in threads:
+                t.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Workers finished: {self.stats['done']} done, {self.stats['failed']} failed/retried."
+        ))
+
+    def _worker_loop(self, options, stop):
+        worker_id = jobs.default_worker_id()
+        try:
+            while not stop.is_set():
+                close_old_connections()
+                job = jobs.claim_job(worker_id, kinds=options.get("kinds"))
+                if job is None:
+                    if options["burst"]:
+                        return
+                    stop.wait(options["poll_interval"])
+                    continue
+
+                started = time.perf_counter()
+                ok = jobs.run_job(job, stdout=self.stdout)
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.stats["done" if ok else "failed"] += 1
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(
+                    f"[{worker_id}] {job.kind} #{job.pk} {'done' if ok else 'failed'} in {elapsed:.2f}s"
+                ))
+        finally:
+            connection.close()
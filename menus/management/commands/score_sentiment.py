@@ -0,0 +1,51 @@
+"""
+Score lexicon sentiment for reviews and their menu-item mentions (see
+`menus/sentiment.py`). Newly ingested reviews are scored by mention
+extraction already; this backfills reviews that predate sentiment, or
+rescores everything with `--all` after the lexicon changes. The affected
+`PlaceItemSummary` rows are refreshed batch by batch.
+
+Usage:
+  python manage.py score_sentiment
+  python manage.py score_sentiment --all --batch-size 2000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from menus.models import Review
+from menus.sentiment import rescore_reviews
+from menus.summaries import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Backfill lexicon sentiment scores for reviews and menu-item mentions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rescore every review, not just unscored ones.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Reviews per batch (default: 1000).")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        reviews = Review.objects.only("id", "place_id", "text").order_by("id")
+        if not options["all"]:
+            reviews = reviews.filter(sentiment__isnull=True)
+
+        started = time.perf_counter()
+        scored, pairs, last_id = 0, 0, 0
+        while True:
+            # Walk by id so rows that just got a score don't shift the batches.
+            batch = list(reviews.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            touched = rescore_reviews(batch)
+            refresh_summaries(touched)
+            scored += len(batch)
+            pairs += len(touched)
+            last_id = batch[-1].id
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {scored} review(s) in {elapsed:.2f}s; refreshed {pairs} item summary pair(s)"
+        ))
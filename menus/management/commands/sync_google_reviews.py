@@ -1,16 +1,90 @@
+"""
+Sync Google Places API (New) details + reviews for all Places.
+
+Each run is recorded as a `SyncRun` with one `SyncCheckpoint` per place, so a
+crashed or partially failed run can be continued with `--resume` instead of
+starting again from the first place.
+
+Usage:
+  python manage.py sync_google_reviews
+  python manage.py sync_google_reviews --resume --max-attempts 5
+  python manage.py sync_google_reviews --telemetry-file sync-telemetry.jsonl
+  python manage.py sync_google_reviews --duplicates skip
+"""
+
 import os
+import random
+import time
+
 import requests
-from django.conf import settings
 from django.core.management.base import BaseCommand
-from menus.models import Place, Review
+from menus.classification import default_classifier
+from menus.dedup import find_near_duplicate, fingerprint_fields
+from menus.mentions import build_matcher, index_mentions
+from menus.models import Place, Review, SyncCheckpoint, SyncRun
+from menus.summaries import pairs_for_mentions, refresh_item_scores, refresh_summaries
+from menus.telemetry import IngestTelemetry, Timer, open_stream
 from django.utils import timezone
 
+# HTTP statuses worth retrying; anything else (bad key, unknown place) fails fast.
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class PlaceSyncError(Exception):
+    """Raised by `sync_place` when a place could not be synced."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
 
 class Command(BaseCommand):
     help = "Sync Google Places API (New) details + reviews for all Places."
 
     BASE_URL = "https://places.googleapis.com/v1/places"
 
+    # What to do with a new review that near-duplicates an existing one:
+    # "link" stores it with `duplicate_of` set, "skip" drops it, "keep" ignores fingerprints.
+    duplicate_policy = "link"
+    # Items whose "best place" rankings need a rebuild. `handle` collects them across the run
+    # and re-ranks once at the end; a lone `sync_place` call (a queued job) re-ranks right away.
+    touched_items = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue the most recent unfinished run, skipping places that already completed.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=3,
+            help="Attempts per place before it is marked failed (default: 3).",
+        )
+        parser.add_argument(
+            "--backoff-base",
+            type=float,
+            default=1.0,
+            help="Base delay in seconds for exponential retry backoff (default: 1.0).",
+        )
+        parser.add_argument(
+            "--backoff-max",
+            type=float,
+            default=30.0,
+            help="Upper bound in seconds for a single retry delay (default: 30).",
+        )
+        parser.add_argument(
+            "--telemetry-file",
+            help="Append per-place JSON telemetry events and a run summary to this file ('-' for stdout).",
+        )
+        parser.add_argument(
+            "--duplicates",
+            choices=["link", "skip", "keep"],
+            default=self.duplicate_policy,
+            help="Near-duplicate reviews: link to the original (default), skip them, or keep without checking.",
+        )
+
     def handle(self, *args, **options):
         # Prefer a Django settings value, fall back to environment variable
         api_key = os.getenv('GOOGLE_API_KEY')
@@ -19,20 +93,158 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR("❌ Missing GOOGLE_API_KEY in settings or environment"))
             return
 
-        places = Place.objects.all()
-        if not places.exists():
-            self.stdout.write(self.style.WARNING("⚠ No Place records found."))
-            return
+        self.duplicate_policy = options["duplicates"]
+        run = self._resume_run() if options["resume"] else None
+        if run is None:
+            places = Place.objects.all()
+            if not places.exists():
+                self.stdout.write(self.style.WARNING("⚠ No Place records found."))
+                return
+            run = self._start_run(places)
+            self.stdout.write(self.style.NOTICE(f"🔄 Starting Google Places sync (run #{run.pk})…"))
+        else:
+            self.stdout.write(self.style.NOTICE(f"🔄 Resuming Google Places sync (run #{run.pk})…"))
+
+        checkpoints = (
+            run.checkpoints.exclude(status=SyncCheckpoint.STATUS_DONE)
+            .select_related("place")
+            .order_by("place_id")
+        )
+        stream = open_stream(options["telemetry_file"], self.stdout)
+        telemetry = IngestTelemetry("sync_google_reviews", stream=stream)
+        self.touched_items = set()
+        try:
+            for checkpoint in checkpoints:
+                self._sync_with_retries(checkpoint, api_key, options, telemetry)
+            summary = telemetry.finish()
+        finally:
+            if stream is not None and stream is not self.stdout:
+                stream.close()
+        self.stdout.write(self.style.NOTICE(f"📊 {IngestTelemetry.format_summary(summary)}"))
+
+        if self.touched_items:
+            scored = refresh_item_scores(self.touched_items)
+            self.stdout.write(f"Re-ranked {scored} place score(s) for {len(self.touched_items)} item(s)")
+
+        failed = run.checkpoints.filter(status=SyncCheckpoint.STATUS_FAILED).count()
+        run.status = SyncRun.STATUS_FAILED if failed else SyncRun.STATUS_COMPLETED
+        run.finished_at = timezone.now()
+        run.save(update_fields=["status", "finished_at"])
+
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f"⚠ Sync finished with {failed} failed place(s); rerun with --resume to retry them."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("✨ Sync complete!"))
 
-        self.stdout.write(self.style.NOTICE("🔄 Starting Google Places sync…"))
+    def _start_run(self, places):
+        run = SyncRun.objects.create()
+        SyncCheckpoint.objects.bulk_create(
+            [SyncCheckpoint(run=run, place_id=pid) for pid in places.values_list("id", flat=True)]
+        )
+        return run
 
-        for place in places:
-            self.sync_place(place, api_key)
+    def _resume_run(self):
+        run = SyncRun.objects.exclude(status=SyncRun.STATUS_COMPLETED).order_by("-started_at", "-id").first()
+        if run is None:
+            self.stdout.write(self.style.WARNING("⚠ No unfinished sync run to resume; starting a new one."))
+            return None
+        # Places added since the run started still need a checkpoint.
+        missing = Place.objects.exclude(sync_checkpoints__run=run).values_list("id", flat=True)
+        SyncCheckpoint.objects.bulk_create([SyncCheckpoint(run=run, place_id=pid) for pid in missing])
+        if run.status != SyncRun.STATUS_RUNNING:
+            run.status = SyncRun.STATUS_RUNNING
+            run.finished_at = None
+            run.save(update_fields=["status", "finished_at"])
+        return run
 
-        self.stdout.write(self.style.SUCCESS("✨ Sync complete!"))
+    def _sync_with_retries(self, checkpoint, api_key, options, telemetry):
+        place = checkpoint.place
+        # One telemetry record per place, accumulated across retry attempts.
+        stats = self._empty_stats()
+        started = time.perf_counter()
+        try:
+            for attempt in range(1, max(options["max_attempts"], 1) + 1):
+                checkpoint.attempts += 1
+                attempt_started = time.perf_counter()
+                try:
+                    self.sync_place(place, api_key, stats=stats)
+                except (PlaceSyncError, requests.RequestException, ValueError) as exc:
+                    retryable = getattr(exc, "retryable", True)
+                    stats["error"] = str(exc)[:500]
+                    checkpoint.status = SyncCheckpoint.STATUS_FAILED
+                    checkpoint.last_error = str(exc)[:2000]
+                    checkpoint.duration_ms = (time.perf_counter() - attempt_started) * 1000
+                    checkpoint.save(update_fields=["status", "attempts", "last_error", "duration_ms", "updated_at"])
+                    self.stdout.write(self.style.ERROR(
+                        f"❌ Error for {place.name} (attempt {checkpoint.attempts}): {exc}"
+                    ))
+                    if not retryable or attempt >= options["max_attempts"]:
+                        return
+                    time.sleep(self._backoff_delay(checkpoint.attempts, options["backoff_base"], options["backoff_max"]))
+                    continue
 
-    def sync_place(self, place, api_key):
-        """Fetch Place details + reviews using the new Places API."""
+                stats["error"] = None
+                checkpoint.status = SyncCheckpoint.STATUS_DONE
+                checkpoint.last_error = ""
+                checkpoint.duration_ms = (time.perf_counter() - attempt_started) * 1000
+                checkpoint.save(update_fields=["status", "attempts", "last_error", "duration_ms", "updated_at"])
+                return
+        finally:
+            telemetry.record(
+                "place_synced",
+                unit=place.id,
+                name=place.name,
+                attempts=checkpoint.attempts,
+                status=checkpoint.status,
+                total_ms=round((time.perf_counter() - started) * 1000, 3),
+                **stats,
+            )
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "api_calls": 0,
+            "http_ms": 0.0,
+            "response_bytes": 0,
+            "db_ms": 0.0,
+            "rows_inserted": 0,
+            "rows_skipped": 0,
+            "duplicates": 0,
+            "mentions": 0,
+            "excluded": None,
+            "error": None,
+        }
+
+    @staticmethod
+    def _backoff_delay(attempts, base, cap):
+        """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**(attempts - 1))]."""
+        return random.uniform(0, min(cap, base * (2 ** (attempts - 1))))
+
+    @property
+    def mention_matcher(self):
+        # Built once per command instance; the lexicon only changes via extract_mentions.
+        if getattr(self, "_mention_matcher", None) is None:
+            self._mention_matcher = build_matcher()
+        return self._mention_matcher
+
+    def sync_place(self, place, api_key, stats=None):
+        """Fetch Place details + reviews using the new Places API.
+
+        Raises `PlaceSyncError` if the API reports an error for this place.
+        HTTP/DB timings and row counts are accumulated into `stats` and returned.
+        """
+        if stats is None:
+            stats = self._empty_stats()
+        http_timer, db_timer = Timer(), Timer()
+
+        # Don't spend an API call on places we already know are not restaurants.
+        reason = default_classifier.exclusion_reason(place.name, [place.primary_type])
+        if reason:
+            stats["excluded"] = reason
+            self.stdout.write(self.style.WARNING(f"⏭ Skipping {place.name}: {reason}"))
+            return stats
 
         fields = ",".join([
             "displayName",
@@ -40,6 +252,8 @@ class Command(BaseCommand):
             "userRatingCount",
             "formattedAddress",
             "location",
+            "types",
+            "primaryType",
             "reviews"  # Only returned for Advanced tier
         ])
 
@@ -49,16 +263,23 @@ class Command(BaseCommand):
             "key": api_key,
         }
 
-        response = requests.get(url, params=params)
-        data = response.json()
+        stats["api_calls"] += 1
+        try:
+            with http_timer:
+                response = requests.get(url, params=params, timeout=15)
+                data = response.json()
+        finally:
+            stats["http_ms"] += http_timer.ms
+        stats["response_bytes"] += len(response.content or b"")
 
         # Handle API errors
         if "error" in data:
             err = data["error"]
-            self.stdout.write(self.style.ERROR(
-                f"❌ Error for {place.name}: {err.get('message')} ({err.get('status')})"
-            ))
-            return
+            code = err.get("code", response.status_code)
+            raise PlaceSyncError(
+                f"{err.get('message')} ({err.get('status')})",
+                retryable=code in RETRYABLE_STATUS_CODES,
+            )
 
         # --- Update Place metadata ---
         display_name = data.get("displayName", {})
@@ -73,27 +294,44 @@ class Command(BaseCommand):
         place.latitude = location.get("latitude")
         place.longitude = location.get("longitude")
 
+        place.primary_type = data.get("primaryType", place.primary_type) or ""
+
         place.last_synced = timezone.now()
-        place.save()
+        with db_timer:
+            place.save()
+
+        # Fresh name/types may reveal a non-restaurant; skip its reviews.
+        reason = default_classifier.exclusion_reason(place.name, data.get("types") or [])
+        if reason:
+            stats["db_ms"] += db_timer.ms
+            stats["excluded"] = reason
+            self.stdout.write(self.style.WARNING(f"⏭ Not ingesting reviews for {place.name}: {reason}"))
+            return stats
 
         # --- Save reviews (if available) ---
         reviews = data.get("reviews", [])
         saved_count = 0
+        new_reviews = []
 
         for r in reviews:
             # Each review has a unique 'name' field like: places/PLACE_ID/reviews/XXXX
             google_review_id = r.get("name")
 
             if not google_review_id:
+                stats["rows_skipped"] += 1
                 continue
 
-            if Review.objects.filter(google_review_id=google_review_id).exists():
+            with db_timer:
+                exists = Review.objects.filter(google_review_id=google_review_id).exists()
+            if exists:
+                stats["rows_skipped"] += 1
                 continue
 
             text_obj = r.get("text") or {}
             text_val = text_obj.get("text")
             if not text_val:
                 # Skip reviews with no text to avoid violating NOT NULL constraint
+                stats["rows_skipped"] += 1
                 continue
 
             publish_time = r.get("publishTime")
@@ -102,18 +340,50 @@ class Command(BaseCommand):
             except Exception:
                 created_dt = timezone.now()
 
-            Review.objects.create(
-                place=place,
-                google_review_id=google_review_id,
-                author_name=r.get("authorAttribution", {}).get("displayName"),
-                rating=r.get("rating"),
-                text=text_val,
-                language="en",  # New API doesn’t always return language
-                created_at=created_dt,
-            )
+            fingerprint = fingerprint_fields(text_val)
+            duplicate_of = None
+            if self.duplicate_policy != "keep":
+                with db_timer:
+                    duplicate_of = find_near_duplicate(Review.objects.filter(place=place), fingerprint["simhash"])
+                if duplicate_of is not None:
+                    stats["duplicates"] += 1
+                    if self.duplicate_policy == "skip":
+                        stats["rows_skipped"] += 1
+                        continue
 
+            with db_timer:
+                review = Review.objects.create(
+                    place=place,
+                    google_review_id=google_review_id,
+                    author_name=r.get("authorAttribution", {}).get("displayName"),
+                    rating=r.get("rating"),
+                    text=text_val,
+                    language="en",  # New API doesn’t always return language
+                    created_at=created_dt,
+                    duplicate_of=duplicate_of,
+                    **fingerprint,
+                )
+
+            new_reviews.append(review)
             saved_count += 1
 
+        # Index menu-item mentions for the new reviews only and refresh the summaries they
+        # touch. Rankings span every place of an item, so a full run re-ranks once at the end.
+        if new_reviews:
+            with db_timer:
+                found = index_mentions(new_reviews, self.mention_matcher)
+                pairs = pairs_for_mentions(found)
+                refresh_summaries(pairs)
+                items = {item_id for _, item_id in pairs}
+                if self.touched_items is None:
+                    refresh_item_scores(items)
+                else:
+                    self.touched_items.update(items)
+            stats["mentions"] += len(found)
+
+        stats["db_ms"] += db_timer.ms
+        stats["rows_inserted"] += saved_count
         self.stdout.write(self.style.SUCCESS(
             f"✓ Synced {saved_count} new reviews for {place.name}"
         ))
+        return stats
@@ -0,0 +1,49 @@
+"""
+Warm the API's caches after a deploy, before traffic arrives (see
+`menus/warmup.py`): the place-name matcher, the place list, searches for the
+most mentioned menu items and the semantic index. Prints each step's time so
+the warm-up can be budgeted into rollouts.
+
+This process fills the shared default cache (`CACHES`) and the database and
+OS page caches, which the running workers benefit from. It cannot load the
+query encoder into the workers; set `WARM_CACHES_ON_BOOT` for that.
+
+Usage:
+  python manage.py warm_caches
+  python manage.py warm_caches --top-terms 50 --term "breakfast burrito" --skip-semantic
+  python manage.py warm_caches --json
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from menus.warmup import DEFAULT_TOP_TERMS, warm
+
+
+class Command(BaseCommand):
+    help = "Preload the place list, place-name matcher, popular searches and search indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-terms",
+            type=int,
+            default=DEFAULT_TOP_TERMS,
+            help=f"Most mentioned menu items to run searches for (default: {DEFAULT_TOP_TERMS}).",
+        )
+        parser.add_argument("--term", action="append", default=[], help="Extra search term to warm (repeatable).")
+        parser.add_argument("--skip-semantic", action="store_true", help="Don't load the semantic index and query encoder.")
+        parser.add_argument("--json", action="store_true", help="Print the timings as one JSON object.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        results = warm(top_terms=options["top_terms"], terms=options["term"], semantic=not options["skip_semantic"])
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"total_ms": total_ms, "steps": results}))
+            return
+        for result in results:
+            self.stdout.write(f"  {result['step']:<15} {result['ms']:>9.1f} ms  {result['detail']}")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(results)} cache(s) in {total_ms:.1f} ms"))
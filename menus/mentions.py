@@ -0,0 +1,213 @@
+"""
+Rule-based menu-item mention extraction.
+
+Reviews are tokenized into lowercase, naively singularized words ("tacos" ->
+"taco"), and every `MenuItem.term` is compiled into one token trie, so a
+single left-to-right pass over a review finds all item mentions
+(leftmost-longest: "breakfast burrito" wins over "burrito"). Matches are
+stored as `MenuItemMention` rows with character spans, turning "which reviews
+mention X" into an indexed join instead of a substring scan.
+
+The lexicon is a curated dish list (`DEFAULT_LEXICON`) plus multi-word
+n-grams mined from the reviews themselves (`discover_terms`): frequent
+"<modifier> <food noun>" phrases such as "green chile burrito".
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MenuItem, MenuItemMention, Review
+
+DEFAULT_LEXICON = [
+    # coffee & drinks
+    "latte", "cappuccino", "espresso", "americano", "cortado", "macchiato", "mocha", "cold brew",
+    "drip coffee", "chai", "matcha", "hot chocolate", "tea", "smoothie", "lemonade", "milkshake",
+    "margarita", "cocktail", "beer", "ipa", "wine", "old fashioned",
+    # breakfast & bakery
+    "breakfast burrito", "pancake", "waffle", "french toast", "omelet", "eggs benedict", "hash brown",
+    "biscuits and gravy", "bagel", "croissant", "muffin", "scone", "cinnamon roll", "donut", "bread",
+    # mains
+    "burrito", "taco", "quesadilla", "enchilada", "nacho", "burger", "cheeseburger", "bison burger",
+    "hot dog", "sandwich", "pizza", "calzone", "pasta", "lasagna", "mac and cheese", "ramen", "pho",
+    "pad thai", "curry", "fried rice", "dumpling", "sushi", "poke bowl", "steak", "ribeye", "brisket",
+    "ribs", "pulled pork", "fried chicken", "chicken wing", "fish and chips", "fish taco", "salmon",
+    "elk", "bison", "chili", "soup", "salad", "caesar salad", "gyro", "falafel", "hummus",
+    # sides & desserts
+    "fries", "sweet potato fries", "onion rings", "tots", "pretzel", "ice cream", "gelato", "pie",
+    "huckleberry pie", "cheesecake", "brownie", "cookie", "cake",
+]
+
+# Head nouns that anchor mined n-grams ("<modifier> <head>").
+FOOD_HEADS = {
+    "burrito", "taco", "burger", "sandwich", "pizza", "salad", "soup", "bowl", "latte", "roll", "pie",
+    "wing", "curry", "ramen", "pho", "noodle", "steak", "chili", "pancake", "waffle", "bagel", "cake",
+    "cookie", "donut", "shake", "sub", "wrap", "dog", "rib", "bun", "toast", "coffee", "tea",
+}
+
+# Words that make an n-gram a sentence fragment ("the burrito", "great burrito"), not a dish.
+STOPWORDS = {
+    "a", "an", "the", "this", "that", "these", "those", "their", "our", "my", "your", "his", "her", "its",
+    "and", "or", "but", "of", "for", "with", "to", "in", "on", "at", "is", "was", "were", "be", "been",
+    "i", "we", "you", "they", "it", "he", "she", "me", "us", "them", "some", "any", "every", "each",
+    "one", "two", "three", "got", "get", "had", "have", "ordered", "order", "tried", "try", "ate",
+    "great", "good", "best", "amazing", "awesome", "delicious", "excellent", "nice", "tasty", "perfect",
+    "bad", "terrible", "okay", "ok", "decent", "fine", "huge", "big", "small", "little", "favorite",
+    "fresh", "hot", "cold", "also", "very", "really", "so", "too", "just", "more", "most", "not", "no",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+_END = None  # trie key marking "a term ends here"
+
+
+def normalize_token(token: str) -> str:
+    """Naive singularization so "tacos"/"taco" and "fries" don't need separate entries."""
+    if len(token) > 4 and token.endswith(("ches", "shes", "xes", "oes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """`(normalized token, start, end)` triples with character offsets into `text`."""
+    return [(normalize_token(m.group(0).lower()), m.start(), m.end()) for m in _TOKEN_RE.finditer(text or "")]
+
+
+def normalize_term(text: str) -> str:
+    return " ".join(tok for tok, _, _ in tokenize(text))
+
+
+class MentionMatcher:
+    """Token trie over item terms; `find` is one pass over the review's tokens."""
+
+    def __init__(self, terms: Dict[str, int]):
+        self.root: dict = {}
+        self.size = 0
+        for term, item_id in terms.items():
+            tokens = term.split()
+            if not tokens:
+                continue
+            node = self.root
+            for tok in tokens:
+                node = node.setdefault(tok, {})
+            node[_END] = item_id
+            self.size += 1
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """Non-overlapping `(item_id, start, end)` matches, leftmost-longest."""
+        tokens = tokenize(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node, j, best = self.root, i, None
+            while j < len(tokens) and tokens[j][0] in node:
+                node = node[tokens[j][0]]
+                j += 1
+                if _END in node:
+                    best = (node[_END], j)
+            if best is None:
+                i += 1
+                continue
+            item_id, stop = best
+            matches.append((item_id, tokens[i][1], tokens[stop - 1][2]))
+            i = stop
+        return matches
+
+
+def ensure_default_lexicon() -> int:
+    """Insert any `DEFAULT_LEXICON` items that are missing; returns how many were added."""
+    existing = set(MenuItem.objects.values_list("term", flat=True))
+    new = {}
+    for name in DEFAULT_LEXICON:
+        term = normalize_term(name)
+        if term and term not in existing:
+            new.setdefault(term, MenuItem(name=name, term=term, source=MenuItem.SOURCE_LEXICON))
+    MenuItem.objects.bulk_create(new.values(), ignore_conflicts=True)
+    return len(new)
+
+
+def build_matcher(items: Optional[Iterable[MenuItem]] = None) -> MentionMatcher:
+    """Matcher over `items` (default: the whole lexicon, seeding the defaults on first use)."""
+    if items is None:
+        if not MenuItem.objects.exists():
+            ensure_default_lexicon()
+        items = MenuItem.objects.only("id", "term")
+    return MentionMatcher({item.term: item.id for item in items})
+
+
+def index_mentions(reviews: Sequence[Review], matcher: MentionMatcher, mark: bool = True) -> List[MenuItemMention]:
+    """Store mentions found in `reviews` and (with `mark`) stamp them as extracted.
+
+    The batch's review and mention sentiment is scored in the same pass and
+    saved with them. Returns the new mention rows (with `review`/`item_id`
+    set) so callers can update per-item aggregates for exactly these reviews.
+    """
+    # Imported here: `sentiment` builds on this module's tokenizer.
+    from .sentiment import apply_sentiment
+
+    rows = [
+        MenuItemMention(review=review, item_id=item_id, start=start, end=end)
+        for review in reviews
+        for item_id, start, end in matcher.find(review.text)
+    ]
+    apply_sentiment(reviews, rows)
+    with transaction.atomic():
+        MenuItemMention.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        if mark and reviews:
+            now = timezone.now()
+            for review in reviews:
+                review.mentions_extracted_at = now
+            Review.objects.bulk_update(reviews, ["sentiment", "mentions_extracted_at"], batch_size=500)
+    return rows
+
+
+def reindex_mentions(reviews: Sequence[Review], matcher: MentionMatcher) -> Tuple[List[MenuItemMention], Set[Tuple[int, int]]]:
+    """Replace the stored mentions of `reviews` with what `matcher` finds now.
+
+    Used when terms are added to an already indexed corpus: matching only the
+    new terms would store "breakfast burrito" on top of an existing "burrito"
+    over the same span, while leftmost-longest keeps just the longer one.
+    Returns the new rows and the `(place_id, item_id)` pairs of the dropped ones.
+    """
+    with transaction.atomic():
+        existing = MenuItemMention.objects.filter(review__in=reviews)
+        dropped = set(existing.values_list("review__place_id", "item_id"))
+        existing.delete()
+        rows = index_mentions(reviews, matcher, mark=False)
+    return rows, dropped
+
+
+def discover_terms(texts: Iterable[str], min_count: int = 3, max_words: int = 3) -> List[Tuple[str, int]]:
+    """Frequent "<modifier> <food noun>" n-grams, as `(normalized term, review count)`.
+
+    Counts each n-gram at most once per review, so one rambling review
+    can't promote a phrase on its own. A shorter n-gram that only ever occurs
+    inside a longer frequent one ("chile burrito" in "green chile burrito") is dropped.
+    """
+    counts: Counter = Counter()
+    for text in texts:
+        tokens = [tok for tok, _, _ in tokenize(text)]
+        seen = set()
+        for end, head in enumerate(tokens):
+            if head not in FOOD_HEADS:
+                continue
+            for n in range(2, max_words + 1):
+                start = end - n + 1
+                if start < 0:
+                    break
+                modifiers = tokens[start:end]
+                if any(tok in STOPWORDS or tok.isdigit() for tok in modifiers):
+                    break
+                seen.add(" ".join(tokens[start : end + 1]))
+        counts.update(seen)
+    frequent = {term: n for term, n in counts.items() if n >= min_count}
+    subsumed = {
+        term
+        for term, n in frequent.items()
+        if any(other.endswith(" " + term) and m == n for other, m in frequent.items())
+    }
+    return sorted(((t, n) for t, n in frequent.items() if t not in subsumed), key=lambda tn: (-tn[1], tn[0]))
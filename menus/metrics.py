@@ -0,0 +1,246 @@
+"""
+In-process API metrics, aggregated across gunicorn workers in the shared
+local store (`menus/localstore.py`) and exposed in Prometheus text format at
+`/internal/metrics`.
+
+Recording is a dict update under a lock: `inc()` adds to a counter and
+`observe()` adds one histogram observation. Each worker buffers its deltas
+and flushes them at most every `METRICS_FLUSH_SECONDS` in one short
+transaction that adds them to the stored totals (`value = value + delta`).
+A scrape flushes the scraping worker's buffer and renders the totals, so no
+exporter process or push gateway is needed. Other workers' unflushed deltas
+(at most one flush interval old) show up on the next scrape.
+
+Histogram buckets are stored non-cumulatively (one row per bucket) and
+summed into Prometheus' cumulative `le` buckets when rendering.
+"""
+
+import atexit
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+from .localstore import STORE_ERRORS, LocalStore, store_path
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "revove_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "http_requests_total": ("counter", "Requests by view, method and status code.", None),
+    "http_request_duration_seconds": ("histogram", "Request latency by view.", LATENCY_BUCKETS),
+    "http_throttled_requests_total": ("counter", "Requests rejected by a throttle (429) by view.", None),
+    "http_response_items": ("histogram", "Items returned by list responses (the page for paginated views).", SIZE_BUCKETS),
+    "search_requests_total": (
+        "counter",
+        "Keyword review searches by how they matched: exact, fuzzy (misspelling fallback), item or none.",
+        None,
+    ),
+    "cache_requests_total": ("counter", "In-process cache lookups by cache and result (hit, miss).", None),
+    "replica_fallbacks_total": ("counter", "Replica health checks that sent reads to the primary, by reason (lag, unreachable).", None),
+}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS metrics ("
+    " name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL, value REAL NOT NULL,"
+    " PRIMARY KEY (name, labels, le)) WITHOUT ROWID",
+]
+
+Key = Tuple[str, str, str]  # (name, rendered labels, bucket bound or "")
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    return ",".join(f"{key}={_quote(value)}" for key, value in sorted(labels.items()))
+
+
+def _quote(value: object) -> str:
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def _bound(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self, store: LocalStore, flush_seconds: float = 5.0):
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[Key, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        with self._lock:
+            self._pending[(name, _labels(labels), "")] += amount
+        self._maybe_flush()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        buckets = METRICS[name][2]
+        bound = buckets[bisect.bisect_left(buckets, value)] if value <= buckets[-1] else float("inf")
+        rendered = _labels(labels)
+        with self._lock:
+            self._pending[(name, rendered, _bound(bound))] += 1
+            self._pending[(name + "_sum", rendered, "")] += value
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush < self.flush_seconds:
+            return
+        try:
+            self.flush()
+        except STORE_ERRORS as exc:
+            # Metrics must never fail a request; the deltas stay buffered for the next flush.
+            logger.warning("Could not flush metrics to %s: %s", self.store.path, exc)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        conn = None
+        try:
+            conn = self.store.connect()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO metrics (name, labels, le, value) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value",
+                [(name, labels, le, value) for (name, labels, le), value in pending.items()],
+            )
+            conn.execute("COMMIT")
+        except STORE_ERRORS:
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Nothing was written: keep the deltas for the next flush.
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+            raise
+
+    def render(self) -> str:
+        """All stored series in Prometheus text exposition format (flushes this worker first)."""
+        self.flush()
+        rows = self.store.connect().execute("SELECT name, labels, le, value FROM metrics ORDER BY name, labels").fetchall()
+        series: Dict[str, list] = defaultdict(list)
+        buckets: Dict[Tuple[str, str], list] = defaultdict(list)
+        sums: Dict[Tuple[str, str], float] = {}
+        for name, labels, le, value in rows:
+            if le:
+                buckets[(name, labels)].append((float(le), value))
+            elif name.endswith("_sum") and name[:-4] in METRICS:
+                sums[(name[:-4], labels)] = value
+            else:
+                series[name].append((labels, value))
+
+        lines = []
+        for name, (kind, help_text, _) in METRICS.items():
+            full = PREFIX + name
+            lines += [f"# HELP {full} {help_text}", f"# TYPE {full} {kind}"]
+            if kind == "histogram":
+                bounds = (*METRICS[name][2], float("inf"))
+                for (hist, labels), counts in sorted(buckets.items()):
+                    if hist != name:
+                        continue
+                    per_bound = dict(counts)
+                    total = 0.0
+                    for bound in bounds:
+                        total += per_bound.get(bound, 0.0)
+                        lines.append(f"{full}_bucket{{{_join(labels, 'le=' + _quote(_bound(bound)))}}} {_number(total)}")
+                    suffix = f"{{{labels}}}" if labels else ""
+                    lines.append(f"{full}_sum{suffix} {_number(sums.get((name, labels), 0.0))}")
+                    lines.append(f"{full}_count{suffix} {_number(total)}")
+            else:
+                for labels, value in series.get(name, []):
+                    lines.append(f"{full}{{{labels}}} {_number(value)}" if labels else f"{full} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending.clear()
+        self.store.connect().execute("DELETE FROM metrics")
+
+
+def _join(labels: str, extra: str) -> str:
+    return f"{labels},{extra}" if labels else extra
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+_registries: Dict[str, MetricsRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    """The process-wide registry for `LOCAL_STORE_PATH`, or None when metrics are disabled."""
+    path = store_path()
+    if not path:
+        return None
+    registry = _registries.get(path)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(path)
+            if registry is None:
+                registry = MetricsRegistry(
+                    LocalStore(path, SCHEMA), flush_seconds=getattr(settings, "METRICS_FLUSH_SECONDS", 5.0)
+                )
+                _registries[path] = registry
+                atexit.register(registry.flush)
+    return registry
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    registry = get_registry()
+    if registry is not None:
+        registry.inc(name, amount, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    registry = get_registry()
+    if registry is not None:
+        registry.observe(name, value, **labels)
+
+
+def _result_count(response) -> Optional[int]:
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return len(data["results"])
+    if isinstance(data, list):
+        return len(data)
+    return None
+
+
+class MetricsMiddleware:
+    """Counts every request (latency, status, throttling, result size) by resolved view name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry = get_registry()
+        if registry is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "unresolved"
+        registry.inc("http_requests_total", view=view, method=request.method, status=response.status_code)
+        registry.observe("http_request_duration_seconds", elapsed, view=view)
+        if response.status_code == 429:
+            registry.inc("http_throttled_requests_total", view=view)
+        items = _result_count(response)
+        if items is not None:
+            registry.observe("http_response_items", items, view=view)
+        return response
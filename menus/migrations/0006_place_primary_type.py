@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0005_job_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="primary_type",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0006_place_primary_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="near_duplicates",
+                to="menus.review",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="simhash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="simhash_band0",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="simhash_band1",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="simhash_band2",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="simhash_band3",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
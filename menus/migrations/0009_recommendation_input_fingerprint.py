@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0008_review_embeddings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="placerecommendation",
+            name="input_fingerprint",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
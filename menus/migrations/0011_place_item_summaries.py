@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0010_menu_item_mentions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceItemSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mention_count", models.PositiveIntegerField(default=0)),
+                ("mean_rating", models.FloatField(blank=True, null=True)),
+                ("first_mentioned_at", models.DateTimeField(blank=True, null=True)),
+                ("last_mentioned_at", models.DateTimeField(blank=True, null=True)),
+                ("top_snippets", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="place_summaries",
+                        to="menus.menuitem",
+                    ),
+                ),
+                (
+                    "place",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="item_summaries",
+                        to="menus.place",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["place", "-mention_count"],
+                "indexes": [
+                    models.Index(
+                        fields=["place", "-mention_count"],
+                        name="summary_place_count_idx",
+                    )
+                ],
+                "unique_together": {("place", "item")},
+            },
+        ),
+    ]
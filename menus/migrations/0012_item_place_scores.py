@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0011_place_item_summaries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemPlaceScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("rank", models.PositiveIntegerField()),
+                ("mention_count", models.PositiveIntegerField()),
+                ("mean_rating", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="place_scores",
+                        to="menus.menuitem",
+                    ),
+                ),
+                (
+                    "place",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="item_scores",
+                        to="menus.place",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["item", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["item", "rank"], name="itemscore_item_rank_idx"
+                    )
+                ],
+                "unique_together": {("item", "place")},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0012_item_place_scores"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menuitemmention",
+            name="sentiment",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="placeitemsummary",
+            name="mean_sentiment",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="sentiment",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menus", "0013_review_sentiment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="place",
+            index=models.Index(fields=["name"], name="place_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="place",
+            index=models.Index(fields=["rating"], name="place_rating_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(fields=["-created_at"], name="review_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["place", "-created_at"], name="review_place_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["rating", "-created_at"], name="review_rating_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["language", "-created_at"], name="review_language_created_idx"
+            ),
+        ),
+    ]
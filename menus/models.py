@@ -10,8 +10,16 @@ class Place(models.Model):
     longitude = models.FloatField(null=True, blank=True)
     rating = models.FloatField(null=True, blank=True)
     user_ratings_total = models.IntegerField(null=True, blank=True)
+    primary_type = models.CharField(max_length=100, blank=True)  # Google Places `primaryType`
     last_synced = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        # `/api/places/` orderings (default `name`, `?ordering=-rating`); see menus/tests/test_query_plans.py.
+        indexes = [
+            models.Index(fields=['name'], name='place_name_idx'),
+            models.Index(fields=['rating'], name='place_rating_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -25,11 +33,121 @@ class Review(models.Model):
     language = models.CharField(max_length=10, default="en")
     created_at = models.DateTimeField()
     fetched_at = models.DateTimeField(auto_now_add=True)
+    # SimHash fingerprint and its four 16-bit LSH bands (see `menus/dedup.py`).
+    simhash = models.BigIntegerField(null=True, blank=True)
+    simhash_band0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    simhash_band3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='near_duplicates'
+    )
+    # Set once `menus/mentions.py` has indexed this review's menu-item mentions.
+    mentions_extracted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Lexicon sentiment in [-1, 1], scored alongside mention extraction (see `menus/sentiment.py`).
+    sentiment = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        # Newest-first pages, alone or after an equality filter (search by place, ReviewViewSet
+        # `place`/`rating`/`language`), read in index order without a sort.
+        indexes = [
+            models.Index(fields=['-created_at'], name='review_created_idx'),
+            models.Index(fields=['place', '-created_at'], name='review_place_created_idx'),
+            models.Index(fields=['rating', '-created_at'], name='review_rating_created_idx'),
+            models.Index(fields=['language', '-created_at'], name='review_language_created_idx'),
+        ]
 
     def __str__(self):
         return f"Review for {self.place.name} ({self.rating}★)"
 
 
+class MenuItem(models.Model):
+    """A dish or drink that reviews mention (global lexicon, see `menus/mentions.py`)."""
+    SOURCE_LEXICON = 'lexicon'
+    SOURCE_NGRAM = 'ngram'
+    SOURCE_CHOICES = [
+        (SOURCE_LEXICON, 'Curated lexicon'),
+        (SOURCE_NGRAM, 'Mined n-gram'),
+    ]
+
+    name = models.CharField(max_length=100)
+    term = models.CharField(max_length=100, unique=True)  # normalized tokens used for matching
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_LEXICON)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class MenuItemMention(models.Model):
+    """One occurrence of a `MenuItem` in a review, with its character span."""
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='mentions')
+    item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='mentions')
+    start = models.PositiveIntegerField()
+    end = models.PositiveIntegerField()
+    sentiment = models.FloatField(null=True, blank=True)  # of the words around the span, [-1, 1]
+
+    class Meta:
+        unique_together = ('review', 'item', 'start')
+        indexes = [models.Index(fields=['item', 'review'], name='mention_item_review_idx')]
+
+    def __str__(self):
+        return f"{self.item.name} in review {self.review_id} [{self.start}:{self.end}]"
+
+
+class PlaceItemSummary(models.Model):
+    """Materialized mention stats for one item at one place (see `menus/summaries.py`).
+
+    Refreshed for the affected (place, item) pairs whenever mentions are
+    indexed, so the API reads item summaries without touching reviews.
+    """
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='item_summaries')
+    item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='place_summaries')
+    mention_count = models.PositiveIntegerField(default=0)  # distinct mentioning reviews
+    mean_rating = models.FloatField(null=True, blank=True)
+    mean_sentiment = models.FloatField(null=True, blank=True)  # of the mentions, one per review
+    first_mentioned_at = models.DateTimeField(null=True, blank=True)
+    last_mentioned_at = models.DateTimeField(null=True, blank=True)
+    # [{"review_id", "rating", "start", "end"}] for the best-rated, most recent mentions
+    top_snippets = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('place', 'item')
+        ordering = ['place', '-mention_count']
+        indexes = [models.Index(fields=['place', '-mention_count'], name='summary_place_count_idx')]
+
+    def __str__(self):
+        return f"{self.item.name} @ {self.place.name} ({self.mention_count})"
+
+
+class ItemPlaceScore(models.Model):
+    """Precomputed "best place for <item>" ranking (see `menus/summaries.py`).
+
+    `score` is a Bayesian average of the ratings of reviews mentioning the
+    item at the place, shrunk toward the item's mean across all places so a
+    single 5-star mention doesn't outrank fifty 4.5-star ones.
+    """
+    item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='place_scores')
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='item_scores')
+    score = models.FloatField()
+    rank = models.PositiveIntegerField()  # 1 = best place for the item
+    mention_count = models.PositiveIntegerField()
+    mean_rating = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('item', 'place')
+        ordering = ['item', 'rank']
+        indexes = [models.Index(fields=['item', 'rank'], name='itemscore_item_rank_idx')]
+
+    def __str__(self):
+        return f"#{self.rank} {self.place.name} for {self.item.name} ({self.score:.2f})"
+
+
 class PlaceRecommendation(models.Model):
     """AI-generated place-level recommendation (1-3 per Place).
 
@@ -40,6 +158,8 @@ class PlaceRecommendation(models.Model):
     rank = models.PositiveSmallIntegerField(default=1)  # 1 = top recommendation
     confidence = models.FloatField(null=True, blank=True)
     source = models.CharField(max_length=50, default='ai')
+    # Hash of the inputs (selected reviews, models, prompt version) this row was generated from.
+    input_fingerprint = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
@@ -49,3 +169,122 @@ class PlaceRecommendation(models.Model):
 
     def __str__(self):
         return f"{self.place.name} - #{self.rank}: {self.text}"
+
+
+class SyncRun(models.Model):
+    """One invocation of `sync_google_reviews`.
+
+    Per-place progress lives in `SyncCheckpoint` so an interrupted run can be
+    resumed without re-syncing places that already completed.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Sync run #{self.pk} ({self.status})"
+
+
+class SyncCheckpoint(models.Model):
+    """Per-place status within a `SyncRun` (attempts, last error, duration)."""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run = models.ForeignKey(SyncRun, on_delete=models.CASCADE, related_name='checkpoints')
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='sync_checkpoints')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('run', 'place')
+        ordering = ['run', 'place']
+
+    def __str__(self):
+        return f"{self.place.name} in run #{self.run_id}: {self.status}"
+
+
+class Job(models.Model):
+    """Unit of background work claimed by `run_workers` (see `menus/jobs.py`)."""
+    KIND_SYNC_PLACE = 'sync_place'
+    KIND_DISCOVER_TILE = 'discover_tile'
+    KIND_RECOMMEND_PLACE = 'recommend_place'
+    KIND_CHOICES = [
+        (KIND_SYNC_PLACE, 'Sync place reviews'),
+        (KIND_DISCOVER_TILE, 'Discover places in tile'),
+        (KIND_RECOMMEND_PLACE, 'Generate place recommendations'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    priority = models.SmallIntegerField(default=0)  # lower runs first
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['priority', 'id']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_after'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class ReviewEmbedding(models.Model):
+    """Cached sentence embedding of a review's text for one embedding model.
+
+    `vector` holds `dim` little-endian float32 values; `content_hash` is the
+    SHA-256 of the text that was encoded, so edited text is re-embedded.
+    """
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='embeddings')
+    model_name = models.CharField(max_length=200)
+    content_hash = models.CharField(max_length=64)
+    dim = models.PositiveSmallIntegerField()
+    vector = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('review', 'model_name')
+
+    def __str__(self):
+        return f"{self.model_name} embedding for review #{self.review_id}"
@@ -0,0 +1,60 @@
+"""
+Place-name matching for `place_name=` search scoping.
+
+A substring match runs in the database. When nothing contains the term, a
+fuzzy fallback compares it with every place name; that list is kept in the
+default Django cache for `PLACE_NAMES_CACHE_SECONDS` instead of being
+re-read on each request. Saving or deleting a `Place` drops the cached list
+in that process's cache, or in every process's when `CACHE_DIR` makes the
+cache shared; bulk loads (which send no signals) call
+`invalidate_place_names()` or wait for the timeout.
+"""
+
+from difflib import SequenceMatcher
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import Place
+
+CACHE_KEY = "menus:place-names"
+FUZZY_MIN_RATIO = 0.6
+FUZZY_LIMIT = 5
+
+
+def place_names(refresh: bool = False) -> List[Tuple[int, str]]:
+    """`(id, lowercased name)` for every place, from the cache when possible."""
+    names = None if refresh else cache.get(CACHE_KEY)
+    if names is not None:
+        metrics.inc("cache_requests_total", cache="place_names", result="hit")
+        return names
+    metrics.inc("cache_requests_total", cache="place_names", result="miss")
+    names = [(pid, name.lower()) for pid, name in Place.objects.values_list("id", "name")]
+    cache.set(CACHE_KEY, names, getattr(settings, "PLACE_NAMES_CACHE_SECONDS", 300))
+    return names
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+def invalidate_place_names(**kwargs) -> None:
+    cache.delete(CACHE_KEY)
+
+
+def match_place_ids(term: str) -> List[int]:
+    """Places whose name contains `term`, else the closest few names by similarity."""
+    direct = list(Place.objects.filter(name__icontains=term).values_list("id", flat=True))
+    if direct:
+        return direct
+
+    norm_term = term.lower().strip()
+    scored = []
+    for pid, name in place_names():
+        score = SequenceMatcher(None, norm_term, name).ratio()
+        if score >= FUZZY_MIN_RATIO:
+            scored.append((score, pid))
+    scored.sort(key=lambda tup: tup[0], reverse=True)
+    return [pid for _, pid in scored[:FUZZY_LIMIT]]
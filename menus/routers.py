@@ -0,0 +1,135 @@
+"""
+Primary/replica database routing.
+
+Everything reads and writes the `default` (primary) database, except reads
+of `menus` models made inside `use_replica()`, which the public read-only
+viewsets enter for the whole request (`ReplicaReadMixin` in views). Those go
+to the `REPLICA_DATABASE_ALIAS` database when one is configured and fresh,
+so a heavy sync or bulk load on the primary doesn't compete with search
+traffic. Management commands never enter the block and stay on the primary.
+
+Reads fall back to the primary when:
+  - no replica is configured (`REPLICA_DATABASE_ALIAS` unset),
+  - the replica lags more than `REPLICA_MAX_LAG_SECONDS` behind, or is
+    unreachable (checked at most every `REPLICA_LAG_CHECK_SECONDS` per
+    process),
+  - the primary has an open transaction (read-your-writes).
+
+Auth, session and other non-`menus` tables always use the primary, so a
+fresh login is never read from a stale copy.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+# Postgres standby: seconds since the last replayed transaction, 0 when fully caught up or not a standby.
+PG_LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+@contextmanager
+def use_replica():
+    """Route `menus` reads in this block (and this context only) to the replica when it is fresh."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_alias() -> Optional[str]:
+    alias = getattr(settings, "REPLICA_DATABASE_ALIAS", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def measure_lag(alias: str) -> float:
+    """Replication lag of `alias` in seconds.
+
+    SQLite "replicas" (a copied file, for local testing) have no replication
+    stream to lag behind and always report 0.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(PG_LAG_SQL)
+        return float(cursor.fetchone()[0] or 0.0)
+
+
+class ReplicaHealth:
+    """Cached per-process verdict on whether the replica may serve reads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._usable = False
+
+    def usable(self, alias: str) -> bool:
+        interval = getattr(settings, "REPLICA_LAG_CHECK_SECONDS", 5.0)
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return self._usable
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= interval:
+                self._usable = self._check(alias)
+                self._checked_at = time.monotonic()
+            return self._usable
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checked_at = None
+
+    @staticmethod
+    def _check(alias: str) -> bool:
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError as exc:
+            logger.warning("Replica %s unreachable, reading from primary: %s", alias, exc)
+            metrics.inc("replica_fallbacks_total", reason="unreachable")
+            return False
+        max_lag = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 10.0)
+        if lag > max_lag:
+            logger.warning("Replica %s is %.1fs behind (max %.1fs), reading from primary", alias, lag, max_lag)
+            metrics.inc("replica_fallbacks_total", reason="lag")
+            return False
+        return True
+
+
+health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or model._meta.app_label != "menus":
+            return DEFAULT_DB_ALIAS
+        alias = replica_alias()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias if health.usable(alias) else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Also for instances that were loaded from the replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
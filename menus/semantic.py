@@ -0,0 +1,165 @@
+"""
+Semantic review search over stored review embeddings.
+
+`build_index` snapshots every `ReviewEmbedding` for one model into a
+directory of `.npy` files: an L2-normalized float32 matrix plus aligned
+review/place id arrays. `SemanticIndex` memory-maps those files, so workers
+share the page cache instead of each holding a copy, and scores a query with
+one matrix-vector product and an `argpartition` top-k. The DB is only hit
+afterwards, once, to load the winning reviews.
+
+Rebuild with `python manage.py build_semantic_index`; running processes pick
+up the new files on their next query.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+from .embeddings import EmbeddingEngine
+from .models import ReviewEmbedding
+
+META_FILE = "meta.json"
+
+
+class IndexUnavailable(Exception):
+    """No usable index on disk (not built yet, or built for another layout)."""
+
+
+def index_dir() -> Path:
+    return Path(settings.SEMANTIC_INDEX_DIR)
+
+
+def build_index(model_name: str, directory: Optional[Path] = None, chunk_size: int = 2000) -> dict:
+    """Write the index for `model_name` to `directory` and return its metadata.
+
+    Files are written to a sibling temp directory and swapped in, so readers
+    never see a half-written index.
+    """
+    directory = Path(directory or index_dir())
+    rows = ReviewEmbedding.objects.filter(model_name=model_name).order_by("review_id")
+    total = rows.count()
+    first = rows.values_list("dim", flat=True).first()
+    dim = first or 0
+
+    vectors = np.zeros((total, dim), dtype=np.float32)
+    review_ids = np.zeros(total, dtype=np.int64)
+    place_ids = np.zeros(total, dtype=np.int64)
+    n = 0
+    for review_id, place_id, row_dim, blob in rows.values_list("review_id", "review__place_id", "dim", "vector").iterator(
+        chunk_size=chunk_size
+    ):
+        if row_dim != dim:
+            continue  # vectors from a different model revision; skip rather than mis-score
+        vectors[n] = np.frombuffer(bytes(blob), dtype="<f4", count=dim)
+        review_ids[n], place_ids[n] = review_id, place_id
+        n += 1
+    vectors, review_ids, place_ids = vectors[:n], review_ids[:n], place_ids[:n]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+
+    meta = {"model_name": model_name, "dim": dim, "count": n, "built_at": timezone.now().isoformat()}
+    tmp = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "vectors.npy", vectors)
+    np.save(tmp / "review_ids.npy", review_ids)
+    np.save(tmp / "place_ids.npy", place_ids)
+    (tmp / META_FILE).write_text(json.dumps(meta))
+
+    old = directory.with_name(directory.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+class SemanticIndex:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        try:
+            self.meta = json.loads((self.directory / META_FILE).read_text())
+            self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+            self.review_ids = np.load(self.directory / "review_ids.npy", mmap_mode="r")
+            self.place_ids = np.load(self.directory / "place_ids.npy", mmap_mode="r")
+        except (OSError, ValueError) as exc:
+            raise IndexUnavailable(f"No semantic index at {self.directory}: {exc}") from exc
+        self.model_name = self.meta["model_name"]
+
+    def __len__(self) -> int:
+        return len(self.review_ids)
+
+    def search(
+        self, query_vector: np.ndarray, k: int = 20, place_ids: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Top `k` `(review_id, cosine similarity)` pairs, best first."""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        rows = None
+        if place_ids:
+            rows = np.flatnonzero(np.isin(self.place_ids, np.asarray(list(place_ids), dtype=np.int64)))
+            if not len(rows):
+                return []
+            scores = self.vectors[rows] @ query
+        else:
+            scores = self.vectors @ query
+        if not len(scores) or k <= 0:
+            return []
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        hits = rows[top] if rows is not None else top
+        return [(int(self.review_ids[i]), float(scores[j])) for i, j in zip(hits, top)]
+
+
+# ---------------------------------------------------------------------------
+# Per-process handles
+# ---------------------------------------------------------------------------
+_lock = threading.Lock()
+_index: Optional[SemanticIndex] = None
+_index_stamp: Optional[float] = None
+_engines = {}
+
+
+def get_index() -> SemanticIndex:
+    """The current on-disk index, reopened when `build_semantic_index` replaces it."""
+    global _index, _index_stamp
+    meta_path = index_dir() / META_FILE
+    try:
+        stamp = meta_path.stat().st_mtime
+    except OSError as exc:
+        raise IndexUnavailable(f"No semantic index at {index_dir()}; run build_semantic_index") from exc
+    with _lock:
+        if _index is None or _index_stamp != stamp or _index.directory != index_dir():
+            metrics.inc("cache_requests_total", cache="semantic_index", result="miss")
+            _index, _index_stamp = SemanticIndex(index_dir()), stamp
+        else:
+            metrics.inc("cache_requests_total", cache="semantic_index", result="hit")
+        return _index
+
+
+def get_engine(model_name: str) -> EmbeddingEngine:
+    """Load the query encoder once per process (loading the model takes seconds)."""
+    with _lock:
+        if model_name not in _engines:
+            metrics.inc("cache_requests_total", cache="query_encoder", result="miss")
+            _engines[model_name] = EmbeddingEngine(model_name)
+        else:
+            metrics.inc("cache_requests_total", cache="query_encoder", result="hit")
+        return _engines[model_name]
+
+
+def embed_query(model_name: str, text: str) -> np.ndarray:
+    return get_engine(model_name).embed([text])[0]
@@ -0,0 +1,188 @@
+"""
+Lexicon-based review sentiment, scored a batch at a time with numpy.
+
+Each token gets a precomputed polarity weight (`LEXICON`, roughly VADER's
+-4..+4 scale). A negator ("not", "wasn't", "never") within the previous
+`NEGATION_WINDOW` tokens of the same sentence flips and damps the weight,
+and an intensifier right before it ("very", "super") scales it. A batch of
+reviews is flattened into token arrays, so weighting, per-review sums and
+per-mention windows are array operations rather than Python loops.
+
+  - Review sentiment: the sum of all token weights.
+  - Mention sentiment: the sum over the `MENTION_WINDOW` tokens on either
+    side of a `MenuItemMention` span, clipped to its sentence, so "the
+    burrito was amazing but the coffee was awful" scores the two apart.
+
+Both are squashed into [-1, 1] with VADER's x / sqrt(x^2 + 15). This is a
+cheap ranking signal computed at ingest, not a replacement for the LLM's
+per-dish judgement in `generate_recommendations`.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from .mentions import normalize_token, tokenize
+from .models import MenuItemMention, Review
+
+LEXICON = {
+    # positive
+    "amazing": 3.0, "awesome": 3.0, "excellent": 3.2, "outstanding": 3.2, "incredible": 3.0, "fantastic": 3.1,
+    "phenomenal": 3.2, "perfect": 3.0, "perfectly": 2.6, "best": 3.0, "love": 3.0, "loved": 3.0, "great": 2.8,
+    "delicious": 2.9, "yummy": 2.4, "tasty": 2.3, "flavorful": 2.2, "fresh": 1.6, "good": 1.9, "nice": 1.8,
+    "solid": 1.5, "friendly": 2.0, "fast": 1.2, "quick": 1.2, "crispy": 1.3, "tender": 1.5, "juicy": 1.5,
+    "creamy": 1.2, "cozy": 1.6, "favorite": 2.5, "recommend": 2.0, "recommended": 2.0, "worth": 1.5,
+    "enjoyed": 2.2, "happy": 2.2, "generous": 1.6, "reasonable": 1.2, "clean": 1.4, "helpful": 1.8,
+    "rave": 2.0, "fine": 0.8, "decent": 1.0, "okay": 0.5, "ok": 0.5,
+    # negative
+    "bad": -2.5, "terrible": -3.1, "awful": -3.1, "horrible": -3.1, "disgusting": -3.2, "worst": -3.1,
+    "gross": -2.6, "bland": -1.9, "salty": -1.2, "soggy": -1.9, "stale": -2.0, "dry": -1.4,
+    "greasy": -1.3, "burnt": -2.0, "overcooked": -1.8, "undercooked": -2.0, "overpriced": -2.0,
+    "expensive": -0.9, "slow": -1.5, "rude": -2.7, "dirty": -2.3, "disappointing": -2.4, "disappointed": -2.3,
+    "meh": -1.0, "mediocre": -1.6, "sick": -2.5, "poor": -2.2, "wrong": -1.6, "hate": -2.9, "hated": -2.9,
+    "avoid": -2.0, "skip": -1.0, "wait": -0.6, "lukewarm": -1.4, "tasteless": -2.3, "inedible": -3.0,
+}
+
+# Tokens are pieces of `mentions.tokenize`, so "wasn't" arrives as "wasn" + "t".
+NEGATORS = {
+    "not", "no", "never", "nothing", "neither", "nor", "without", "hardly", "barely",
+    "isn", "wasn", "aren", "weren", "don", "doesn", "didn", "won", "wouldn", "couldn", "shouldn", "ain", "cannot",
+}
+
+INTENSIFIERS = {
+    "very": 1.3, "really": 1.3, "super": 1.3, "so": 1.2, "too": 1.2, "extremely": 1.5, "incredibly": 1.5,
+    "absolutely": 1.4, "totally": 1.3, "truly": 1.3, "insanely": 1.5,
+    "slightly": 0.6, "somewhat": 0.7, "kinda": 0.7, "fairly": 0.8, "pretty": 0.9,
+}
+
+NEGATION_SCALE = -0.74  # VADER's N_SCALAR
+NEGATION_WINDOW = 3
+MENTION_WINDOW = 5
+ALPHA = 15.0
+
+_SENTENCE_END_RE = re.compile(r"[.!?;\n]+")
+
+Span = Tuple[int, int, int]  # (index of the text in the batch, start char, end char)
+
+
+class SentimentScorer:
+    """Token weights compiled into lookup arrays; `score` handles a whole batch."""
+
+    def __init__(self, lexicon: Dict[str, float] = None, negators: Iterable[str] = NEGATORS, intensifiers: Dict[str, float] = None):
+        lexicon = LEXICON if lexicon is None else lexicon
+        intensifiers = INTENSIFIERS if intensifiers is None else intensifiers
+        # Id 0 is every token we have no weight for.
+        words = sorted({normalize_token(w) for w in [*lexicon, *negators, *intensifiers]})
+        self.vocab = {word: i for i, word in enumerate(words, start=1)}
+        size = len(words) + 1
+        self.weights = np.zeros(size, dtype=np.float64)
+        self.is_negator = np.zeros(size, dtype=bool)
+        self.boost = np.ones(size, dtype=np.float64)
+        for word, weight in lexicon.items():
+            self.weights[self.vocab[normalize_token(word)]] = weight
+        for word in negators:
+            self.is_negator[self.vocab[normalize_token(word)]] = True
+        for word, factor in intensifiers.items():
+            self.boost[self.vocab[normalize_token(word)]] = factor
+
+    def score(self, texts: Sequence[str], spans: Sequence[Span] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """(per-text scores, per-span scores), both in [-1, 1]."""
+        ids, doc, sentence, starts = self._encode(texts)
+        weights = self._token_weights(ids, sentence)
+        text_scores = _normalize(np.bincount(doc, weights=weights, minlength=len(texts)))
+        if not len(spans) or not len(ids):
+            return text_scores, np.zeros(len(spans))
+
+        # Locate each span's tokens by (doc, char offset), which is sorted across the batch.
+        keys = (doc.astype(np.int64) << 32) | starts
+        span_doc, span_start, span_end = (np.asarray(col, dtype=np.int64) for col in zip(*spans))
+        first = np.searchsorted(keys, (span_doc << 32) | span_start, side="left")
+        last = np.searchsorted(keys, (span_doc << 32) | span_end, side="left")  # exclusive
+        first = np.minimum(first, len(ids) - 1)
+        sent = sentence[first]
+        lo = np.maximum(first - MENTION_WINDOW, np.searchsorted(sentence, sent, side="left"))
+        hi = np.minimum(last + MENTION_WINDOW, np.searchsorted(sentence, sent, side="right"))
+        prefix = np.concatenate(([0.0], np.cumsum(weights)))
+        return text_scores, _normalize(prefix[hi] - prefix[lo])
+
+    def _encode(self, texts: Sequence[str]):
+        """Flatten a batch into token id, text index, global sentence index and char offset arrays."""
+        ids: List[int] = []
+        doc: List[int] = []
+        sentence: List[int] = []
+        starts: List[int] = []
+        sentence_base = 0
+        for index, text in enumerate(texts):
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            breaks = [m.start() for m in _SENTENCE_END_RE.finditer(text)]
+            token_starts = [start for _, start, _ in tokens]
+            local = np.searchsorted(breaks, token_starts, side="right")
+            ids.extend(self.vocab.get(tok, 0) for tok, _, _ in tokens)
+            doc.extend([index] * len(tokens))
+            sentence.extend((local + sentence_base).tolist())
+            starts.extend(token_starts)
+            sentence_base += int(local[-1]) + 1
+        return (
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(doc, dtype=np.int64),
+            np.asarray(sentence, dtype=np.int64),
+            np.asarray(starts, dtype=np.int64),
+        )
+
+    def _token_weights(self, ids: np.ndarray, sentence: np.ndarray) -> np.ndarray:
+        weights = self.weights[ids].copy()
+        negators = self.is_negator[ids]
+        negated = np.zeros(len(ids), dtype=bool)
+        for k in range(1, NEGATION_WINDOW + 1):
+            # Sentence ids are global, so this also stops at review boundaries.
+            negated[k:] |= negators[:-k] & (sentence[k:] == sentence[:-k])
+        weights[negated] *= NEGATION_SCALE
+        if len(ids) > 1:
+            same = sentence[1:] == sentence[:-1]
+            weights[1:] *= np.where(same, self.boost[ids[:-1]], 1.0)
+        return weights
+
+
+def _normalize(raw: np.ndarray) -> np.ndarray:
+    return raw / np.sqrt(raw * raw + ALPHA)
+
+
+@lru_cache(maxsize=1)
+def get_scorer() -> SentimentScorer:
+    return SentimentScorer()
+
+
+def apply_sentiment(reviews: Sequence, mentions: Sequence = ()) -> None:
+    """Set `.sentiment` on `reviews` and on their `mentions` in place (no queries)."""
+    if not reviews:
+        return
+    position = {review.id: i for i, review in enumerate(reviews)}
+    mentions = [m for m in mentions if m.review_id in position]
+    text_scores, span_scores = get_scorer().score(
+        [review.text or "" for review in reviews],
+        [(position[m.review_id], m.start, m.end) for m in mentions],
+    )
+    for review, value in zip(reviews, text_scores):
+        review.sentiment = round(float(value), 4)
+    for mention, value in zip(mentions, span_scores):
+        mention.sentiment = round(float(value), 4)
+
+
+def rescore_reviews(reviews: Sequence) -> Set[Tuple[int, int]]:
+    """Recompute and save the sentiment of `reviews` and of all their mentions.
+
+    Returns the (place_id, item_id) pairs of the rescored mentions, for
+    `summaries.refresh_summaries`.
+    """
+    if not reviews:
+        return set()
+    mentions = list(MenuItemMention.objects.filter(review_id__in=[r.id for r in reviews]).only("id", "review_id", "item_id", "start", "end"))
+    apply_sentiment(reviews, mentions)
+    Review.objects.bulk_update(reviews, ["sentiment"], batch_size=500)
+    MenuItemMention.objects.bulk_update(mentions, ["sentiment"], batch_size=500)
+    place_of = {review.id: review.place_id for review in reviews}
+    return {(place_of[m.review_id], m.item_id) for m in mentions}
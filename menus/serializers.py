@@ -1,23 +1,42 @@
 from rest_framework import serializers
-from .models import Place, Review
+from .instrumentation import SerializerTimingMixin
+from .models import ItemPlaceScore, Place, PlaceItemSummary, Review
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     place_name = serializers.CharField(source='place.name', read_only=True)
 
     class Meta:
         model = Review
-        fields = ('id', 'place', 'place_name', 'google_review_id', 'author_name', 'rating', 'text', 'language', 'created_at', 'fetched_at')
-        read_only_fields = ('id', 'place_name', 'fetched_at')
+        fields = ('id', 'place', 'place_name', 'google_review_id', 'author_name', 'rating', 'text', 'language', 'created_at', 'fetched_at', 'duplicate_of', 'sentiment')
+        read_only_fields = ('id', 'place_name', 'fetched_at', 'duplicate_of', 'sentiment')
 
 
-class PlaceSerializer(serializers.ModelSerializer):
-    review_count = serializers.SerializerMethodField()
+class PlaceSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    # Annotated by `PlaceViewSet.get_queryset` (one correlated subquery instead of a COUNT per place).
+    review_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Place
         fields = ('id', 'name', 'google_place_id', 'address', 'city', 'latitude', 'longitude', 'rating', 'user_ratings_total', 'last_synced', 'review_count')
         read_only_fields = ('id', 'review_count', 'last_synced')
 
-    def get_review_count(self, obj):
-        return obj.reviews.count()
+
+class PlaceItemSummarySerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    item = serializers.CharField(source='item.name', read_only=True)
+    term = serializers.CharField(source='item.term', read_only=True)
+
+    class Meta:
+        model = PlaceItemSummary
+        fields = ('item', 'term', 'mention_count', 'mean_rating', 'mean_sentiment', 'first_mentioned_at', 'last_mentioned_at', 'top_snippets')
+        read_only_fields = fields
+
+
+class ItemPlaceScoreSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    place_name = serializers.CharField(source='place.name', read_only=True)
+    address = serializers.CharField(source='place.address', read_only=True)
+
+    class Meta:
+        model = ItemPlaceScore
+        fields = ('rank', 'place', 'place_name', 'address', 'score', 'mention_count', 'mean_rating')
+        read_only_fields = fields
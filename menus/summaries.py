@@ -0,0 +1,156 @@
+"""
+Materialized per-(place, item) summaries over indexed menu-item mentions.
+
+`refresh_summaries(pairs)` recomputes `PlaceItemSummary` rows for just the
+(place, item) pairs whose mentions changed, reading only those pairs'
+mentions through the (item, review) index. Ingest calls it with the pairs
+touched by the reviews it just indexed, so the table stays current without
+a global recompute; `rebuild_summaries()` is the from-scratch fallback
+(`refresh_item_scores --rebuild-summaries`).
+
+`refresh_item_scores(item_ids)` then re-ranks places for the touched items
+from those summaries alone (no review scans), into `ItemPlaceScore`.
+"""
+
+from collections import defaultdict
+from typing import Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import ItemPlaceScore, MenuItem, MenuItemMention, PlaceItemSummary
+
+TOP_SNIPPETS = 3
+# Bayesian prior strength, in reviews: a place needs about this many mentions
+# before its own mean outweighs the item-wide mean.
+PRIOR_WEIGHT = 5
+# Pairs per query when refreshing, to stay under SQLite's bound-parameter limit.
+CHUNK_SIZE = 200
+
+Pair = Tuple[int, int]
+
+
+def pairs_for_mentions(mentions: Iterable[MenuItemMention]) -> Set[Pair]:
+    """(place_id, item_id) pairs touched by freshly indexed mention rows."""
+    return {(m.review.place_id, m.item_id) for m in mentions}
+
+
+def refresh_summaries(pairs: Iterable[Pair]) -> int:
+    """Recompute the summaries for `pairs`; returns how many rows were written."""
+    pairs = sorted(set(pairs))
+    written = 0
+    for start in range(0, len(pairs), CHUNK_SIZE):
+        written += _refresh_chunk(pairs[start : start + CHUNK_SIZE])
+    return written
+
+
+def rebuild_summaries() -> int:
+    """Drop and recompute every summary (after re-indexing all mentions)."""
+    pairs = set(MenuItemMention.objects.values_list("review__place_id", "item_id").distinct())
+    with transaction.atomic():
+        PlaceItemSummary.objects.all().delete()
+        return refresh_summaries(pairs)
+
+
+def _refresh_chunk(pairs: List[Pair]) -> int:
+    wanted = set(pairs)
+    # (item = i AND place IN (...)) per item, so only the pairs' own mentions are read.
+    places_by_item = defaultdict(set)
+    for place_id, item_id in pairs:
+        places_by_item[item_id].add(place_id)
+    match = Q()
+    for item_id, place_ids in places_by_item.items():
+        match |= Q(item_id=item_id, review__place_id__in=place_ids)
+    rows = (
+        MenuItemMention.objects.filter(match)
+        .order_by("start")
+        .values_list(
+            "review__place_id", "item_id", "review_id", "review__rating", "review__created_at", "start", "end", "sentiment",
+        )
+    )
+    # One entry per review (its first mention of the item), grouped by pair.
+    reviews = defaultdict(dict)
+    for place_id, item_id, review_id, rating, created_at, start, end, sentiment in rows:
+        reviews[(place_id, item_id)].setdefault(review_id, (rating, created_at, start, end, sentiment))
+
+    summaries = []
+    for place_id, item_id in pairs:
+        mentioned = reviews.get((place_id, item_id))
+        if not mentioned:
+            continue
+        dates = [created_at for _, created_at, _, _, _ in mentioned.values()]
+        sentiments = [sentiment for *_, sentiment in mentioned.values() if sentiment is not None]
+        # Best-rated first; among equal ratings, the warmest words about the item, then the newest.
+        best = sorted(
+            mentioned.items(),
+            key=lambda kv: (-kv[1][0], -(kv[1][4] or 0.0), -kv[1][1].timestamp(), kv[0]),
+        )[:TOP_SNIPPETS]
+        summaries.append(
+            PlaceItemSummary(
+                place_id=place_id,
+                item_id=item_id,
+                mention_count=len(mentioned),
+                mean_rating=sum(rating for rating, *_ in mentioned.values()) / len(mentioned),
+                mean_sentiment=sum(sentiments) / len(sentiments) if sentiments else None,
+                first_mentioned_at=min(dates),
+                last_mentioned_at=max(dates),
+                top_snippets=[
+                    {"review_id": review_id, "rating": rating, "start": start, "end": end}
+                    for review_id, (rating, _, start, end, _) in best
+                ],
+            )
+        )
+
+    with transaction.atomic():
+        # Pairs whose mentions are all gone lose their summary.
+        gone = wanted - {(s.place_id, s.item_id) for s in summaries}
+        for place_id, item_id in gone:
+            PlaceItemSummary.objects.filter(place_id=place_id, item_id=item_id).delete()
+        PlaceItemSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=["place", "item"],
+            update_fields=[
+                "mention_count", "mean_rating", "mean_sentiment", "first_mentioned_at", "last_mentioned_at",
+                "top_snippets", "updated_at",
+            ],
+        )
+    return len(summaries)
+
+
+def bayesian_score(mean_rating: float, count: int, prior_mean: float, prior_weight: float = PRIOR_WEIGHT) -> float:
+    return (prior_weight * prior_mean + count * mean_rating) / (prior_weight + count)
+
+
+def refresh_item_scores(item_ids: Iterable[int] = None) -> int:
+    """Re-rank places for `item_ids` (default: every item); returns rows written.
+
+    All places of an item are rescored together because the prior (the
+    item's mean rating across places) moves whenever any place changes.
+    """
+    items = MenuItem.objects.all() if item_ids is None else MenuItem.objects.filter(id__in=set(item_ids))
+    written = 0
+    for item_id in list(items.values_list("id", flat=True)):
+        summaries = list(
+            PlaceItemSummary.objects.filter(item_id=item_id, mention_count__gt=0, mean_rating__isnull=False)
+            .values_list("place_id", "mention_count", "mean_rating")
+        )
+        total = sum(count for _, count, _ in summaries)
+        prior = sum(count * mean for _, count, mean in summaries) / total if total else 0.0
+        scored = sorted(
+            ((bayesian_score(mean, count, prior), count, mean, place_id) for place_id, count, mean in summaries),
+            key=lambda row: (-row[0], -row[1], row[3]),
+        )
+        with transaction.atomic():
+            ItemPlaceScore.objects.filter(item_id=item_id).delete()
+            ItemPlaceScore.objects.bulk_create(
+                [
+                    ItemPlaceScore(
+                        item_id=item_id, place_id=place_id, score=score, rank=rank, mention_count=count, mean_rating=mean
+                    )
+                    for rank, (score, count, mean, place_id) in enumerate(scored, start=1)
+                ],
+                batch_size=500,
+            )
+        written += len(scored)
+    return written
@@ -0,0 +1,122 @@
+"""
+Structured telemetry for ingestion commands.
+
+`IngestTelemetry` collects one record per unit of work (a synced place, a
+fetched search page), optionally streams each record as a JSON line, and
+builds an end-of-run summary with latency percentiles and the slowest units.
+"""
+
+import json
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; returns None for an empty sequence."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def distribution(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    values = list(values)
+    stats: Dict[str, Optional[float]] = {f"p{p}": _round(percentile(values, p)) for p in PERCENTILES}
+    stats["max"] = _round(max(values)) if values else None
+    stats["total"] = _round(sum(values))
+    return stats
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class Timer:
+    """Accumulates wall time (ms) across several `with timer:` blocks."""
+
+    def __init__(self):
+        self.ms = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms += (time.perf_counter() - self._start) * 1000
+        return False
+
+
+class IngestTelemetry:
+    """Collects per-unit ingestion metrics for one command run.
+
+    Each `record(...)` call is kept for the summary and, when a stream is
+    given, written immediately as a JSON line so dashboards can tail it.
+    """
+
+    METRICS = ("http_ms", "db_ms", "total_ms", "response_bytes")
+
+    def __init__(self, command: str, stream: Optional[TextIO] = None, slowest: int = 5):
+        self.command = command
+        self.stream = stream
+        self.slowest = slowest
+        self.records: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if self.stream is None:
+            return
+        payload = {"event": event, "command": self.command, "ts": round(time.time(), 3), **fields}
+        self.stream.write(json.dumps(payload, default=str) + "\n")
+        self.stream.flush()
+
+    def record(self, event: str, **fields: Any) -> None:
+        self.records.append(fields)
+        self.emit(event, **fields)
+
+    def summary(self) -> Dict[str, Any]:
+        wall_s = time.perf_counter() - self.started
+        records = self.records
+        inserted = sum(r.get("rows_inserted", 0) for r in records)
+        summary: Dict[str, Any] = {
+            "units": len(records),
+            "errors": sum(1 for r in records if r.get("error")),
+            "api_calls": sum(r.get("api_calls", 0) for r in records),
+            "rows_inserted": inserted,
+            "rows_skipped": sum(r.get("rows_skipped", 0) for r in records),
+            "wall_s": round(wall_s, 3),
+            "rows_per_s": round(inserted / wall_s, 3) if wall_s > 0 else None,
+        }
+        for metric in self.METRICS:
+            summary[metric] = distribution(r[metric] for r in records if r.get(metric) is not None)
+        slowest = sorted(records, key=lambda r: r.get("total_ms") or 0, reverse=True)[: self.slowest]
+        summary["slowest"] = [
+            {k: r.get(k) for k in ("unit", "name", "total_ms", "http_ms", "db_ms")} for r in slowest
+        ]
+        return summary
+
+    def finish(self) -> Dict[str, Any]:
+        summary = self.summary()
+        self.emit("run_summary", **summary)
+        return summary
+
+    @staticmethod
+    def format_summary(summary: Dict[str, Any], metric: str = "total_ms") -> str:
+        dist = summary[metric]
+        return (
+            f"{summary['units']} units, {summary['api_calls']} API calls, "
+            f"{summary['rows_inserted']} inserted / {summary['rows_skipped']} skipped in {summary['wall_s']}s; "
+            f"{metric} p50={dist['p50']} p95={dist['p95']} p99={dist['p99']}"
+        )
+
+
+def open_stream(path: Optional[str], stdout: TextIO) -> Optional[TextIO]:
+    """Resolve a `--telemetry-file` option: None, '-' (the command's stdout) or a file path (appended)."""
+    if not path:
+        return None
+    if path == "-":
+        return stdout
+    return open(path, "a", encoding="utf-8")
@@ -0,0 +1,83 @@
+import json
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """`assertQueryBudget(url, budget)`: GET `url` and fail if it runs more than `budget` SQL queries.
+
+    Unlike `assertNumQueries`, a budget is an upper bound, and the failure
+    message lists the statements so an N+1 is obvious at a glance. Budgets
+    should hold however many rows the endpoint returns; seed more than one
+    page of data to catch per-row queries.
+    """
+
+    def assertQueryBudget(self, url, budget, data=None, status_code=200):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status_code, f"GET {url}")
+        if len(captured) > budget:
+            statements = "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(captured.captured_queries, start=1))
+            self.fail(f"GET {url} ran {len(captured)} queries, budget is {budget}:\n{statements}")
+        return response
+
+
+def seq_scans(queryset):
+    """`(plan text, tables read by a full sequential scan)` for `queryset`.
+
+    Postgres: `Seq Scan` nodes of the JSON plan. SQLite: `SCAN <table>` steps
+    of `EXPLAIN QUERY PLAN` that use no index (`SCAN ... USING INDEX` walks an
+    index in order and is fine).
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        plan = queryset.explain(format="json")
+        tables, nodes = [], [step["Plan"] for step in json.loads(plan)]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                tables.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return plan, tables
+    plan = queryset.explain()
+    tables = []
+    for line in plan.splitlines():
+        detail = line.split(maxsplit=3)[-1]
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            tables.append(detail.split()[1])
+    return plan, tables
+
+
+def table_rows(table, using="default"):
+    """Row count (planner estimate on Postgres); None when `table` isn't a table, e.g. a subquery alias."""
+    conn = connections[using]
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s AND relkind = 'r'", [table])
+            row = cursor.fetchone()
+            return row[0] if row else None
+        if table not in conn.introspection.table_names(cursor):
+            return None
+        cursor.execute(f"SELECT COUNT(*) FROM {conn.ops.quote_name(table)}")
+        return cursor.fetchone()[0]
+
+
+class QueryPlanMixin:
+    """`assertNoSeqScan(queryset)`: fail if the plan reads a large table with a sequential scan.
+
+    Tables up to `QUERY_PLAN_MAX_SEQ_SCAN_ROWS` rows may be scanned (the
+    planner rightly prefers that for small tables); unknown relations count
+    as large. Seed above the limit and `ANALYZE` first so the planner sees
+    realistic sizes.
+    """
+
+    def assertNoSeqScan(self, queryset, max_rows=None):
+        limit = settings.QUERY_PLAN_MAX_SEQ_SCAN_ROWS if max_rows is None else max_rows
+        plan, tables = seq_scans(queryset)
+        sizes = [(table, table_rows(table, queryset.db)) for table in tables]
+        large = [(table, rows) for table, rows in sizes if rows is None or rows > limit]
+        if large:
+            scanned = ", ".join(f"{table} ({'?' if rows is None else rows} rows)" for table, rows in large)
+            self.fail(f"Sequential scan of {scanned}, limit {limit} rows:\n{queryset.query}\n{plan}")
@@ -1,7 +1,24 @@
+import json
+import sqlite3
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
 from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
-from menus.models import Place, PlaceRecommendation, Review
+from menus import metrics, routers, throttling
+from menus.embeddings import pack_vector
+from menus.localstore import LocalStore
+from menus.models import Place, PlaceRecommendation, Review, ReviewEmbedding
+from menus.semantic import build_index
+from menus.tests.helpers import QueryBudgetMixin
 
 
 class PlaceAPITests(APITestCase):
@@ -220,3 +237,395 @@ class PlaceAPITests(APITestCase):
         data = resp.json()
         self.assertIn('results', data)
         self.assertEqual(data['results'], [])
+
+    def test_search_reviews_collapse_hides_near_duplicates(self):
+        original = Review.objects.create(
+            place=self.place,
+            google_review_id="rev-9",
+            author_name="Alice",
+            rating=5,
+            text="Best latte in town, hands down.",
+            language="en",
+            created_at=timezone.now(),
+        )
+        Review.objects.create(
+            place=self.place,
+            google_review_id="rev-9-rotated",
+            author_name="Alice",
+            rating=5,
+            text="Best latte in town, hands down!",
+            language="en",
+            created_at=timezone.now(),
+            duplicate_of=original,
+        )
+        url = reverse('menus:review-search-list')
+        self.assertEqual(len(self.client.get(url, {"q": "latte"}).json()['results']), 2)
+        data = self.client.get(url, {"q": "latte", "collapse": "1"}).json()
+        self.assertEqual([r['id'] for r in data['results']], [original.id])
+
+
+    def test_search_reviews_by_indexed_item(self):
+        place = Place.objects.create(name="Item Place", google_place_id="item-1")
+        for i, text in enumerate(["Breakfast burritos are huge", "The burrito bowl is fine", "Coffee only"]):
+            Review.objects.create(place=place, google_review_id=f"item-r{i}", rating=5, text=text, created_at=timezone.now())
+        call_command("extract_mentions", stdout=StringIO())
+
+        resp = self.client.get(reverse('menus:review-search-list'), {'item': 'burritos'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([r['text'] for r in resp.json()['results']], ["The burrito bowl is fine"])
+
+        resp = self.client.get(reverse('menus:review-search-list'), {'item': 'breakfast burrito', 'q': 'huge'})
+        self.assertEqual([r['text'] for r in resp.json()['results']], ["Breakfast burritos are huge"])
+
+
+    def test_place_items_reads_materialized_summaries(self):
+        place = Place.objects.create(name="Summary Place", google_place_id="sum-1")
+        for i, (rating, text) in enumerate([(5, "Best tacos and a latte"), (3, "Tacos were cold")]):
+            Review.objects.create(place=place, google_review_id=f"sum-r{i}", rating=rating, text=text, created_at=timezone.now())
+        call_command("extract_mentions", stdout=StringIO())
+
+        url = reverse('menus:place-items', args=[place.id])
+        with self.assertNumQueries(2):  # page count + one indexed read
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()['results']
+        self.assertEqual([(r['term'], r['mention_count'], r['mean_rating']) for r in results], [("taco", 2, 4.0), ("latte", 1, 5.0)])
+
+    def test_place_items_404_for_unknown_place(self):
+        place = Place.objects.create(name="No Mentions Yet", google_place_id="sum-2")
+        resp = self.client.get(reverse('menus:place-items', args=[place.id]))
+        self.assertEqual((resp.status_code, resp.json()['results']), (200, []))
+
+        missing = Place.objects.order_by('-id').values_list('id', flat=True).first() + 1
+        self.assertEqual(self.client.get(reverse('menus:place-items', args=[missing])).status_code, 404)
+        self.assertEqual(self.client.get('/api/places/abc/items/').status_code, 404)
+
+
+    def test_item_places_ranked_by_shrunk_score(self):
+        lucky = Place.objects.create(name="One Hit", google_place_id="rank-1")
+        steady = Place.objects.create(name="Steady", google_place_id="rank-2")
+        meh = Place.objects.create(name="Meh", google_place_id="rank-3")
+        Review.objects.create(place=lucky, google_review_id="rank-r0", rating=5, text="Burrito!", created_at=timezone.now())
+        for i, rating in enumerate([5, 4, 5, 4, 5, 5]):
+            Review.objects.create(
+                place=steady, google_review_id=f"rank-r{i + 1}", rating=rating, text="The burritos here", created_at=timezone.now()
+            )
+        for i in range(4):
+            Review.objects.create(place=meh, google_review_id=f"rank-m{i}", rating=3, text="Soggy burrito", created_at=timezone.now())
+        call_command("extract_mentions", stdout=StringIO())
+
+        url = reverse('menus:item-places', args=['burritos'])
+        with self.assertNumQueries(1):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['item'], "burrito")
+        # A perfect single mention is shrunk toward the item mean (~4.1) and loses to a steady 4.7.
+        self.assertEqual(
+            [(r['rank'], r['place_name'], r['mention_count']) for r in data['results']],
+            [(1, "Steady", 6), (2, "One Hit", 1), (3, "Meh", 4)],
+        )
+
+        self.assertEqual(self.client.get(reverse('menus:item-places', args=['tiramisu'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('menus:item-places', args=['pizza'])).json()['results'], [])
+
+
+class SemanticSearchAPITests(APITestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(SEMANTIC_INDEX_DIR=tmp.name + "/index")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.cafe = Place.objects.create(name="Cafe", google_place_id="sem-1")
+        self.diner = Place.objects.create(name="Diner", google_place_id="sem-2")
+        vectors = {
+            (self.cafe, "The latte was silky"): [1.0, 0.1, 0.0],
+            (self.cafe, "Friendly staff"): [0.0, 1.0, 0.0],
+            (self.diner, "Great espresso drinks"): [0.9, 0.0, 0.3],
+            (self.diner, "Pancakes all day"): [0.0, 0.2, 1.0],
+        }
+        for i, ((place, text), vec) in enumerate(vectors.items()):
+            review = Review.objects.create(
+                place=place, google_review_id=f"sem-r{i}", rating=5, text=text, created_at=timezone.now()
+            )
+            ReviewEmbedding.objects.create(
+                review=review, model_name="fake-model", content_hash="x", dim=3, vector=pack_vector(np.array(vec))
+            )
+        self.url = reverse('menus:semantic-search-list')
+
+    def _search(self, **params):
+        with mock.patch("menus.semantic.embed_query", return_value=np.array([2.0, 0.0, 0.0])):
+            return self.client.get(self.url, params)
+
+    def test_ranks_reviews_by_cosine_similarity(self):
+        build_index("fake-model")
+        with self.assertNumQueries(1):
+            resp = self._search(q="espresso drink", k=2)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data['model'], "fake-model")
+        self.assertEqual([r['text'] for r in data['results']], ["The latte was silky", "Great espresso drinks"])
+        self.assertGreater(data['results'][0]['score'], data['results'][1]['score'])
+
+    def test_scopes_to_places(self):
+        build_index("fake-model")
+        resp = self._search(q="espresso drink", place=self.diner.id)
+        self.assertEqual([r['place_name'] for r in resp.json()['results']], ["Diner", "Diner"])
+
+    def test_unavailable_without_index(self):
+        self.assertEqual(self._search(q="latte").status_code, 503)
+        self.assertEqual(self._search().status_code, 400)
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    # Upper bounds per endpoint, independent of how many rows a page holds.
+    BUDGETS = {
+        'places': 2,  # count + page (review counts are a correlated subquery)
+        'place_detail': 1,
+        'place_items': 2,
+        'review_search': 3,  # exists() probe for the fuzzy fallback + count + page
+        'review_search_item': 2,
+        'item_places': 1,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        # More places than fit on one page, so a per-row query would blow every budget.
+        for i in range(25):
+            place = Place.objects.create(name=f"Budget Place {i}", google_place_id=f"budget-{i}")
+            for j in range(2):
+                Review.objects.create(
+                    place=place, google_review_id=f"budget-{i}-{j}", rating=4, text="Great latte and tacos",
+                    created_at=timezone.now(),
+                )
+        call_command("extract_mentions", stdout=StringIO())
+        cls.place = place
+
+    def test_endpoints_stay_within_query_budgets(self):
+        resp = self.assertQueryBudget(reverse('menus:place-list'), self.BUDGETS['places'])
+        self.assertEqual({r['review_count'] for r in resp.json()['results']}, {2})
+        self.assertQueryBudget(reverse('menus:place-detail', args=[self.place.id]), self.BUDGETS['place_detail'])
+        self.assertQueryBudget(reverse('menus:place-items', args=[self.place.id]), self.BUDGETS['place_items'])
+        self.assertQueryBudget(reverse('menus:review-search-list'), self.BUDGETS['review_search'], {'q': 'latte'})
+        self.assertQueryBudget(reverse('menus:review-search-list'), self.BUDGETS['review_search_item'], {'item': 'taco'})
+        self.assertQueryBudget(reverse('menus:item-places', args=['latte']), self.BUDGETS['item_places'])
+
+    def test_budget_failure_lists_the_queries(self):
+        with self.assertRaisesMessage(AssertionError, "ran 2 queries, budget is 1:\n  1. SELECT"):
+            self.assertQueryBudget(reverse('menus:place-list'), 1)
+
+
+class RequestMetricsTests(APITestCase):
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    def test_sampled_request_gets_server_timing_and_log_line(self):
+        place = Place.objects.create(name="Timed Place", google_place_id="timed-1")
+        with self.assertLogs('menus.requests', 'INFO') as logs:
+            resp = self.client.get(reverse('menus:place-detail', args=[place.id]))
+        timing = resp['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="1 queries"', timing)
+        for metric in ('serializer;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['path'], record['status'], record['queries']), (f"/api/places/{place.id}/", 200, 1))
+        self.assertGreater(record['serializer_ms'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['view_ms'])
+        self.assertGreaterEqual(record['view_ms'], record['db_ms'])
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_header_is_opt_in_but_the_log_line_is_kept(self):
+        with self.assertLogs('menus.requests', 'INFO') as logs:
+            resp = self.client.get(reverse('menus:place-list'))
+        self.assertNotIn('Server-Timing', resp)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['path'], '/api/places/')
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_not_instrumented(self):
+        resp = self.client.get(reverse('menus:place-list'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Server-Timing', resp)
+        self.assertFalse(hasattr(resp.wsgi_request, 'metrics'))
+
+
+class MetricsEndpointTests(APITestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = str(Path(tmp.name) / "store.sqlite3")
+        settings_override = override_settings(LOCAL_STORE_PATH=self.store, METRICS_FLUSH_SECONDS=3600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        place = Place.objects.create(name="Metric Place", google_place_id="metric-1")
+        Review.objects.create(place=place, google_review_id="metric-r1", rating=5, text="Great latte", created_at=timezone.now())
+
+    def _scrape(self):
+        admin = User.objects.create_superuser("metrics-admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        resp = self.client.get(reverse('internal-metrics'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain'))
+        return resp.content.decode()
+
+    def test_requires_admin(self):
+        self.assertIn(self.client.get(reverse('internal-metrics')).status_code, (401, 403))
+
+    def test_exposes_latency_status_search_and_throttle_series(self):
+        search = reverse('menus:review-search-list')
+        self.client.get(reverse('menus:place-list'))
+        self.client.get(search, {'q': 'latte'})
+        self.client.get(search, {'q': 'lattte'})
+        with mock.patch('menus.throttling.AnonTokenBucketThrottle.allow_request', return_value=False), \
+                mock.patch('menus.throttling.AnonTokenBucketThrottle.wait', return_value=None):
+            self.assertEqual(self.client.get(search, {'q': 'latte'}).status_code, 429)
+
+        text = self._scrape()
+        self.assertIn('revove_http_requests_total{method="GET",status="200",view="menus:place-list"} 1', text)
+        self.assertIn('revove_http_requests_total{method="GET",status="429",view="menus:review-search-list"} 1', text)
+        self.assertIn('revove_http_throttled_requests_total{view="menus:review-search-list"} 1', text)
+        self.assertIn('revove_search_requests_total{mode="exact"} 1', text)
+        self.assertIn('revove_search_requests_total{mode="fuzzy"} 1', text)
+        self.assertIn('revove_http_request_duration_seconds_bucket{view="menus:place-list",le="+Inf"} 1', text)
+        self.assertIn('revove_http_request_duration_seconds_count{view="menus:review-search-list"} 3', text)
+        # One result on the page: counted in the le="1" bucket and every bucket above it.
+        self.assertIn('revove_http_response_items_bucket{view="menus:place-list",le="0.0"} 0', text)
+        self.assertIn('revove_http_response_items_bucket{view="menus:place-list",le="1.0"} 1', text)
+        self.assertIn('# TYPE revove_http_request_duration_seconds histogram', text)
+
+    def test_unwritable_store_keeps_deltas_and_never_fails_requests(self):
+        blocker = Path(self.store).with_name("not-a-dir")
+        blocker.write_text("")
+        bad_path = str(blocker / "store.sqlite3")  # parent is a file: mkdir raises
+        registry = metrics.MetricsRegistry(LocalStore(bad_path, metrics.SCHEMA), flush_seconds=0)
+        with self.assertLogs('menus.metrics', level='WARNING'):
+            registry.inc('cache_requests_total', cache='place_names', result='hit')
+            registry.inc('cache_requests_total', cache='place_names', result='hit')
+        registry.store = LocalStore(self.store, metrics.SCHEMA)
+        self.assertIn('revove_cache_requests_total{cache="place_names",result="hit"} 2', registry.render())
+
+        with override_settings(LOCAL_STORE_PATH=bad_path, METRICS_FLUSH_SECONDS=0), \
+                self.assertLogs('menus.metrics', level='WARNING'):
+            # MetricsMiddleware records (and tries to flush) the scrape itself.
+            metrics.inc('cache_requests_total', cache='place_names', result='miss')
+            admin = User.objects.create_superuser("metrics-admin", "admin@example.com", "pw")
+            self.client.force_login(admin)
+            self.assertEqual(self.client.get(reverse('internal-metrics')).status_code, 503)
+
+    def test_workers_aggregate_through_the_shared_store(self):
+        workers = [metrics.MetricsRegistry(LocalStore(self.store, metrics.SCHEMA)) for _ in range(2)]
+        for worker in workers:
+            worker.inc('cache_requests_total', cache='semantic_index', result='hit')
+            worker.observe('http_request_duration_seconds', 0.02, view='v')
+        workers[0].flush()
+        text = workers[1].render()
+        self.assertIn('revove_cache_requests_total{cache="semantic_index",result="hit"} 2', text)
+        self.assertIn('revove_http_request_duration_seconds_bucket{view="v",le="0.01"} 0', text)
+        self.assertIn('revove_http_request_duration_seconds_bucket{view="v",le="0.025"} 2', text)
+        self.assertIn('revove_http_request_duration_seconds_sum{view="v"} 0.04', text)
+
+
+class TokenBucketThrottleTests(APITestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = str(Path(tmp.name) / "store.sqlite3")
+        settings_override = override_settings(LOCAL_STORE_PATH=self.store)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        clock = mock.patch('menus.throttling.time.time', return_value=1_000_000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_workers_share_one_bucket_that_refills(self):
+        workers = [throttling.TokenBucketStore(self.store) for _ in range(2)]
+        capacity, rate = 3.0, 3 / 3600
+        self.assertEqual(workers[0].consume('client', capacity, rate), (True, None))
+        self.assertEqual(workers[1].consume('client', capacity, rate), (True, None))
+        self.assertEqual(workers[0].consume('client', capacity, rate), (True, None))
+        allowed, wait = workers[1].consume('client', capacity, rate)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1200.0)
+        self.assertTrue(workers[0].consume('other-client', capacity, rate)[0])
+
+        self.clock.return_value += 1200
+        self.assertEqual(workers[1].consume('client', capacity, rate), (True, None))
+        self.assertFalse(workers[0].consume('client', capacity, rate)[0])
+
+    def test_fast_rates_lease_tokens_in_batches(self):
+        worker = throttling.TokenBucketStore(self.store)
+        for _ in range(throttling.MAX_LEASE):
+            self.assertTrue(worker.consume('client', 100.0, 100.0)[0])
+        conn = LocalStore(self.store).connect()
+        self.assertEqual(conn.execute("SELECT tokens FROM throttle_buckets WHERE key = 'client'").fetchone()[0], 90.0)
+        self.assertTrue(worker.consume('client', 100.0, 100.0)[0])
+        self.assertEqual(conn.execute("SELECT tokens FROM throttle_buckets WHERE key = 'client'").fetchone()[0], 80.0)
+
+    def test_api_returns_429_with_retry_after(self):
+        rates = {'anon': '2/hour', 'user': '1000/hour'}
+        with mock.patch.object(throttling.AnonTokenBucketThrottle, 'THROTTLE_RATES', rates):
+            url = reverse('menus:place-list')
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 429)
+            self.assertEqual(resp['Retry-After'], '1800')
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_store_errors_allow_the_request(self):
+        with mock.patch.object(throttling.TokenBucketStore, '_take', side_effect=sqlite3.OperationalError('locked')):
+            with self.assertLogs('menus.throttling', level='WARNING'):
+                self.assertEqual(self.client.get(reverse('menus:place-list')).status_code, 200)
+
+    def test_unwritable_store_allows_the_request(self):
+        blocker = Path(self.store).with_name("not-a-dir")
+        blocker.write_text("")
+        # Parent "directory" is a file, as on a read-only image: creating the store raises OSError.
+        with override_settings(LOCAL_STORE_PATH=str(blocker / "store.sqlite3")), \
+                self.assertLogs('menus.throttling', level='WARNING'):
+            self.assertEqual(self.client.get(reverse('menus:place-list')).status_code, 200)
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='replica', REPLICA_LAG_CHECK_SECONDS=0)
+class ReplicaRoutingTests(TransactionTestCase):
+    # Two real databases; TransactionTestCase because the router keeps reads on the primary
+    # inside an open transaction, which TestCase would hold for the whole test.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        routers.health.reset()
+        Place.objects.create(name="Primary copy", google_place_id="route-1")
+        Place.objects.using('replica').create(name="Replica copy", google_place_id="route-1")
+
+    def _listed_names(self):
+        return [p['name'] for p in self.client.get(reverse('menus:place-list')).json()['results']]
+
+    def test_public_reads_use_the_replica_and_everything_else_the_primary(self):
+        self.assertEqual(self._listed_names(), ["Replica copy"])
+        resp = self.client.get(reverse('menus:review-search-list'), {'place_name': 'Replica', 'q': 'x'})
+        self.assertEqual(resp.status_code, 200)
+        # Outside the viewsets (commands, admin, workers) reads and writes stay on the primary.
+        self.assertEqual(Place.objects.get().name, "Primary copy")
+        with routers.use_replica():
+            place = Place.objects.get()
+            self.assertEqual(place.name, "Replica copy")
+            place.save()
+        self.assertEqual(Place.objects.using('replica').count(), 1)
+        self.assertEqual(Place.objects.count(), 1)
+        self.assertEqual(Place.objects.get().name, "Replica copy")  # the write went to the primary row
+
+    def test_lagging_or_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch('menus.routers.measure_lag', return_value=60.0), self.assertLogs('menus.routers', 'WARNING') as logs:
+            self.assertEqual(self._listed_names(), ["Primary copy"])
+        self.assertIn("60.0s behind", logs.output[0])
+        with mock.patch('menus.routers.measure_lag', side_effect=OperationalError("connection refused")), \
+                self.assertLogs('menus.routers', 'WARNING') as logs:
+            self.assertEqual(self._listed_names(), ["Primary copy"])
+        self.assertIn("unreachable", logs.output[0])
+        with mock.patch('menus.routers.measure_lag', return_value=1.0):
+            self.assertEqual(self._listed_names(), ["Replica copy"])
+
+    @override_settings(REPLICA_DATABASE_ALIAS=None)
+    def test_without_replica_everything_uses_the_primary(self):
+        self.assertEqual(self._listed_names(), ["Primary copy"])
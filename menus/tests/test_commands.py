@@ -0,0 +1,496 @@
+import importlib
+import json
+import random
+import tempfile
+import threading
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from menus import dedup, jobs, mentions, places, summaries, warmup
+from menus.classification import default_classifier
+from menus.management.commands.benchmark_api import Command as BenchmarkCommand
+from menus.management.commands.run_workers import Command as RunWorkersCommand
+from menus.management.commands.sync_google_reviews import Command as SyncCommand
+from menus.models import ItemPlaceScore, Job, MenuItem, MenuItemMention, Place, PlaceItemSummary, Review, SyncCheckpoint, SyncRun
+
+
+def _fake_response(payload, status_code=200):
+    resp = mock.Mock()
+    resp.status_code = status_code
+    resp.json.return_value = payload
+    resp.content = json.dumps(payload).encode()
+    return resp
+
+
+def _details(review_id):
+    return {
+        "displayName": {"text": "Synced Place"},
+        "rating": 4.5,
+        "userRatingCount": 10,
+        "reviews": [
+            {
+                "name": review_id,
+                "rating": 5,
+                "text": {"text": "Great latte"},
+                "publishTime": "2025-01-01T00:00:00Z",
+                "authorAttribution": {"displayName": "Alice"},
+            }
+        ],
+    }
+
+
+@mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+class SyncGoogleReviewsCommandTests(TestCase):
+    def setUp(self):
+        self.first = Place.objects.create(name="First", google_place_id="g-1")
+        self.second = Place.objects.create(name="Second", google_place_id="g-2")
+
+    def _sync(self, *args):
+        call_command("sync_google_reviews", "--backoff-base", "0", *args, stdout=StringIO())
+
+    def test_failed_place_is_checkpointed_and_resumed(self):
+        unavailable = _fake_response({"error": {"code": 503, "message": "busy", "status": "UNAVAILABLE"}}, 503)
+        with mock.patch("requests.get", side_effect=[_fake_response(_details("r-1")), unavailable, unavailable]):
+            self._sync("--max-attempts", "2")
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.STATUS_FAILED)
+        failed = run.checkpoints.get(place=self.second)
+        self.assertEqual(failed.status, SyncCheckpoint.STATUS_FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn("busy", failed.last_error)
+
+        with mock.patch("requests.get", return_value=_fake_response(_details("r-2"))) as get:
+            self._sync("--resume")
+
+        # Only the failed place is fetched again.
+        self.assertEqual(get.call_count, 1)
+        self.assertIn("g-2", get.call_args.args[0])
+        run.refresh_from_db()
+        self.assertEqual(run.status, SyncRun.STATUS_COMPLETED)
+        self.assertEqual(run.checkpoints.get(place=self.second).attempts, 3)
+        self.assertEqual(Review.objects.count(), 2)
+
+    def test_non_retryable_error_fails_fast(self):
+        not_found = _fake_response({"error": {"code": 404, "message": "gone", "status": "NOT_FOUND"}}, 404)
+        with mock.patch("requests.get", side_effect=[not_found, _fake_response(_details("r-3"))]) as get:
+            self._sync("--max-attempts", "3")
+
+        self.assertEqual(get.call_count, 2)
+        checkpoint = SyncCheckpoint.objects.get(place=self.first)
+        self.assertEqual(checkpoint.attempts, 1)
+        self.assertEqual(checkpoint.status, SyncCheckpoint.STATUS_FAILED)
+
+    def test_telemetry_events_and_summary(self):
+        out = StringIO()
+        with mock.patch("requests.get", side_effect=[_fake_response(_details("r-4")), _fake_response(_details("r-4"))]):
+            call_command("sync_google_reviews", "--telemetry-file", "-", stdout=out)
+
+        events = [json.loads(line) for line in out.getvalue().splitlines() if line.startswith("{")]
+        places = [e for e in events if e["event"] == "place_synced"]
+        self.assertEqual([e["unit"] for e in places], [self.first.id, self.second.id])
+        self.assertEqual(places[0]["rows_inserted"], 1)
+        self.assertEqual(places[1]["rows_skipped"], 1)
+        self.assertGreater(places[0]["response_bytes"], 0)
+
+        summary = events[-1]
+        self.assertEqual(summary["event"], "run_summary")
+        self.assertEqual(summary["api_calls"], 2)
+        self.assertEqual(summary["rows_inserted"], 1)
+        self.assertEqual(set(summary["total_ms"]), {"p50", "p95", "p99", "max", "total"})
+        self.assertEqual(len(summary["slowest"]), 2)
+
+
+class JobQueueTests(TestCase):
+    def test_claim_is_exclusive_and_ordered(self):
+        low = jobs.enqueue(Job.KIND_SYNC_PLACE, {"place_id": 1}, priority=5)
+        high = jobs.enqueue(Job.KIND_SYNC_PLACE, {"place_id": 2}, priority=0)
+
+        first = jobs.claim_job("w1")
+        second = jobs.claim_job("w2")
+        self.assertEqual((first.pk, second.pk), (high.pk, low.pk))
+        self.assertIsNone(jobs.claim_job("w3"))
+
+        high.refresh_from_db()
+        self.assertEqual(high.status, Job.STATUS_RUNNING)
+        self.assertEqual(high.locked_by, "w1")
+        self.assertEqual(high.attempts, 1)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = jobs.enqueue(Job.KIND_DISCOVER_TILE, max_attempts=2)
+        handler = mock.Mock(side_effect=RuntimeError("quota exceeded"))
+        with mock.patch.dict(jobs.HANDLERS, {Job.KIND_DISCOVER_TILE: handler}):
+            self.assertFalse(jobs.run_job(jobs.claim_job("w1")))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.STATUS_PENDING, 1))
+            self.assertIn("quota exceeded", job.last_error)
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            self.assertFalse(jobs.run_job(jobs.claim_job("w1")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
+        self.assertEqual(handler.call_count, 2)
+
+    def test_retried_job_can_succeed(self):
+        job = jobs.enqueue(Job.KIND_DISCOVER_TILE, max_attempts=3)
+        handler = mock.Mock(side_effect=[RuntimeError("timeout"), None])
+        with mock.patch.dict(jobs.HANDLERS, {Job.KIND_DISCOVER_TILE: handler}):
+            self.assertFalse(jobs.run_job(jobs.claim_job("w1")))
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            self.assertTrue(jobs.run_job(jobs.claim_job("w1")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.STATUS_DONE, 2, ""))
+
+    def test_unknown_kind_is_not_retried(self):
+        job = jobs.enqueue("bogus-kind", max_attempts=2)
+        claimed = jobs.claim_job("w1")
+        self.assertFalse(jobs.run_job(claimed))
+        job.refresh_from_db()
+        # Unknown kinds are not retryable.
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIn("Unknown job kind", job.last_error)
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        retry = jobs.enqueue(Job.KIND_SYNC_PLACE, {"place_id": 1}, max_attempts=3)
+        last = jobs.enqueue(Job.KIND_SYNC_PLACE, {"place_id": 2}, max_attempts=1)
+        fresh = jobs.enqueue(Job.KIND_SYNC_PLACE, {"place_id": 3})
+        for _ in range(3):
+            jobs.claim_job("w1")
+        Job.objects.exclude(pk=fresh.pk).update(locked_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(jobs.requeue_stale(timedelta(hours=1)), (1, 1))
+        statuses = dict(Job.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[retry.pk], Job.STATUS_PENDING)
+        self.assertEqual(statuses[last.pk], Job.STATUS_FAILED)
+        self.assertEqual(statuses[fresh.pk], Job.STATUS_RUNNING)
+        self.assertIn("Worker died", Job.objects.get(pk=last.pk).last_error)
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_worker_runs_sync_place_jobs(self):
+        place = Place.objects.create(name="Queued", google_place_id="g-q")
+        call_command("enqueue_jobs", "sync", stdout=StringIO())
+        worker = RunWorkersCommand(stdout=StringIO())
+        worker.stats, worker._lock = Counter(), threading.Lock()
+        options = {"kinds": None, "burst": True, "poll_interval": 0}
+        with mock.patch("requests.get", return_value=_fake_response(_details("r-q"))), \
+                mock.patch("menus.management.commands.run_workers.connection"):
+            worker._worker_loop(options, threading.Event())
+
+        self.assertEqual(worker.stats["done"], 1)
+        self.assertEqual(Job.objects.get().status, Job.STATUS_DONE)
+        self.assertTrue(Review.objects.filter(place=place, google_review_id="r-q").exists())
+
+
+class PlaceClassificationTests(TestCase):
+    def test_classifier_matches_name_and_types(self):
+        self.assertEqual(default_classifier.exclusion_reason("Town & Country Market"), "name matches 'market'")
+        self.assertEqual(default_classifier.exclusion_reason("Corner Stop", ["gas_station", "food"]), "type gas_station")
+        self.assertIsNone(default_classifier.exclusion_reason("Jam!", ["restaurant"]))
+
+    def test_remove_grocery_stores_uses_sql_filter(self):
+        Place.objects.create(name="Safeway", google_place_id="g-s")
+        Place.objects.create(name="Corner Stop", google_place_id="g-c", primary_type="convenience_store")
+        keep = Place.objects.create(name="Jam!", google_place_id="g-j")
+
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("remove_grocery_stores", stdout=StringIO())
+        # All keyword/type matching happens in one filtered SELECT.
+        self.assertEqual(sum(1 for q in ctx.captured_queries if "LIKE" in q["sql"]), 1)
+        self.assertEqual(list(Place.objects.values_list("id", flat=True)), [keep.id])
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_sync_skips_excluded_place_without_api_call(self):
+        Place.objects.create(name="Safeway", google_place_id="g-s")
+        with mock.patch("requests.get") as get:
+            call_command("sync_google_reviews", stdout=StringIO())
+        get.assert_not_called()
+        self.assertEqual(SyncCheckpoint.objects.get().status, SyncCheckpoint.STATUS_DONE)
+
+
+class NearDuplicateReviewTests(TestCase):
+    TEXT = "The breakfast burrito was huge and the green chile salsa was fantastic, friendly staff too."
+
+    def test_simhash_tolerates_trivial_edits(self):
+        a = dedup.simhash(self.TEXT)
+        b = dedup.simhash(self.TEXT.replace("fantastic,", "fantastic!!") + " ")
+        c = dedup.simhash("Terrible coffee, burnt beans and the pastries were stale and dry.")
+        self.assertLessEqual(dedup.hamming(a, b), dedup.MAX_DISTANCE)
+        self.assertGreater(dedup.hamming(a, c), dedup.MAX_DISTANCE)
+        self.assertIsNone(dedup.simhash("Great food!"))
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_sync_links_rotated_duplicate(self):
+        place = Place.objects.create(name="Burrito Spot", google_place_id="g-b")
+        original = Review.objects.create(
+            place=place, google_review_id="old", rating=5, text=self.TEXT, created_at=timezone.now(),
+            **dedup.fingerprint_fields(self.TEXT),
+        )
+        payload = _details("places/g-b/reviews/new")
+        payload["reviews"][0]["text"]["text"] = self.TEXT.lower()
+        with mock.patch("requests.get", return_value=_fake_response(payload)):
+            call_command("sync_google_reviews", stdout=StringIO())
+
+        self.assertEqual(Review.objects.get(google_review_id="places/g-b/reviews/new").duplicate_of, original)
+
+
+class MenuItemMentionTests(TestCase):
+    def test_matcher_prefers_longest_match_and_handles_plurals(self):
+        matcher = mentions.MentionMatcher({"burrito": 1, "breakfast burrito": 2, "taco": 3})
+        text = "Breakfast Burritos were huge, tacos too."
+        found = matcher.find(text)
+        self.assertEqual([item for item, _, _ in found], [2, 3])
+        self.assertEqual([text[start:end] for _, start, end in found], ["Breakfast Burritos", "tacos"])
+
+    def test_discover_terms_counts_reviews_not_occurrences(self):
+        texts = ["The green chile burrito rules"] * 3 + ["green chile burrito green chile burrito", "red chile burrito"]
+        terms = dict(mentions.discover_terms(texts, min_count=4))
+        # "chile burrito" also appears on its own (in "red chile burrito"), so it is kept.
+        self.assertEqual(terms, {"chile burrito": 5, "green chile burrito": 4})
+        self.assertEqual(dict(mentions.discover_terms(texts[:4], min_count=4)), {"green chile burrito": 4})
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_sync_indexes_new_reviews_and_extract_is_incremental(self):
+        Place.objects.create(name="Coffee Spot", google_place_id="g-m")
+        with mock.patch("requests.get", return_value=_fake_response(_details("places/g-m/reviews/1"))):
+            call_command("sync_google_reviews", stdout=StringIO())
+        review = Review.objects.get(google_review_id="places/g-m/reviews/1")
+        self.assertIsNotNone(review.mentions_extracted_at)
+        self.assertEqual(list(review.mentions.values_list("item__term", flat=True)), ["latte"])
+
+        place = review.place
+        for i in range(3):
+            Review.objects.create(
+                place=place, google_review_id=f"m{i}", rating=4, text="Get the smoked brisket sandwich here",
+                created_at=timezone.now(),
+            )
+        out = StringIO()
+        call_command("extract_mentions", "--discover", stdout=out)
+        self.assertIn("+ smoked brisket sandwich (3 reviews)", out.getvalue())
+        self.assertIn("Indexed 3 review(s)", out.getvalue())
+        self.assertEqual(
+            MenuItemMention.objects.filter(item__term="smoked brisket sandwich").count(), 3
+        )
+        self.assertEqual(MenuItem.objects.get(term="smoked brisket sandwich").source, MenuItem.SOURCE_NGRAM)
+
+        out = StringIO()
+        call_command("extract_mentions", stdout=out)
+        self.assertIn("Indexed 0 review(s)", out.getvalue())
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_sync_reranks_items_once_per_run(self):
+        places = [Place.objects.create(name=f"Cafe {i}", google_place_id=f"g-rank-{i}") for i in range(3)]
+        responses = [_fake_response(_details(f"places/g-rank-{i}/reviews/1")) for i in range(3)]
+        latte = MenuItem.objects.get_or_create(term="latte", defaults={"name": "latte"})[0]
+        with mock.patch("requests.get", side_effect=responses), \
+                mock.patch("menus.management.commands.sync_google_reviews.refresh_item_scores",
+                           wraps=summaries.refresh_item_scores) as refresh:
+            call_command("sync_google_reviews", stdout=StringIO())
+        refresh.assert_called_once_with({latte.id})
+        self.assertEqual(
+            set(ItemPlaceScore.objects.filter(item=latte).values_list("place_id", flat=True)), {p.id for p in places}
+        )
+
+        # A queued single-place job re-ranks right away.
+        job_place = Place.objects.create(name="Cafe job", google_place_id="g-rank-job")
+        with mock.patch("requests.get", return_value=_fake_response(_details("places/g-rank-job/reviews/1"))):
+            SyncCommand(stdout=StringIO()).sync_place(job_place, "test-key")
+        self.assertTrue(ItemPlaceScore.objects.filter(item=latte, place=job_place).exists())
+
+    def test_discovered_term_replaces_shorter_mentions_in_indexed_reviews(self):
+        place = Place.objects.create(name="Burrito Stand", google_place_id="g-d")
+        for i in range(3):
+            Review.objects.create(
+                place=place, google_review_id=f"d{i}", rating=5, text="The smothered burrito and a latte",
+                created_at=timezone.now(),
+            )
+        call_command("extract_mentions", stdout=StringIO())
+        self.assertEqual(PlaceItemSummary.objects.get(place=place, item__term="burrito").mention_count, 3)
+
+        call_command("extract_mentions", "--discover", stdout=StringIO())
+        terms = sorted(MenuItemMention.objects.values_list("item__term", flat=True).distinct())
+        self.assertEqual(terms, ["latte", "smothered burrito"])
+        self.assertEqual(MenuItemMention.objects.count(), 6)
+        self.assertFalse(PlaceItemSummary.objects.filter(place=place, item__term="burrito").exists())
+        self.assertEqual(PlaceItemSummary.objects.get(place=place, item__term="smothered burrito").mention_count, 3)
+
+        # Same result as indexing from scratch with the grown lexicon.
+        before = sorted(MenuItemMention.objects.values_list("review_id", "item_id", "start", "end"))
+        call_command("extract_mentions", "--all", stdout=StringIO())
+        self.assertEqual(sorted(MenuItemMention.objects.values_list("review_id", "item_id", "start", "end")), before)
+
+    @mock.patch.dict("os.environ", {"GOOGLE_API_KEY": "test-key"})
+    def test_item_summaries_are_refreshed_incrementally(self):
+        place = Place.objects.create(name="Coffee Spot", google_place_id="g-s")
+        older = timezone.datetime(2024, 6, 1, tzinfo=timezone.get_current_timezone())
+        Review.objects.create(
+            place=place, google_review_id="s0", rating=3, text="Latte was ok, latte art was nice", created_at=older
+        )
+        call_command("extract_mentions", stdout=StringIO())
+        summary = PlaceItemSummary.objects.get(place=place, item__term="latte")
+        self.assertEqual((summary.mention_count, summary.mean_rating), (1, 3.0))
+
+        # The synced review (rating 5, "Great latte") only refreshes the pairs it touches.
+        other = PlaceItemSummary.objects.create(place=place, item=MenuItem.objects.get(term="taco"), mention_count=7)
+        with mock.patch("requests.get", return_value=_fake_response(_details("places/g-s/reviews/1"))):
+            call_command("sync_google_reviews", stdout=StringIO())
+        summary.refresh_from_db()
+        new_review = Review.objects.get(google_review_id="places/g-s/reviews/1")
+        self.assertEqual((summary.mention_count, summary.mean_rating), (2, 4.0))
+        self.assertEqual(summary.first_mentioned_at, older)
+        self.assertEqual(summary.last_mentioned_at, new_review.created_at)
+        self.assertEqual([s["review_id"] for s in summary.top_snippets], [new_review.id, Review.objects.get(google_review_id="s0").id])
+        self.assertEqual(summary.top_snippets[1]["start"], 0)
+        other.refresh_from_db()
+        self.assertEqual(other.mention_count, 7)
+
+    def test_refresh_reads_only_the_touched_pairs_and_rebuild_repairs_drift(self):
+        places = [Place.objects.create(name=f"Spot {i}", google_place_id=f"g-p{i}") for i in range(2)]
+        for i, place in enumerate(places):
+            Review.objects.create(
+                place=place, google_review_id=f"p{i}", rating=4, text="latte and a taco", created_at=timezone.now()
+            )
+        call_command("extract_mentions", stdout=StringIO())
+        latte, taco = MenuItem.objects.get(term="latte"), MenuItem.objects.get(term="taco")
+
+        # (spot 0, latte) and (spot 1, taco): the other two combinations' mentions aren't read.
+        with CaptureQueriesContext(connection) as captured:
+            summaries.refresh_summaries([(places[0].id, latte.id), (places[1].id, taco.id)])
+        select = next(q["sql"] for q in captured if "menus_menuitemmention" in q["sql"])
+        self.assertEqual(select.count("menus_menuitemmention\".\"item_id\" ="), 2)
+
+        PlaceItemSummary.objects.filter(place=places[0], item=latte).update(mention_count=9)
+        PlaceItemSummary.objects.filter(place=places[1], item=taco).delete()
+        out = StringIO()
+        call_command("refresh_item_scores", "--rebuild-summaries", stdout=out)
+        self.assertIn("Rebuilt 4 place/item summary row(s)", out.getvalue())
+        self.assertEqual(
+            sorted(PlaceItemSummary.objects.values_list("mention_count", flat=True)), [1, 1, 1, 1]
+        )
+
+
+class SyntheticBenchmarkTests(TestCase):
+    def test_generate_synthetic_data_bulk_inserts_and_clears(self):
+        call_command("generate_synthetic_data", "--places", "12", "--reviews-per-place", "5", "--batch-size", "20", stdout=StringIO())
+        places = Place.objects.filter(google_place_id__startswith="synthetic-0-")
+        self.assertEqual(places.count(), 12)
+        self.assertEqual(
+            sum(places.values_list("user_ratings_total", flat=True)), Review.objects.filter(place__in=places).count()
+        )
+        self.assertTrue(MenuItemMention.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", "--places", "1", stdout=StringIO())
+
+        call_command("generate_synthetic_data", "--clear", "--places", "0", stdout=StringIO())
+        self.assertFalse(Place.objects.exists())
+        self.assertFalse(Review.objects.exists())
+
+    def test_benchmark_samples_are_reproducible_per_seed(self):
+        call_command("generate_synthetic_data", "--places", "30", "--reviews-per-place", "1", "--skip-mentions", stdout=StringIO())
+        bench = BenchmarkCommand(stdout=StringIO())
+        first = bench._samples(random.Random(7))["place"]
+        self.assertEqual(bench._samples(random.Random(7))["place"], first)
+        self.assertNotEqual(bench._samples(random.Random(8))["place"], first)
+        self.assertEqual(sorted(first), list(Place.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_benchmark_api_reports_and_compares_with_baseline(self):
+        call_command("generate_synthetic_data", "--places", "15", "--reviews-per-place", "8", stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baseline.json"
+            args = ["benchmark_api", "--requests", "3", "--warmup", "0", "--baseline", str(baseline)]
+            out = StringIO()
+            call_command(*args, "--save-baseline", "--output", str(Path(tmp) / "run.json"), stdout=out)
+            stored = json.loads(baseline.read_text())["sqlite"]
+            self.assertEqual(set(stored["endpoints"]), {
+                "places_list", "places_ordered", "places_search", "place_detail", "place_items",
+                "reviews_search", "reviews_search_place", "reviews_by_item", "item_places",
+            })
+            self.assertEqual(stored["endpoints"]["item_places"]["max_queries"], 1)
+            self.assertEqual(sum(r["errors"] for r in stored["endpoints"].values()), 0)
+
+            # A baseline that issued fewer queries makes the current run a regression.
+            stored["endpoints"]["place_detail"]["max_queries"] = 0
+            baseline.write_text(json.dumps({"sqlite": stored}))
+            out = StringIO()
+            with self.assertRaisesMessage(CommandError, "place_detail"):
+                call_command(*args, "--endpoints", "place_detail", "--fail-on-regression", stdout=out)
+            self.assertIn("REGRESSION", out.getvalue())
+
+
+class WarmCachesTests(TestCase):
+    def setUp(self):
+        cache.delete(places.CACHE_KEY)
+        self.place = Place.objects.create(name="Wildrye Bakery", google_place_id="warm-1")
+        reviews = [
+            Review.objects.create(
+                place=self.place, google_review_id=f"warm-r{i}", rating=5, text=text, created_at=timezone.now()
+            )
+            for i, text in enumerate(["Best latte in town", "The latte and a croissant", "Good croissant"])
+        ]
+        mentions.index_mentions(reviews, mentions.build_matcher())
+
+    def test_warm_caches_reports_each_step(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(SEMANTIC_INDEX_DIR=str(Path(tmp) / "none")):
+            out = StringIO()
+            call_command("warm_caches", "--json", "--term", "Pancakes", stdout=out)
+        report = json.loads(out.getvalue())
+        steps = {step["step"]: step for step in report["steps"]}
+        self.assertEqual(list(steps), ["place_names", "place_list", "search_terms", "semantic_index"])
+        self.assertEqual(steps["place_names"]["detail"], "1 place(s)")
+        self.assertEqual(steps["search_terms"]["detail"], "3 term(s)")
+        self.assertTrue(steps["semantic_index"]["detail"].startswith("skipped"))
+        self.assertGreaterEqual(report["total_ms"], sum(step["ms"] for step in report["steps"]) - 1)
+        self.assertEqual(warmup.top_search_terms(5), ["croissant", "latte"])
+        self.assertEqual(cache.get(places.CACHE_KEY), [(self.place.id, "wildrye bakery")])
+
+    def test_place_names_cache_is_dropped_when_places_change(self):
+        self.assertEqual(places.match_place_ids("Wildrey Bakery"), [self.place.id])
+        with CaptureQueriesContext(connection) as captured:
+            places.place_names()
+        self.assertEqual(len(captured), 0)
+
+        other = Place.objects.create(name="Wildrye Bakehouse", google_place_id="warm-2")
+        self.assertIsNone(cache.get(places.CACHE_KEY))
+        self.assertIn(other.id, places.match_place_ids("Wildrye Bakehous"))
+        other.delete()
+        self.assertIsNone(cache.get(places.CACHE_KEY))
+
+    def test_opt_in_file_cache_reaches_other_processes(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp},
+        }):
+            # A worker's view of the same cache directory.
+            worker_cache = FileBasedCache(tmp, {})
+            call_command("warm_caches", "--skip-semantic", stdout=StringIO())
+            self.assertEqual(worker_cache.get(places.CACHE_KEY), [(self.place.id, "wildrye bakery")])
+
+            Place.objects.create(name="Synced Later", google_place_id="warm-3")
+            self.assertIsNone(worker_cache.get(places.CACHE_KEY))
+
+    def test_wsgi_boot_hook_closes_connections_before_fork(self):
+        import revove.wsgi
+
+        with override_settings(WARM_CACHES_ON_BOOT=True), \
+                mock.patch("menus.warmup.warm_on_boot") as warm_on_boot, \
+                mock.patch("django.db.connections.close_all") as close_all:
+            importlib.reload(revove.wsgi)
+        warm_on_boot.assert_called_once_with()
+        close_all.assert_called_once_with()
+
+    def test_boot_hook_logs_failures_instead_of_raising(self):
+        with mock.patch("menus.warmup.warm", side_effect=RuntimeError("db down")):
+            with self.assertLogs("menus.warmup", level="ERROR"):
+                warmup.warm_on_boot()
+        with self.assertLogs("menus.warmup", level="INFO") as logs:
+            warmup.warm_on_boot()
+        self.assertIn("Warmed caches in", logs.output[0])
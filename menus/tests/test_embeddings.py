@@ -0,0 +1,62 @@
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+from menus.embeddings import EmbeddingStore, mmr_order, pack_to_budget
+from menus.models import Place, Review, ReviewEmbedding
+
+
+class FakeEngine:
+    model_name = "fake-model"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts, batch_size=64):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0, 0.5] for t in texts], dtype=np.float32)
+
+
+class EmbeddingStoreTests(TestCase):
+    def setUp(self):
+        place = Place.objects.create(name="Embed Place", google_place_id="emb-1")
+        self.reviews = [
+            Review.objects.create(
+                place=place, google_review_id=f"emb-r{i}", rating=5, text=text, created_at=timezone.now()
+            )
+            for i, text in enumerate(["Great latte", "Cold brew was fine"])
+        ]
+
+    def test_only_new_or_changed_reviews_are_encoded(self):
+        engine = FakeEngine()
+        store = EmbeddingStore(engine)
+
+        first = store.vectors_for(self.reviews)
+        self.assertEqual(first.shape, (2, 3))
+        self.assertEqual(first.dtype, np.float32)
+        self.assertEqual(ReviewEmbedding.objects.count(), 2)
+
+        second = store.vectors_for(self.reviews)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(len(engine.calls), 1)
+
+        self.reviews[1].text = "Cold brew was excellent"
+        store.vectors_for(self.reviews)
+        self.assertEqual(engine.calls[-1], ["Cold brew was excellent"])
+        self.assertEqual((store.hits, store.encoded), (3, 3))
+        self.assertEqual(ReviewEmbedding.objects.count(), 2)
+
+
+class ReviewSelectionTests(TestCase):
+    def test_mmr_prefers_distinct_reviews_and_packing_respects_budget(self):
+        vectors = np.array(
+            [[1.0, 0.0, 0.0], [0.99, 0.05, 0.0], [0.98, 0.0, 0.05], [0.6, 0.8, 0.0], [0.0, 0.2, 1.0]], dtype=np.float32
+        )
+        # Pure centroid ranking keeps the near-identical cluster together ...
+        self.assertEqual(sorted(mmr_order(vectors, k=3, diversity=0.0)), [0, 1, 2])
+        # ... while MMR spreads the picks across distinct reviews.
+        picked = mmr_order(vectors, k=3, diversity=0.5)
+        self.assertIn(3, picked)
+        self.assertIn(4, picked)
+
+        texts = ["aaaa", "bbbbbbbbbbbb", "cc"]
+        self.assertEqual(pack_to_budget(texts, [0, 1, 2], budget=10, count_tokens=len), ["aaaa", "cc"])
@@ -0,0 +1,127 @@
+import gc
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import weakref
+from pathlib import Path
+from unittest import mock
+
+import requests
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+from menus.llm import CachedRunner, LLMCache, LlamaServerRunner
+
+# Stand-in for llama-server: answers /health and echoes prompts back.
+FAKE_SERVER = textwrap.dedent(
+    """\
+    #!{python}
+    import json, sys
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    port = int(sys.argv[sys.argv.index("--port") + 1])
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._reply({{"status": "ok"}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/tokenize":
+                return self._reply({{"tokens": body["content"].split()}})
+            prompt = body["messages"][0]["content"]
+            self._reply({{"choices": [{{"message": {{"content": " echo: " + prompt + " "}}}}]}})
+
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+    """
+)
+
+
+class LlamaServerRunnerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.server_bin = Path(tmp.name) / "llama-server"
+        self.server_bin.write_text(FAKE_SERVER.format(python=sys.executable))
+        os.chmod(self.server_bin, self.server_bin.stat().st_mode | stat.S_IEXEC)
+
+    def test_prompts_reuse_one_process_and_restart_after_crash(self):
+        runner = LlamaServerRunner(self.server_bin, Path("model.gguf"), startup_timeout=20)
+        self.addCleanup(runner.close)
+        runner.start()
+        pid = runner.process.pid
+
+        self.assertEqual(runner.run("hello"), "echo: hello")
+        self.assertEqual(runner.run("again"), "echo: again")
+        self.assertEqual(runner.process.pid, pid)
+
+        runner.process.kill()
+        runner.process.wait()
+        self.assertEqual(runner.run("after crash"), "echo: after crash")
+        self.assertNotEqual(runner.process.pid, pid)
+        self.assertEqual(runner.restarts, 1)
+
+    def test_count_tokens_starts_the_server_for_an_exact_count(self):
+        runner = LlamaServerRunner(self.server_bin, Path("model.gguf"), startup_timeout=20)
+        self.addCleanup(runner.close)
+        self.assertEqual(runner.count_tokens("one two three four five"), 5)
+        self.assertIsNotNone(runner.process)
+
+    def test_failed_retry_after_restart_raises_command_error(self):
+        runner = LlamaServerRunner(self.server_bin, Path("model.gguf"), startup_timeout=20)
+        self.addCleanup(runner.close)
+        runner.start()
+        with mock.patch.object(runner, "_restart_if_down"), mock.patch.object(
+            requests.Session, "post", side_effect=requests.ConnectionError("refused")
+        ):
+            with self.assertRaisesMessage(CommandError, "failed after restart"):
+                runner.run("hello")
+
+    def test_closed_runners_are_not_kept_alive_for_exit_cleanup(self):
+        runner = LlamaServerRunner(self.server_bin, Path("model.gguf"), startup_timeout=20)
+        runner.start()
+        runner.close()
+        ref = weakref.ref(runner)
+        del runner
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+class LLMCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def test_key_covers_model_and_settings_and_lru_entries_are_evicted(self):
+        cache = LLMCache(self.dir / "cache.sqlite3", max_bytes=350)
+        self.addCleanup(cache.close)
+
+        class Runner:
+            model_path, temperature, max_tokens = self.dir / "a.gguf", 0.2, 512
+
+        runner = CachedRunner(Runner(), cache)
+        other = Runner()
+        other.temperature = 0.6
+        self.assertNotEqual(runner.key("p"), CachedRunner(other, cache).key("p"))
+
+        for i in range(3):
+            cache.put(f"k{i}", "x" * 100)
+        # k0 was used most recently, so k1 (the least recently used) goes first.
+        cache.get("k0")
+        cache.put("k3", "x" * 100)
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.get("k0"), "x" * 100)
+        self.assertEqual(cache.entries(), 3)
+        self.assertEqual(cache.evicted, 1)
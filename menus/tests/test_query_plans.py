@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from menus.models import Place, Review
+from menus.tests.helpers import QueryPlanMixin
+from menus.views import PlaceViewSet
+
+PAGE = 20
+
+
+class HotQueryPlanTests(QueryPlanMixin, TestCase):
+    """EXPLAIN the API's hot queries (as the viewsets build them) against more rows than
+    QUERY_PLAN_MAX_SEQ_SCAN_ROWS. Runs on SQLite locally; point DATABASE_URL at Postgres
+    (e.g. in CI) to check the plans production will use."""
+
+    @classmethod
+    def setUpTestData(cls):
+        places = settings.QUERY_PLAN_MAX_SEQ_SCAN_ROWS + 200
+        call_command(
+            "generate_synthetic_data", "--places", str(places), "--reviews-per-place", "4", "--skip-mentions",
+            stdout=StringIO(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.place_ids = list(Place.objects.order_by("id").values_list("id", flat=True)[:3])
+
+    def hot_queries(self):
+        newest = Review.objects.select_related("place").order_by("-created_at")
+        return {
+            # ReviewSearchViewSet: `q` scoped to `place`/`place_name`.
+            "search_by_place": newest.filter(place_id__in=self.place_ids, text__icontains="coffee")[:PAGE],
+            # ReviewViewSet filters.
+            "reviews_newest": Review.objects.order_by("-created_at")[:PAGE],
+            "reviews_by_place": Review.objects.filter(place=self.place_ids[0]).order_by("-created_at")[:PAGE],
+            "reviews_by_rating": Review.objects.filter(rating=5).order_by("-created_at")[:PAGE],
+            "reviews_by_language": Review.objects.filter(language="en").order_by("-created_at")[:PAGE],
+            # PlaceViewSet orderings, with the review_count subquery.
+            "places_by_name": PlaceViewSet.queryset.order_by("name")[:PAGE],
+            "places_by_rating": PlaceViewSet.queryset.order_by("-rating")[:PAGE],
+        }
+
+    def test_seeded_above_the_limit(self):
+        self.assertGreater(Place.objects.count(), settings.QUERY_PLAN_MAX_SEQ_SCAN_ROWS)
+        self.assertGreater(Review.objects.count(), settings.QUERY_PLAN_MAX_SEQ_SCAN_ROWS)
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in self.hot_queries().items():
+            with self.subTest(name):
+                self.assertNoSeqScan(queryset)
+
+    def test_unindexed_order_is_reported(self):
+        with self.assertRaisesMessage(AssertionError, "Sequential scan of menus_review"):
+            self.assertNoSeqScan(Review.objects.order_by("author_name")[:PAGE])
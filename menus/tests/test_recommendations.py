@@ -0,0 +1,189 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from menus import jobs, llm
+from menus.llm import estimate_tokens
+from menus.models import Job, Place, PlaceRecommendation, Review
+
+COMMAND = "menus.management.commands.generate_recommendations"
+
+
+class FakeEngine:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def embed(self, texts, batch_size=64):
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+class FakeRunner:
+    """Answers both prompts; the reasoning reply names the place so results can be compared."""
+
+    calls = 0
+
+    def __init__(self, llama_bin, model_path, max_tokens=512, temperature=0.4, threads=4):
+        self.model_path, self.max_tokens, self.temperature = model_path, max_tokens, temperature
+
+    def run(self, prompt):
+        FakeRunner.calls += 1
+        if "food review analyst" in prompt:
+            return json.dumps([{"menu_item": "latte"}])
+        name = prompt.split('Restaurant: "', 1)[1].split('"', 1)[0]
+        return json.dumps([{"text": f"Get the latte at {name}", "confidence": 0.9}])
+
+    def count_tokens(self, text):
+        return estimate_tokens(text)
+
+    def close(self):
+        pass
+
+
+class FakeServerRunner(FakeRunner):
+    """`LlamaServerRunner` stand-in that records how many servers were started and stopped."""
+
+    started = 0
+    closed = 0
+
+    def __init__(self, server_bin, model_path, max_tokens=512, temperature=0.4, threads=4, parallel=1):
+        super().__init__(server_bin, model_path, max_tokens, temperature, threads)
+        self.process = None
+        self.restarts = 0
+
+    def _ensure_running(self):
+        if self.process is None:
+            FakeServerRunner.started += 1
+            self.process = object()
+
+    def close(self):
+        FakeServerRunner.closed += 1
+        self.process = None
+
+
+def _place_lines(out):
+    return [line for line in out.splitlines() if not line.startswith(("Stage ", "Embeddings:", "LLM cache:", "Extraction prompts:"))]
+
+
+class RecommendationPipelineTests(TestCase):
+    def setUp(self):
+        for i in range(8):
+            place = Place.objects.create(name=f"Place {i}", google_place_id=f"g{i}")
+            Review.objects.create(
+                place=place, google_review_id=f"r{i}", rating=5, text="latte good " * i, created_at=timezone.now()
+            )
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.paths = [Path(tmp.name) / name for name in ("llama-run", "a2.gguf", "b.gguf", "cache.sqlite3")]
+        for path in self.paths[:3]:
+            path.touch()
+        FakeRunner.calls = 0
+
+    def _generate(self, *extra):
+        out = StringIO()
+        with mock.patch(f"{COMMAND}.EmbeddingEngine", FakeEngine), mock.patch(f"{COMMAND}.LlamaRunner", FakeRunner):
+            call_command(
+                "generate_recommendations",
+                "--backend", "subprocess",
+                "--llama-bin", str(self.paths[0]),
+                "--extractor-model", str(self.paths[1]),
+                "--reasoning-model", str(self.paths[2]),
+                "--llm-cache-path", str(self.paths[3]),
+                *extra,
+                stdout=out,
+            )
+        recs = sorted(PlaceRecommendation.objects.values_list("place__name", "text"))
+        return out.getvalue(), recs
+
+    def test_staged_pipeline_matches_sequential_run(self):
+        seq_out, seq_recs = self._generate("--sequential")
+        staged_out, staged_recs = self._generate("--force", "--extract-workers", "3", "--reason-workers", "2", "--queue-size", "1")
+
+        self.assertEqual(staged_recs, seq_recs)
+        self.assertEqual(len(staged_recs), 7)  # Place 0 has no review text
+        # Per-place log lines come out in place order either way.
+        self.assertEqual(_place_lines(staged_out), _place_lines(seq_out))
+        self.assertIn("Stage reason: 2 worker(s)", staged_out)
+
+    def test_unchanged_places_are_skipped_until_reviews_change(self):
+        self._generate()
+        first = dict(PlaceRecommendation.objects.values_list("place__name", "last_updated"))
+
+        out, _ = self._generate()
+        self.assertIn("Skipping 7 places with unchanged reviews", out)
+        self.assertEqual(dict(PlaceRecommendation.objects.values_list("place__name", "last_updated")), first)
+
+        Review.objects.filter(google_review_id="r3").update(text="flat white is the move here")
+        out, _ = self._generate()
+        self.assertIn("Skipping 6 places", out)
+        self.assertIn("Generated 1 recommendations for Place 3", out)
+        self.assertNotIn("for Place 4", out)
+
+        out, _ = self._generate("--force")
+        self.assertNotIn("Skipping", out)
+        self.assertEqual(out.count("Generated 1 recommendations"), 7)
+
+    def test_forced_rerun_answers_prompts_from_llm_cache(self):
+        self._generate()
+        self.assertEqual(FakeRunner.calls, 14)
+
+        out, _ = self._generate("--force")
+        self.assertEqual(FakeRunner.calls, 14)
+        self.assertIn("LLM cache: 14 hits, 0 misses", out)
+
+        self._generate("--force", "--no-llm-cache")
+        self.assertEqual(FakeRunner.calls, 28)
+
+
+    def test_queued_jobs_reuse_one_server_per_model(self):
+        FakeServerRunner.started = FakeServerRunner.closed = 0
+        self.addCleanup(llm._shared_servers.clear)
+        call_command(
+            "enqueue_jobs", "recommend",
+            "--places", *[str(p.id) for p in Place.objects.all()[:3]],
+            "--backend", "server",
+            "--llama-server-bin", str(self.paths[0]),
+            "--extractor-model", str(self.paths[1]),
+            "--reasoning-model", str(self.paths[2]),
+            stdout=StringIO(),
+        )
+        for job in Job.objects.all():
+            self.assertEqual(job.payload["backend"], "server")
+            job.payload["no_llm_cache"] = True
+            job.save(update_fields=["payload"])
+
+        with mock.patch(f"{COMMAND}.EmbeddingEngine", FakeEngine), mock.patch("menus.llm.LlamaServerRunner", FakeServerRunner):
+            while (job := jobs.claim_job("test")) is not None:
+                self.assertTrue(jobs.run_job(job, stdout=StringIO()), job.last_error)
+
+        self.assertEqual(PlaceRecommendation.objects.count(), 3 - 1)  # Place 0 has no review text
+        self.assertEqual((FakeServerRunner.started, FakeServerRunner.closed), (2, 0))
+
+
+class BenchmarkRecommendationsTests(TestCase):
+    def test_benchmark_runs_offline_and_rolls_back(self):
+        out = StringIO()
+        call_command(
+            "benchmark_recommendations",
+            "--places", "3",
+            "--reviews-per-place", "5",
+            "--embed-latency-ms", "0",
+            "--extract-latency-ms", "0",
+            "--reason-latency-ms", "0",
+            "--extract-workers", "2",
+            "--repeat", "2",
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("Run 1: 3 places", output)
+        self.assertIn("LLM cache: 6 hits, 0 misses", output)
+        self.assertIn("Stage extract: 2 worker(s), 3 item(s)", output)
+        self.assertIn("writes taking", output)
+        self.assertFalse(Place.objects.exists())
+        self.assertFalse(PlaceRecommendation.objects.exists())
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from menus.models import MenuItemMention, Place, PlaceItemSummary, Review
+from menus.sentiment import SentimentScorer
+
+
+class SentimentScorerTests(SimpleTestCase):
+    def setUp(self):
+        self.scorer = SentimentScorer()
+
+    def test_polarity_negation_and_intensifiers(self):
+        texts = [
+            "Delicious food, friendly staff.",
+            "Terrible service and bland food.",
+            "The pizza was not good.",
+            "The pizza was good.",
+            "The pizza was really good.",
+            "",
+            "It wasn't bad. Great coffee!",
+        ]
+        scores, _ = self.scorer.score(texts)
+        self.assertGreater(scores[0], 0.5)
+        self.assertLess(scores[1], -0.5)
+        self.assertLess(scores[2], 0)
+        self.assertGreater(scores[4], scores[3])
+        self.assertEqual(scores[5], 0)
+        # "wasn't" flips "bad"; the negation does not leak into the next sentence.
+        self.assertGreater(scores[6], scores[3])
+        self.assertTrue(((scores >= -1) & (scores <= 1)).all())
+
+    def test_mention_windows_stay_in_their_sentence(self):
+        text = "The burrito was amazing. Their coffee was awful and cold, honestly."
+        other = "Nothing to say about the latte."
+        spans = [(0, text.index("burrito"), text.index("burrito") + 7), (0, text.index("coffee"), text.index("coffee") + 6),
+                 (1, other.index("latte"), other.index("latte") + 5)]
+        scores, span_scores = self.scorer.score([text, other], spans)
+        self.assertGreater(span_scores[0], 0.5)
+        self.assertLess(span_scores[1], -0.5)
+        self.assertEqual(span_scores[2], 0)
+        self.assertEqual(len(scores), 2)
+
+
+class SentimentIngestTests(TestCase):
+    def setUp(self):
+        self.place = Place.objects.create(name="Sentiment Spot", google_place_id="sent-1")
+
+    def _review(self, key, text, rating=4):
+        return Review.objects.create(
+            place=self.place, google_review_id=key, rating=rating, text=text, created_at=timezone.now()
+        )
+
+    def test_extract_mentions_scores_reviews_mentions_and_summaries(self):
+        self._review("s1", "Amazing burrito. The latte was bland though.")
+        self._review("s2", "Great latte, friendly staff.", rating=4)
+        call_command("extract_mentions", stdout=StringIO())
+
+        self.assertGreater(Review.objects.get(google_review_id="s2").sentiment, 0.5)
+        burrito = MenuItemMention.objects.get(item__term="burrito")
+        latte = MenuItemMention.objects.get(item__term="latte", review__google_review_id="s1")
+        self.assertGreater(burrito.sentiment, 0)
+        self.assertLess(latte.sentiment, 0)
+        # Equal ratings: the warm latte mention is the top snippet.
+        summary = PlaceItemSummary.objects.get(item__term="latte")
+        self.assertAlmostEqual(summary.mean_sentiment, (latte.sentiment + MenuItemMention.objects.get(
+            item__term="latte", review__google_review_id="s2").sentiment) / 2, places=3)
+        self.assertEqual(summary.top_snippets[0]["review_id"], Review.objects.get(google_review_id="s2").id)
+
+    def test_score_sentiment_backfills_unscored_reviews(self):
+        review = self._review("s3", "Awful burrito.")
+        call_command("extract_mentions", stdout=StringIO())
+        Review.objects.update(sentiment=None)
+        MenuItemMention.objects.update(sentiment=None)
+        PlaceItemSummary.objects.update(mean_sentiment=None)
+
+        out = StringIO()
+        call_command("score_sentiment", stdout=out)
+        self.assertIn("Scored 1 review(s)", out.getvalue())
+        review.refresh_from_db()
+        self.assertLess(review.sentiment, 0)
+        self.assertLess(MenuItemMention.objects.get(review=review).sentiment, 0)
+        self.assertLess(PlaceItemSummary.objects.get(place=self.place).mean_sentiment, 0)
+
+        out = StringIO()
+        call_command("score_sentiment", stdout=out)
+        self.assertIn("Scored 0 review(s)", out.getvalue())
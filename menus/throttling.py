@@ -0,0 +1,158 @@
+"""
+Token-bucket API throttles shared by all gunicorn workers.
+
+DRF's `AnonRateThrottle`/`UserRateThrottle` keep a list of request
+timestamps per client in the default (per-process) cache: every worker
+enforces its own copy of the limit and the list grows with the rate. These
+subclasses keep the same scopes, rates (`DEFAULT_THROTTLE_RATES`) and client
+keys, but store one token bucket per client (`tokens`, `updated`: O(1)) in
+the shared local store (`menus/localstore.py`). A rate of N/period becomes a
+bucket of N tokens refilled at N/period per second.
+
+Each refill-and-take is a single `INSERT ... ON CONFLICT DO UPDATE ...
+RETURNING` statement, so it is atomic across processes without explicit
+locking. To keep the per-request cost in microseconds, a worker takes a
+small lease of tokens at once (up to `MAX_LEASE`, bounded by what the rate
+refills in `LEASE_SECONDS`) and serves the next requests from it in memory;
+a denied client is answered from memory until its next token is due. Slow
+rates such as 100/hour lease one token at a time and stay exact.
+
+The store is opt-in: with `LOCAL_STORE_PATH` empty (the default) the
+throttles behave exactly like DRF's. If the store can't be opened or
+written, requests are allowed and a warning is logged.
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from .localstore import STORE_ERRORS, LocalStore, store_path
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 1.0
+MAX_LEASE = 10
+# Buckets idle this long are full again for any DRF rate (at most per day) and can be dropped.
+IDLE_SECONDS = 86400
+PRUNE_EVERY = 1000
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS throttle_buckets ("
+    " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, granted INTEGER NOT NULL)"
+    " WITHOUT ROWID",
+]
+
+# Refill for the elapsed time (capped at capacity), then grant up to :want whole tokens.
+TAKE_SQL = """
+INSERT INTO throttle_buckets (key, tokens, updated, granted)
+VALUES (:key, :capacity - MIN(:want, CAST(:capacity AS INTEGER)), :now, MIN(:want, CAST(:capacity AS INTEGER)))
+ON CONFLICT (key) DO UPDATE SET
+    granted = MIN(:want, CAST(MIN(:capacity, tokens + MAX(:now - updated, 0) * :rate) AS INTEGER)),
+    tokens = MIN(:capacity, tokens + MAX(:now - updated, 0) * :rate)
+        - MIN(:want, CAST(MIN(:capacity, tokens + MAX(:now - updated, 0) * :rate) AS INTEGER)),
+    updated = :now
+RETURNING granted, tokens
+"""
+
+
+class TokenBucketStore:
+    """Shared buckets plus this process's leases and cached denials."""
+
+    def __init__(self, path: str):
+        self.store = LocalStore(path, SCHEMA)
+        self._lock = threading.Lock()
+        # key -> [tokens left, lease expiry]; key -> time the next token is due
+        self._leases: Dict[str, list] = {}
+        self._denied_until: Dict[str, float] = {}
+        self._takes = 0
+
+    def consume(self, key: str, capacity: float, rate: float) -> Tuple[bool, Optional[float]]:
+        """Take one token for `key`; returns (allowed, seconds until a token is due if denied)."""
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease[0] >= 1 and lease[1] > now:
+                lease[0] -= 1
+                return True, None
+            due = self._denied_until.get(key)
+            if due is not None and due > now:
+                return False, due - now
+
+        want = max(1, min(MAX_LEASE, int(rate * LEASE_SECONDS)))
+        granted, tokens = self._take(key, capacity, rate, want, now)
+        with self._lock:
+            if granted:
+                self._denied_until.pop(key, None)
+                self._leases[key] = [granted - 1, now + LEASE_SECONDS]
+                return True, None
+            wait = (1 - tokens) / rate if rate > 0 else None
+            self._denied_until[key] = now + (wait or 0)
+            return False, wait
+
+    def _take(self, key: str, capacity: float, rate: float, want: int, now: float) -> Tuple[int, float]:
+        conn = self.store.connect()
+        granted, tokens = conn.execute(
+            TAKE_SQL, {"key": key, "capacity": capacity, "rate": rate, "want": want, "now": now}
+        ).fetchone()
+        self._takes += 1
+        if self._takes % PRUNE_EVERY == 0:
+            self._prune(conn, now)
+        return granted, tokens
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM throttle_buckets WHERE updated < ?", (now - IDLE_SECONDS,))
+        with self._lock:
+            self._leases = {k: v for k, v in self._leases.items() if v[1] > now}
+            self._denied_until = {k: v for k, v in self._denied_until.items() if v > now}
+
+
+_stores: Dict[str, TokenBucketStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_bucket_store() -> Optional[TokenBucketStore]:
+    path = store_path()
+    if not path:
+        return None
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TokenBucketStore(path)
+        return _stores[path]
+
+
+class TokenBucketMixin:
+    """Token-bucket `allow_request`/`wait` for a DRF `SimpleRateThrottle` subclass."""
+
+    def allow_request(self, request, view):
+        buckets = get_bucket_store()
+        if buckets is None or self.rate is None:
+            return super().allow_request(request, view)
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        capacity, rate = float(self.num_requests), self.num_requests / self.duration
+        try:
+            allowed, self._wait = buckets.consume(key, capacity, rate)
+        except STORE_ERRORS as exc:
+            # Fail open: an unavailable store must not take the API down with it.
+            logger.warning("Throttle store unavailable, allowing request: %s", exc)
+            return True
+        return allowed
+
+    def wait(self):
+        if hasattr(self, "_wait"):
+            return math.ceil(self._wait) if self._wait is not None else None
+        return super().wait()
+
+
+class AnonTokenBucketThrottle(TokenBucketMixin, AnonRateThrottle):
+    pass
+
+
+class UserTokenBucketThrottle(TokenBucketMixin, UserRateThrottle):
+    pass
@@ -7,7 +7,9 @@ app_name = 'menus'
 router = DefaultRouter()
 router.register(r'places', views.PlaceViewSet, basename='place')
 router.register(r'search/reviews', views.ReviewSearchViewSet, basename='review-search')
-# Public API surface exposes places and keyword-based review search.
+router.register(r'search/semantic', views.SemanticReviewSearchViewSet, basename='semantic-search')
+router.register(r'items', views.ItemViewSet, basename='item')
+# Public API surface exposes places, keyword/semantic review search and item rankings.
 # Raw review listings remain internal/admin-only.
 
 urlpatterns = [
@@ -1,29 +1,130 @@
 from difflib import SequenceMatcher
 
-from rest_framework import viewsets, filters
+from django.core.management.base import CommandError
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAdminUser, AllowAny
-from .models import Place, Review
+from . import metrics
+from .localstore import STORE_ERRORS
+from .mentions import normalize_term
+from .models import ItemPlaceScore, MenuItem, MenuItemMention, Place, PlaceItemSummary, Review
+from .places import match_place_ids
+from .routers import use_replica
 from .serializers import (
+    ItemPlaceScoreSerializer,
+    PlaceItemSummarySerializer,
     PlaceSerializer,
     ReviewSerializer,
 )
 
 
-class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
+class QueryParamsMixin:
+    """Query-string helpers shared by the search viewsets."""
+
+    def _truthy_param(self, key: str) -> bool:
+        return (self.request.query_params.get(key) or '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+    def _parse_multi_param(self, key: str):
+        values = self.request.query_params.getlist(key) or []
+        expanded = []
+        for val in values:
+            expanded.extend([v.strip() for v in val.split(",") if v.strip()])
+        if key == 'place':
+            cleaned = []
+            for v in expanded:
+                try:
+                    cleaned.append(int(v))
+                except (TypeError, ValueError):
+                    continue
+            return cleaned
+        return expanded
+
+
+class ReplicaReadMixin:
+    """Serve the whole request's reads from the read replica when it is fresh (see `menus/routers.py`)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class PlaceViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Place model.
     Provides list and detail endpoints for restaurant places.
     """
-    queryset = Place.objects.all()
+    queryset = Place.objects.annotate(
+        review_count=Coalesce(
+            Subquery(
+                Review.objects.filter(place=OuterRef('pk')).order_by().values('place').annotate(n=Count('id')).values('n')
+            ),
+            0,
+        )
+    )
     serializer_class = PlaceSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['city']
     search_fields = ['name', 'address']
     ordering_fields = ['name', 'rating', 'user_ratings_total']
     ordering = ['name']
+    lookup_value_regex = r'\d+'
+
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk=None):
+        """Menu items mentioned at this place, most mentioned first (materialized summaries)."""
+        summaries = (
+            PlaceItemSummary.objects.filter(place_id=pk)
+            .select_related('item')
+            .order_by('-mention_count', 'item__name')
+        )
+        page = self.paginate_queryset(summaries)
+        rows = page if page is not None else summaries
+        # No summaries is normal for a new place; only an empty page pays for the existence check.
+        if not rows and not Place.objects.filter(pk=pk).exists():
+            raise Http404('No Place matches the given query.')
+        serializer = PlaceItemSummarySerializer(rows, many=True)
+        return self.get_paginated_response(serializer.data) if page is not None else Response(serializer.data)
+
+
+class ItemViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    """
+    Item-level rankings keyed by menu-item name (plural-insensitive).
+    `/api/items/<term>/places/` returns places ranked by a precomputed
+    Bayesian-average score (`ItemPlaceScore`); `limit` caps results (default 10, max 50).
+    """
+    queryset = MenuItem.objects.all()
+    permission_classes = [AllowAny]
+    lookup_field = 'term'
+    lookup_value_regex = '[^/]+'
+    max_limit = 50
+
+    @action(detail=True, methods=['get'])
+    def places(self, request, term=None):
+        term = normalize_term(term)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except (TypeError, ValueError):
+            limit = 10
+        # One read down the (item, rank) index; no count query, so cost doesn't grow with popularity.
+        scores = list(
+            ItemPlaceScore.objects.filter(item__term=term).select_related('item', 'place').order_by('rank')[:limit]
+        )
+        if not scores:
+            item = get_object_or_404(MenuItem, term=term)
+            return Response({'item': item.name, 'term': term, 'results': []})
+        return Response({
+            'item': scores[0].item.name,
+            'term': term,
+            'results': ItemPlaceScoreSerializer(scores, many=True).data,
+        })
 
 
 class ReviewViewSet(viewsets.ReadOnlyModelViewSet):
@@ -38,26 +139,30 @@ class ReviewViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['place', 'rating', 'language']
     search_fields = ['text', 'author_name']
-    ordering_fields = ['rating', 'created_at']
+    ordering_fields = ['rating', 'created_at', 'sentiment']
     ordering = ['-created_at']
 
 
-class ReviewSearchViewSet(viewsets.ReadOnlyModelViewSet):
+class ReviewSearchViewSet(ReplicaReadMixin, QueryParamsMixin, viewsets.ReadOnlyModelViewSet):
     """
     Public search over reviews by keyword. Supports optional place scoping by name or id.
     Includes a lightweight fuzzy fallback for minor misspellings.
+    Pass `collapse=1` to hide near-duplicate reviews (those with `duplicate_of` set).
+    Pass `item=<dish>` to match indexed menu-item mentions instead of (or on top of) `q`.
     """
     serializer_class = ReviewSerializer
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['text', 'author_name']
-    ordering_fields = ['created_at', 'rating']
+    ordering_fields = ['created_at', 'rating', 'sentiment']
     ordering = ['-created_at']
 
     def get_queryset(self):
         base = Review.objects.select_related('place')
         query = self.request.query_params.get('q')
-        if not query:
+        item = self.request.query_params.get('item')
+        if not query and not item:
+            metrics.inc('search_requests_total', mode='empty')
             return base.none()
 
         place_ids = self._parse_multi_param('place')
@@ -65,22 +170,36 @@ class ReviewSearchViewSet(viewsets.ReadOnlyModelViewSet):
 
         target_place_ids = set(place_ids)
         for name in place_names:
-            target_place_ids.update(self._match_place_ids(name))
+            target_place_ids.update(match_place_ids(name))
 
         if place_names and not target_place_ids:
+            metrics.inc('search_requests_total', mode='no_match')
             return base.none()
 
         if target_place_ids:
             base = base.filter(place_id__in=target_place_ids)
 
+        if self._truthy_param('collapse'):
+            base = base.filter(duplicate_of__isnull=True)
+
+        if item:
+            # Indexed join on (item, review) instead of scanning review text.
+            base = base.filter(id__in=MenuItemMention.objects.filter(item__term=normalize_term(item)).values('review_id'))
+            if not query:
+                metrics.inc('search_requests_total', mode='item')
+                return base
+
         qs = base.filter(text__icontains=query)
         if qs.exists() or len(query) < 3:
+            metrics.inc('search_requests_total', mode='exact')
             return qs
 
         # Fuzzy fallback for minor misspellings (small data sets only)
         fuzzy_ids = self._fuzzy_review_ids(base, query, limit=500)
         if not fuzzy_ids:
+            metrics.inc('search_requests_total', mode='no_match')
             return qs
+        metrics.inc('search_requests_total', mode='fuzzy')
         return base.filter(id__in=fuzzy_ids)
 
     @staticmethod
@@ -104,32 +223,80 @@ class ReviewSearchViewSet(viewsets.ReadOnlyModelViewSet):
                     break
         return ids
 
-    def _match_place_ids(self, term: str):
-        direct = list(Place.objects.filter(name__icontains=term).values_list("id", flat=True))
-        if direct:
-            return direct
 
-        norm_term = term.lower().strip()
-        scored = []
-        for place in Place.objects.all().values("id", "name"):
-            score = SequenceMatcher(None, norm_term, place["name"].lower()).ratio()
-            if score >= 0.6:
-                scored.append((score, place["id"]))
-        scored.sort(key=lambda tup: tup[0], reverse=True)
-        return [pid for _, pid in scored[:5]]
+class SemanticReviewSearchViewSet(ReplicaReadMixin, QueryParamsMixin, viewsets.ViewSet):
+    """
+    Public semantic search over reviews: `q` is embedded with the indexed model and
+    reviews are ranked by cosine similarity (see `menus/semantic.py`).
+    Supports optional place scoping by id (`place=1,2`) and `k` (default 20, max 100).
+    Answers 503 until `build_semantic_index` has been run.
+    """
+    permission_classes = [AllowAny]
+    max_results = 100
 
-    def _parse_multi_param(self, key: str):
-        values = self.request.query_params.getlist(key) or []
-        expanded = []
-        for val in values:
-            expanded.extend([v.strip() for v in val.split(",") if v.strip()])
-        if key == 'place':
-            cleaned = []
-            for v in expanded:
-                try:
-                    cleaned.append(int(v))
-                except (TypeError, ValueError):
-                    continue
-            return cleaned
-        return expanded
-    
+    def list(self, request):
+        query = (request.query_params.get('q') or '').strip()
+        if not query:
+            return Response({'detail': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = min(max(int(request.query_params.get('k', 20)), 1), self.max_results)
+        except (TypeError, ValueError):
+            return Response({'detail': 'k must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # numpy / sentence-transformers are optional for the rest of the API.
+            from . import semantic
+        except ImportError as exc:
+            return self._unavailable(exc)
+        try:
+            index = semantic.get_index()
+            query_vector = semantic.embed_query(index.model_name, query)
+        except (CommandError, semantic.IndexUnavailable) as exc:
+            return self._unavailable(exc)
+
+        hits = index.search(query_vector, k=k, place_ids=self._parse_multi_param('place'))
+        reviews = Review.objects.select_related('place').in_bulk([review_id for review_id, _ in hits])
+        results = []
+        for review_id, score in hits:
+            review = reviews.get(review_id)
+            if review is None:  # deleted since the index was built
+                continue
+            results.append({**ReviewSerializer(review).data, 'score': round(score, 4)})
+        return Response({'model': index.model_name, 'count': len(results), 'results': results})
+
+    @staticmethod
+    def _unavailable(exc):
+        return Response({'detail': f'Semantic search is unavailable: {exc}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class PrometheusTextRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (e.g. 403 for non-admins) arrive as {'detail': ...}.
+        return f"# {data.get('detail', data) if isinstance(data, dict) else data}\n".encode(self.charset)
+
+
+class MetricsView(APIView):
+    """
+    Admin-only Prometheus scrape endpoint (`/internal/metrics`): request counts,
+    latency and result-size histograms, throttling, search fallback and cache
+    counters, aggregated across workers (see `menus/metrics.py`).
+    """
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusTextRenderer]
+    throttle_classes = []  # scrapes must not eat into (or be rejected by) API rate limits
+
+    def get(self, request):
+        registry = metrics.get_registry()
+        if registry is None:
+            return Response('# metrics are disabled (LOCAL_STORE_PATH is empty)\n', status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            text = registry.render()
+        except STORE_ERRORS as exc:
+            return Response(f'# metrics store unavailable: {exc}\n', status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(text, content_type='text/plain; version=0.0.4; charset=utf-8')
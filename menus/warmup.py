@@ -0,0 +1,129 @@
+"""
+Deploy-time cache warm-up, so the first users after a rollout don't pay for
+empty caches and cold database pages.
+
+`warm()` runs each step in order and returns how long it took:
+
+  - place_names: the cached place-name list behind fuzzy `place_name=`
+    matching (`menus/places.py`), in the default Django cache,
+  - place_list: the first page of `/api/places/` (query and serializer),
+  - search_terms: the first page of keyword and item searches for the most
+    mentioned menu items, plus any extra terms given,
+  - semantic_index: the memory-mapped semantic index and its query encoder,
+    skipped when no index has been built.
+
+Reads run inside `use_replica()`, so they warm the database that serves the
+API. What a run warms depends on where it runs:
+
+  - `python manage.py warm_caches` (its own process) fills the database and
+    OS page caches, including the index files' pages, and the default cache
+    when `CACHE_DIR` makes it a directory shared with the workers. The
+    per-process default cache, the index handle and the loaded query encoder
+    die with the command.
+  - `WARM_CACHES_ON_BOOT` makes `revove/wsgi.py` call `warm_on_boot()` in
+    the serving process, which also keeps that per-process state. With
+    `gunicorn --preload` that is the master, and forked workers inherit it.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from .mentions import normalize_term
+from .models import MenuItem, MenuItemMention, Review
+from .places import place_names
+from .routers import use_replica
+from .serializers import PlaceSerializer, ReviewSerializer
+from .views import PlaceViewSet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_TERMS = 20
+SEMANTIC_WARM_QUERY = "great food"
+
+
+def _page_size() -> int:
+    return settings.REST_FRAMEWORK.get("PAGE_SIZE") or 20
+
+
+def warm_place_names() -> str:
+    return f"{len(place_names(refresh=True))} place(s)"
+
+
+def warm_place_list() -> str:
+    queryset = PlaceViewSet.queryset.order_by(*PlaceViewSet.ordering)
+    total = queryset.count()
+    PlaceSerializer(queryset[:_page_size()], many=True).data
+    return f"{total} place(s)"
+
+
+def top_search_terms(limit: int) -> List[str]:
+    """The most mentioned menu items: the dishes people search for most (no query log is kept)."""
+    if limit <= 0:
+        return []
+    items = MenuItem.objects.annotate(n=Count("mentions")).filter(n__gt=0).order_by("-n", "term")
+    return list(items.values_list("term", flat=True)[:limit])
+
+
+def warm_search_terms(top: int = DEFAULT_TOP_TERMS, extra: Iterable[str] = ()) -> str:
+    terms = top_search_terms(top)
+    terms += [term for term in (normalize_term(t) for t in extra) if term and term not in terms]
+    reviews = Review.objects.select_related("place").order_by("-created_at")
+    size = _page_size()
+    for term in terms:
+        ReviewSerializer(reviews.filter(text__icontains=term)[:size], many=True).data
+        mentioned = MenuItemMention.objects.filter(item__term=term).values("review_id")
+        ReviewSerializer(reviews.filter(id__in=mentioned)[:size], many=True).data
+    return f"{len(terms)} term(s)"
+
+
+def warm_semantic_index() -> str:
+    try:
+        # numpy / sentence-transformers are optional for the rest of the API.
+        from . import semantic
+    except ImportError as exc:
+        return f"skipped: {exc}"
+    try:
+        index = semantic.get_index()
+        index.search(semantic.embed_query(index.model_name, SEMANTIC_WARM_QUERY), k=1)
+    except (CommandError, semantic.IndexUnavailable) as exc:
+        return f"skipped: {exc}"
+    return f"{len(index)} vector(s), model {index.model_name}"
+
+
+def warm(top_terms: int = DEFAULT_TOP_TERMS, terms: Sequence[str] = (), semantic: bool = True) -> List[Dict[str, object]]:
+    """Run every warm-up step; returns `[{"step", "ms", "detail"}, ...]` in run order."""
+    steps = [
+        ("place_names", warm_place_names),
+        ("place_list", warm_place_list),
+        ("search_terms", lambda: warm_search_terms(top_terms, terms)),
+    ]
+    if semantic:
+        steps.append(("semantic_index", warm_semantic_index))
+
+    results = []
+    with use_replica():
+        for name, step in steps:
+            started = time.perf_counter()
+            detail = step()
+            results.append({"step": name, "ms": round((time.perf_counter() - started) * 1000, 1), "detail": detail})
+    return results
+
+
+def warm_on_boot() -> None:
+    """Worker boot hook: warm up and log the timings; never stops the worker from starting."""
+    started = time.perf_counter()
+    try:
+        results = warm(top_terms=getattr(settings, "WARM_CACHES_TOP_TERMS", DEFAULT_TOP_TERMS))
+    except Exception:
+        logger.exception("Cache warm-up failed; serving cold")
+        return
+    logger.info(
+        "Warmed caches in %.0f ms: %s",
+        (time.perf_counter() - started) * 1000,
+        ", ".join(f"{r['step']} {r['ms']:.0f} ms ({r['detail']})" for r in results),
+    )
@@ -29,6 +29,9 @@ def _get_bool_env(key: str, default: bool = False) -> bool:
 
 def _parse_db_url(url: str):
     parsed = urlparse(url)
+    if parsed.scheme in {"sqlite", "sqlite3"}:
+        # sqlite:///relative.sqlite3 or sqlite:////absolute/path.sqlite3 (handy for local replica testing)
+        return {"ENGINE": "django.db.backends.sqlite3", "NAME": parsed.path[1:]}
     return {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": parsed.path.lstrip("/"),
@@ -72,6 +75,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'menus.metrics.MetricsMiddleware',
+    'menus.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -119,6 +124,16 @@ else:
         }
     }
 
+# Optional read replica for the public read-only viewsets (see `menus/routers.py`). Locally,
+# two SQLite files work: DATABASE_URL=sqlite:///db.sqlite3 REPLICA_DATABASE_URL=sqlite:///replica.sqlite3
+# (copy the primary file to "replicate").
+replica_db_url = os.getenv('REPLICA_DATABASE_URL')
+if replica_db_url:
+    DATABASES['replica'] = _parse_db_url(replica_db_url)
+REPLICA_DATABASE_ALIAS = 'replica' if replica_db_url else None
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '5'))
+DATABASE_ROUTERS = ['menus.routers.PrimaryReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -173,8 +188,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'menus.throttling.AnonTokenBucketThrottle',
+        'menus.throttling.UserTokenBucketThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -193,3 +208,55 @@ CSRF_COOKIE_SECURE = _get_bool_env('CSRF_COOKIE_SECURE', default=False)
 raw_csrf_trusted = os.getenv('CSRF_TRUSTED_ORIGINS', '')
 if raw_csrf_trusted:
     CSRF_TRUSTED_ORIGINS = [o.strip() for o in raw_csrf_trusted.split(',') if o.strip()]
+
+# Per-request SQL/timing metrics (`menus/instrumentation.py`): fraction of requests sampled,
+# and whether sampled responses carry a Server-Timing header (exposes query counts; off unless DEBUG).
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.1'))
+REQUEST_METRICS_SERVER_TIMING = _get_bool_env('REQUEST_METRICS_SERVER_TIMING', default=DEBUG)
+
+# Opt-in SQLite (WAL) file shared by the workers for throttle buckets and /internal/metrics (`menus/localstore.py`).
+LOCAL_STORE_PATH = os.getenv('LOCAL_STORE_PATH', '')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per sampled request
+        'menus.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        # Warm-up timings logged at worker boot (WARM_CACHES_ON_BOOT)
+        'menus.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Default cache: per-process memory; set CACHE_DIR to share a FileBasedCache directory across the host's processes.
+CACHE_DIR = os.getenv('CACHE_DIR', '')
+CACHES = {
+    'default': (
+        {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_DIR}
+        if CACHE_DIR
+        else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    ),
+}
+
+# Cache warm-up (`menus/warmup.py`, `warm_caches`; WARM_CACHES_ON_BOOT warms each worker from `revove/wsgi.py`).
+WARM_CACHES_ON_BOOT = _get_bool_env('WARM_CACHES_ON_BOOT')
+WARM_CACHES_TOP_TERMS = int(os.getenv('WARM_CACHES_TOP_TERMS', '20'))
+PLACE_NAMES_CACHE_SECONDS = int(os.getenv('PLACE_NAMES_CACHE_SECONDS', '300'))
+
+# menus/tests/test_query_plans.py: hot queries may only sequentially scan tables up to this many rows.
+QUERY_PLAN_MAX_SEQ_SCAN_ROWS = int(os.getenv('QUERY_PLAN_MAX_SEQ_SCAN_ROWS', '1000'))
+
+# Memory-mapped review embedding index for /api/search/semantic/ (built by `build_semantic_index`)
+SEMANTIC_INDEX_DIR = os.getenv('SEMANTIC_INDEX_DIR', str(BASE_DIR / '.cache' / 'semantic_index'))
@@ -15,5 +15,22 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
-    }
+    },
+    # Separate database for the replica-routing tests; only created for tests that declare it, and
+    # only routed to when a test sets REPLICA_DATABASE_ALIAS.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
 }
+REPLICA_DATABASE_ALIAS = None
+
+# Instrument every request so tests can read `response.wsgi_request.metrics`; keep the log quiet.
+REQUEST_METRICS_SAMPLE_RATE = 1.0
+LOGGING["loggers"]["menus.requests"]["level"] = "WARNING"  # noqa: F405
+
+# No shared local store unless a test points LOCAL_STORE_PATH at a temp file.
+LOCAL_STORE_PATH = ""
+
+# Per-process cache so test runs don't share (or leave behind) cache files.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
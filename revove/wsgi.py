@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'revove.settings')
 
 application = get_wsgi_application()
+
+# Each worker loads this module as it boots (or the master, with gunicorn --preload).
+if settings.WARM_CACHES_ON_BOOT:
+    from django.db import connections
+
+    from menus.warmup import warm_on_boot
+
+    warm_on_boot()
+    # Don't hand the warm-up's DB connections to forked workers (--preload).
+    connections.close_all()